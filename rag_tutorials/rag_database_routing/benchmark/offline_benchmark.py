@@ -0,0 +1,338 @@
+"""离线工作流基准测试：各节点延迟、每个问题的embedding次数、写入吞吐量
+
+使用确定性的词袋哈希embedding、模拟的聊天模型和本地向量存储（临时目录），不需要API密钥和Qdrant服务：
+1. ``RAGWorkflow.add_documents``写入合成文档，报告文档块/秒和各阶段吞吐量
+2. ``RAGWorkflow.process_question``逐个回答合成问题，报告每个图节点（route/retrieve/generate）
+   以及整个问题的p50/p95/p99延迟、每个问题的embedding次数和路由方法分布
+
+结果写入JSON，``--compare``与之前（例如上一个提交）的结果对比。
+
+用法:
+    python benchmark/offline_benchmark.py --json results.json
+    python benchmark/offline_benchmark.py --questions 500 --llm-latency-ms 20 --compare results.json
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.data import COLLECTIONS
+from src.tools import LocalVectorStoreManager
+from src.tools.sparse_index import tokenize
+from src.workflow import RAGWorkflow
+
+
+# 图节点 -> 报告中的名称
+NODES = {"route_query": "route", "retrieve_documents": "retrieve", "generate_answer": "generate"}
+PERCENTILES = (50, 95, 99)
+
+
+class HashingEmbeddings(Embeddings):
+    """Deterministic bag-of-words embedding: each token maps to a fixed random vector.
+
+    共享词语越多的文本向量越接近，问题可以像真实embedding一样通过向量相似度路由；
+    同时统计embedding调用次数。
+    """
+
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+        self.query_calls = 0
+        self.document_texts = 0
+        self._token_vectors: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def _token_vector(self, token: str) -> np.ndarray:
+        vector = self._token_vectors.get(token)
+        if vector is None:
+            seed = int.from_bytes(hashlib.sha1(token.encode("utf-8")).digest()[:8], "little")
+            vector = np.random.default_rng(seed).standard_normal(self.dimension)
+            self._token_vectors[token] = vector
+        return vector
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimension)
+        for token, count in Counter(tokenize(text)).items():
+            vector += count * self._token_vector(token)
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self._lock:
+            self.document_texts += len(texts)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        with self._lock:
+            self.query_calls += 1
+        return self._embed(text)
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model stand-in: answers routing prompts with the collection named in the question, otherwise a fixed answer."""
+
+    answer: str = "这是一个基准测试答案。"
+    latency_ms: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "offline-benchmark"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        prompt = str(messages[-1].content) if messages else ""
+        content = self.answer
+        if "用户问题：" in prompt:
+            question = prompt.rsplit("用户问题：", 1)[-1]
+            content = next((db_type for db_type in COLLECTIONS if db_type in question), "none")
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+
+class OfflineWebSearch:
+    """Web search stand-in so fallbacks never reach the network."""
+
+    def _run(self, query: str) -> str:
+        return f"网络搜索结果（离线基准测试）：{query}"
+
+    async def _arun(self, query: str) -> str:
+        return self._run(query)
+
+
+class NodeTimer(BaseCallbackHandler):
+    """Records the wall time of each LangGraph node run."""
+
+    def __init__(self):
+        self.timings: Dict[str, List[float]] = defaultdict(list)
+        self._starts: Dict[Any, tuple] = {}
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs) -> None:
+        name = kwargs.get("name")
+        # 节点内部的子链也带有langgraph_node元数据，只记录节点本身
+        if name in NODES and (metadata or {}).get("langgraph_node") == name:
+            self._starts[run_id] = (name, time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs) -> None:
+        started = self._starts.pop(run_id, None)
+        if started:
+            self.timings[NODES[started[0]]].append((time.perf_counter() - started[1]) * 1000)
+
+    def on_chain_error(self, error, *, run_id, **kwargs) -> None:
+        self._starts.pop(run_id, None)
+
+
+class _UploadedFile:
+    """Minimal Streamlit upload object."""
+
+    def __init__(self, name: str, content: str):
+        self.name = name
+        self.type = "text/plain"
+        self._content = content.encode("utf-8")
+
+    def getvalue(self) -> bytes:
+        return self._content
+
+
+def topic_vocabulary(words_per_topic: int) -> Dict[str, List[str]]:
+    """Synthetic vocabulary per collection (tokens carry the collection name, e.g. ``products7``)."""
+    return {db_type: [f"{db_type}{i}" for i in range(words_per_topic)] for db_type in COLLECTIONS}
+
+
+def make_files(vocabulary: Dict[str, List[str]], files: int, words_per_file: int, rng) -> Dict[str, List[_UploadedFile]]:
+    """Synthetic documents: each file draws its words from one collection's vocabulary."""
+    uploads: Dict[str, List[_UploadedFile]] = defaultdict(list)
+    db_types = list(vocabulary)
+    for i in range(files):
+        db_type = db_types[i % len(db_types)]
+        words = rng.choice(vocabulary[db_type], size=words_per_file)
+        uploads[db_type].append(_UploadedFile(f"{db_type}_{i}.txt", " ".join(words)))
+    return uploads
+
+
+def make_questions(vocabulary: Dict[str, List[str]], count: int, words: int, rng) -> List[str]:
+    db_types = list(vocabulary)
+    return [
+        " ".join(rng.choice(vocabulary[db_types[i % len(db_types)]], size=words, replace=False))
+        for i in range(count)
+    ]
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    result = {f"p{p}_ms": round(float(np.percentile(values, p)), 3) for p in PERCENTILES}
+    result["mean_ms"] = round(float(np.mean(values)), 3)
+    result["count"] = len(values)
+    return result
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def run(args) -> dict:
+    rng = np.random.default_rng(args.seed)
+    vocabulary = topic_vocabulary(args.words_per_topic)
+    uploads = make_files(vocabulary, args.files, args.words_per_file, rng)
+    questions = make_questions(vocabulary, args.warmup + args.questions, args.question_words, rng)
+
+    embeddings = HashingEmbeddings(args.dimension)
+    with tempfile.TemporaryDirectory() as directory:
+        manager = LocalVectorStoreManager(path=directory, embeddings=embeddings)
+        workflow = RAGWorkflow(vector_store_manager=manager)
+        llm = FakeChatModel(latency_ms=args.llm_latency_ms)
+        workflow.routing_agent.llm = llm
+        workflow.qa_agent.llm = llm
+        workflow.qa_agent.web_search_tool = OfflineWebSearch()
+
+        # 写入
+        ingestion_stats = {}
+        total_chunks, ingest_seconds = 0, 0.0
+        for db_type, files in uploads.items():
+            start = time.perf_counter()
+            result = workflow.add_documents(db_type, files)
+            elapsed = time.perf_counter() - start
+            if not result["success"]:
+                raise RuntimeError(f"写入 {db_type} 失败: {result['error']}")
+            total_chunks += result["num_chunks"]
+            ingest_seconds += elapsed
+            ingestion_stats[db_type] = {
+                "files": len(files),
+                "chunks": result["num_chunks"],
+                "seconds": round(elapsed, 3),
+                "stage_stats": result["stage_stats"],
+            }
+
+        # 问答：节点计时通过回调记录，工作流代码不需要改动
+        timer = NodeTimer()
+        workflow.workflow = workflow.workflow.with_config(callbacks=[timer])
+        for question in questions[:args.warmup]:
+            workflow.process_question(question)
+        timer.timings.clear()
+        query_calls_before = embeddings.query_calls
+
+        totals, embedding_calls, methods, failures = [], [], Counter(), 0
+        for question in questions[args.warmup:]:
+            start = time.perf_counter()
+            result = workflow.process_question(question)
+            totals.append((time.perf_counter() - start) * 1000)
+            embedding_calls.append(result["embedding_calls"])
+            methods[result["routing_info"].get("routing_method") or "error"] += 1
+            failures += not result["success"]
+        manager.close()
+
+    return {
+        "commit": git_commit(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("json", "compare", "verbose")},
+        "ingestion": {
+            "chunks": total_chunks,
+            "seconds": round(ingest_seconds, 3),
+            "chunks_per_second": round(total_chunks / ingest_seconds, 2) if ingest_seconds else 0.0,
+            "embedded_texts": embeddings.document_texts,
+            "collections": ingestion_stats,
+        },
+        "questions": {
+            "count": len(totals),
+            "failures": failures,
+            "embedding_calls_per_question": round(float(np.mean(embedding_calls)), 3),
+            "embed_query_calls_per_question": round((embeddings.query_calls - query_calls_before) / len(totals), 3),
+            "routing_methods": dict(methods),
+        },
+        "nodes": {
+            **{name: percentiles(timer.timings[name]) for name in NODES.values()},
+            "total": percentiles(totals),
+        },
+    }
+
+
+def print_results(results: dict) -> None:
+    ingestion = results["ingestion"]
+    print(f"\n📥 写入: {ingestion['chunks']} 个文档块, {ingestion['seconds']}s, {ingestion['chunks_per_second']} 块/秒")
+    questions = results["questions"]
+    print(
+        f"❓ 问答: {questions['count']} 个问题, 失败 {questions['failures']}, "
+        f"每个问题embedding {questions['embedding_calls_per_question']} 次, 路由方法 {questions['routing_methods']}"
+    )
+    print(f"\n{'节点':<12}" + "".join(f"{f'p{p}(ms)':>12}" for p in PERCENTILES) + f"{'平均(ms)':>12}")
+    for name, stats in results["nodes"].items():
+        if stats:
+            print(f"{name:<12}" + "".join(f"{stats[f'p{p}_ms']:>12.2f}" for p in PERCENTILES) + f"{stats['mean_ms']:>12.2f}")
+
+
+def print_comparison(results: dict, baseline: dict) -> None:
+    """Print p50/p95/p99 and ingestion throughput against a previous run."""
+    print(f"\n🔍 与 {baseline.get('commit') or '之前的结果'} 对比:")
+    for name, stats in results["nodes"].items():
+        old = baseline.get("nodes", {}).get(name)
+        if not stats or not old:
+            continue
+        changes = []
+        for p in PERCENTILES:
+            key = f"p{p}_ms"
+            delta = (stats[key] - old[key]) / old[key] if old[key] else 0.0
+            changes.append(f"p{p} {old[key]:.2f} → {stats[key]:.2f}ms ({delta:+.0%})")
+        print(f"   {name:<10}" + ", ".join(changes))
+    old_throughput = baseline.get("ingestion", {}).get("chunks_per_second")
+    if old_throughput:
+        new_throughput = results["ingestion"]["chunks_per_second"]
+        print(f"   写入       {old_throughput} → {new_throughput} 块/秒 ({new_throughput / old_throughput - 1:+.0%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="离线工作流基准测试")
+    parser.add_argument("--questions", type=int, default=200, help="计时的问题数")
+    parser.add_argument("--warmup", type=int, default=5, help="不计时的预热问题数")
+    parser.add_argument("--question-words", type=int, default=6, help="每个问题的词数")
+    parser.add_argument("--files", type=int, default=30, help="写入的文件数（平均分到各集合）")
+    parser.add_argument("--words-per-file", type=int, default=3000, help="每个文件的词数")
+    parser.add_argument("--words-per-topic", type=int, default=12, help="每个集合的词汇量")
+    parser.add_argument("--dimension", type=int, default=256, help="embedding维度")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="模拟的LLM调用延迟")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--verbose", action="store_true", help="显示工作流的输出")
+    parser.add_argument("--json", help="将结果写入JSON文件")
+    parser.add_argument("--compare", help="与之前保存的JSON结果对比")
+    args = parser.parse_args()
+
+    print(f"📊 离线工作流基准测试: {args.files} 个文件, {args.questions} 个问题")
+    # 工作流逐个问题打印的路由信息默认不显示
+    with contextlib.redirect_stdout(sys.stdout if args.verbose else io.StringIO()):
+        results = run(args)
+    print_results(results)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print_comparison(results, json.load(f))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"✅ 结果已写入 {args.json}")
+
+
+if __name__ == "__main__":
+    main()
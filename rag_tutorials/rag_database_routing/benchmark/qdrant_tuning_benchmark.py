@@ -0,0 +1,179 @@
+"""Qdrant集合参数基准测试：每组参数的延迟与recall@k
+
+为每组``CollectionConfig``参数（HNSW m/ef_construct、搜索ef、on_disk、量化）创建一个临时集合，
+写入相同的合成向量，逐个查询测量延迟，并与NumPy精确搜索结果比较recall@k，测试结束后删除集合。
+集合参数与``VectorStoreManager``使用相同的转换逻辑。
+
+需要Qdrant服务（内存模式``--url :memory:``忽略集合参数，只能用于检查脚本本身）:
+    python benchmark/qdrant_tuning_benchmark.py --url http://localhost:6333 --vectors 20000
+    python benchmark/qdrant_tuning_benchmark.py --grpc   # 使用.env中的QDRANT_URL，通过gRPC连接
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from dataclasses import replace
+
+import numpy as np
+from qdrant_client import QdrantClient, models
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.data import CollectionConfig
+from src.models.config import settings
+from src.tools.vector_store import VectorStoreManager
+
+
+BASE_CONFIG = CollectionConfig(name="benchmark", description="", collection_name="benchmark")
+
+# (名称, 参数)；未设置的参数使用Qdrant默认值（m=16, ef_construct=100）
+VARIANTS = [
+    ("默认", {}),
+    ("m=8 ef_construct=64 ef=32", {"hnsw_m": 8, "hnsw_ef_construct": 64, "search_ef": 32}),
+    ("m=16 ef=64", {"hnsw_m": 16, "search_ef": 64}),
+    ("m=16 ef=128", {"hnsw_m": 16, "search_ef": 128}),
+    ("m=16 ef=256", {"hnsw_m": 16, "search_ef": 256}),
+    ("m=32 ef_construct=200 ef=128", {"hnsw_m": 32, "hnsw_ef_construct": 200, "search_ef": 128}),
+    ("向量on_disk ef=128", {"search_ef": 128, "on_disk_vectors": True}),
+    ("int8量化 ef=128", {"search_ef": 128, "quantization": "int8"}),
+]
+
+
+def make_vectors(count: int, dimension: int, clusters: int, seed: int) -> np.ndarray:
+    """Generate clustered vectors (documents of a topic lie near a shared center)."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dimension))
+    labels = rng.integers(clusters, size=count)
+    return (centers[labels] + rng.normal(scale=0.8, size=(count, dimension))).astype(np.float32)
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """Exact cosine top-k row indices."""
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = queries @ normalized.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def wait_until_indexed(client: QdrantClient, collection_name: str, timeout: float) -> float:
+    """Wait for the optimizer to finish building the index; returns seconds waited."""
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if client.get_collection(collection_name).status == models.CollectionStatus.GREEN:
+            break
+        time.sleep(0.5)
+    return time.perf_counter() - start
+
+
+def run_variant(client, collection_name: str, config: CollectionConfig, vectors, queries, expected, args) -> dict:
+    if client.collection_exists(collection_name):
+        client.delete_collection(collection_name)
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=models.VectorParams(
+            size=vectors.shape[1],
+            distance=models.Distance.COSINE,
+            on_disk=VectorStoreManager._vectors_on_disk(config)
+        ),
+        hnsw_config=VectorStoreManager._hnsw_config(config),
+        optimizers_config=VectorStoreManager._optimizers_config(config),
+        on_disk_payload=config.on_disk_payload,
+        quantization_config=VectorStoreManager._quantization_config(config)
+    )
+    try:
+        start = time.perf_counter()
+        for offset in range(0, len(vectors), 1000):
+            client.upsert(
+                collection_name=collection_name,
+                points=models.Batch(
+                    ids=list(range(offset, min(offset + 1000, len(vectors)))),
+                    vectors=vectors[offset:offset + 1000].tolist()
+                ),
+                wait=True
+            )
+        upload_seconds = time.perf_counter() - start
+        index_seconds = wait_until_indexed(client, collection_name, args.index_timeout)
+
+        search_params = VectorStoreManager._collection_search_params(config)
+        latencies, hits = [], []
+        for query in queries:
+            start = time.perf_counter()
+            points = client.query_points(
+                collection_name=collection_name,
+                query=query.tolist(),
+                limit=args.k,
+                search_params=search_params,
+                with_payload=False
+            ).points
+            latencies.append((time.perf_counter() - start) * 1000)
+            hits.append({point.id for point in points})
+
+        recall = float(np.mean([len(h & set(e.tolist())) / args.k for h, e in zip(hits, expected)]))
+        return {
+            f"recall@{args.k}": recall,
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p95_ms": float(np.percentile(latencies, 95)),
+            "upload_s": upload_seconds,
+            "index_s": index_seconds,
+        }
+    finally:
+        client.delete_collection(collection_name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Qdrant集合参数基准测试")
+    parser.add_argument("--url", default=settings.qdrant_url, help="Qdrant URL（默认使用.env中的QDRANT_URL）")
+    parser.add_argument("--api-key", default=settings.qdrant_api_key, help="Qdrant API密钥")
+    parser.add_argument("--grpc", action="store_true", default=settings.qdrant_prefer_grpc, help="使用gRPC连接")
+    parser.add_argument("--vectors", type=int, default=20000, help="向量数")
+    parser.add_argument("--dimension", type=int, default=settings.vector_size, help="向量维度")
+    parser.add_argument("--clusters", type=int, default=100, help="合成数据的主题数")
+    parser.add_argument("--queries", type=int, default=200, help="查询数")
+    parser.add_argument("--k", type=int, default=10, help="recall@k的k")
+    parser.add_argument("--index-timeout", type=float, default=300, help="等待索引构建的最长秒数")
+    parser.add_argument("--json", help="将结果写入JSON文件")
+    args = parser.parse_args()
+
+    if not args.url:
+        parser.error("请通过--url或.env中的QDRANT_URL指定Qdrant服务")
+    if args.url == ":memory:":
+        print("⚠️ 内存模式忽略HNSW/on_disk/量化参数，各组结果相同，只用于检查脚本")
+        client = QdrantClient(":memory:")
+    else:
+        client = QdrantClient(
+            url=args.url,
+            api_key=args.api_key,
+            timeout=settings.qdrant_timeout,
+            prefer_grpc=args.grpc,
+            grpc_port=settings.qdrant_grpc_port
+        )
+
+    vectors = make_vectors(args.vectors, args.dimension, args.clusters, seed=0)
+    queries = make_vectors(args.queries, args.dimension, args.clusters, seed=1)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    expected = exact_top_k(vectors, queries, args.k)
+
+    transport = "gRPC" if args.grpc else "HTTP"
+    print(f"📊 Qdrant参数基准测试 ({transport}): {args.vectors}个{args.dimension}维向量, {args.queries}个查询, k={args.k}")
+    print(f"\n{'参数':<32}{'recall@' + str(args.k):>10}{'p50(ms)':>10}{'p95(ms)':>10}{'写入(s)':>10}{'索引(s)':>10}")
+
+    results = {}
+    for i, (name, overrides) in enumerate(VARIANTS):
+        result = run_variant(
+            client, f"benchmark_tuning_{i}", replace(BASE_CONFIG, **overrides), vectors, queries, expected, args
+        )
+        results[name] = {"config": overrides, **result}
+        print(
+            f"{name:<32}{result[f'recall@{args.k}']:>10.3f}{result['p50_ms']:>10.2f}"
+            f"{result['p95_ms']:>10.2f}{result['upload_s']:>10.1f}{result['index_s']:>10.1f}"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"✅ 结果已写入 {args.json}")
+
+
+if __name__ == "__main__":
+    main()
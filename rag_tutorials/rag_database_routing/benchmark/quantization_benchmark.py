@@ -0,0 +1,119 @@
+"""量化存储基准测试：内存占用与recall@k
+
+在本地向量存储上比较float32精确搜索和int8搜索 + float32重新打分（候选不放大 / 放大``--oversampling``倍）。
+本地存储总是用float32向量为候选重新打分；不放大时重新打分只改变候选的顺序，recall@k与只用int8搜索相同。
+向量为合成的聚类数据（默认2048维，与豆包embedding相同），不需要API密钥。
+
+用法:
+    python benchmark/quantization_benchmark.py --vectors 20000 --dimension 2048 --k 10
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from langchain_core.documents import Document
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.tools.local_vector_store import LocalCollection
+
+
+def make_vectors(count: int, dimension: int, clusters: int, seed: int) -> np.ndarray:
+    """Generate clustered vectors (documents of a topic lie near a shared center)."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dimension))
+    labels = rng.integers(clusters, size=count)
+    return (centers[labels] + rng.normal(scale=0.8, size=(count, dimension))).astype(np.float32)
+
+
+def recall_at_k(expected, actual) -> float:
+    """Mean fraction of the exact top-k found by the approximate search."""
+    return float(np.mean([
+        len({doc.page_content for doc, _ in e} & {doc.page_content for doc, _ in a}) / max(len(e), 1)
+        for e, a in zip(expected, actual)
+    ]))
+
+
+def search_bytes(count: int, dimension: int, quantization) -> int:
+    """Bytes scanned (and kept resident) by a full search."""
+    if quantization == "int8":
+        return count * (dimension + 4)
+    return count * dimension * 4
+
+
+def run(args) -> dict:
+    vectors = make_vectors(args.vectors, args.dimension, args.clusters, seed=0)
+    # 查询来自同一分布，但不是库中的向量
+    queries = make_vectors(args.queries, args.dimension, args.clusters, seed=1)
+    ids = [str(i) for i in range(args.vectors)]
+    documents = [Document(page_content=doc_id) for doc_id in ids]
+
+    variants = [
+        ("float32", None, 1.0),
+        ("int8 + 重新打分 x1", "int8", 1.0),
+        (f"int8 + 重新打分 x{args.oversampling:g}", "int8", args.oversampling),
+    ]
+
+    results = {}
+    exact = None
+    with tempfile.TemporaryDirectory() as directory:
+        for name, quantization, oversampling in variants:
+            collection = LocalCollection(
+                os.path.join(directory, name.replace(" ", "_")), name,
+                quantization=quantization, rescore_oversampling=oversampling
+            )
+            collection.upsert(ids, documents, vectors)
+
+            collection.search(queries[:1], args.k)
+            start = time.perf_counter()
+            hits = collection.search(queries, args.k)
+            elapsed = time.perf_counter() - start
+            collection.close()
+
+            if exact is None:
+                exact = hits
+            results[name] = {
+                "search_bytes": search_bytes(args.vectors, args.dimension, quantization),
+                f"recall@{args.k}": recall_at_k(exact, hits),
+                "ms_per_query": elapsed / len(queries) * 1000,
+            }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="量化存储基准测试")
+    parser.add_argument("--vectors", type=int, default=20000, help="向量数")
+    parser.add_argument("--dimension", type=int, default=2048, help="向量维度")
+    parser.add_argument("--clusters", type=int, default=100, help="合成数据的主题数")
+    parser.add_argument("--queries", type=int, default=200, help="查询数")
+    parser.add_argument("--k", type=int, default=10, help="recall@k的k")
+    parser.add_argument("--oversampling", type=float, default=3.0, help="重新打分的候选倍数")
+    parser.add_argument("--json", help="将结果写入JSON文件")
+    args = parser.parse_args()
+
+    print(f"📊 量化基准测试: {args.vectors}个{args.dimension}维向量, {args.queries}个查询, k={args.k}")
+    results = run(args)
+
+    baseline = results["float32"]["search_bytes"]
+    print(f"\n{'方案':<24}{'内存(MB)':>10}{'节省':>8}{'recall@' + str(args.k):>12}{'ms/查询':>10}")
+    for name, result in results.items():
+        saved = 1 - result["search_bytes"] / baseline
+        print(
+            f"{name:<24}{result['search_bytes'] / 2**20:>10.1f}{saved:>8.0%}"
+            f"{result[f'recall@{args.k}']:>12.3f}{result['ms_per_query']:>10.2f}"
+        )
+    print("\n内存为搜索时需要常驻内存的向量数据；量化后float32原始向量留在磁盘上，只读取重新打分的候选行。")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"✅ 结果已写入 {args.json}")
+
+
+if __name__ == "__main__":
+    main()
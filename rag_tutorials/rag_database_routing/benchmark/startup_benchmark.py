@@ -0,0 +1,110 @@
+"""启动（导入）耗时基准测试与回归检查
+
+在新的Python进程中用``python -X importtime``导入各个模块，报告累计导入耗时（多次运行取中位数）
+和按顶层包汇总的耗时，并检查重依赖（qdrant_client、pypdf、langchain_community等）没有在导入时被加载。
+重依赖被加载或耗时超过``--max-ms``时以非零状态退出，可用于CI中防止启动变慢。
+
+用法:
+    python benchmark/startup_benchmark.py
+    python benchmark/startup_benchmark.py --module src.workflow --runs 10 --max-ms 2500
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+PROJECT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+DEFAULT_MODULES = ["src.models", "src.tools", "src.agents", "src.workflow"]
+
+# 只在对应功能第一次使用时才应导入的包
+HEAVY_MODULES = [
+    "qdrant_client", "langchain_qdrant", "pypdf", "langchain_community",
+    "langchain", "langchain_openai", "openai", "duckduckgo_search"
+]
+
+
+def import_profile(module: str) -> Tuple[float, Dict[str, float]]:
+    """Import ``module`` in a fresh interpreter; returns (cumulative ms, self ms per top-level package)."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+    )
+    total = 0.0
+    packages: Dict[str, float] = defaultdict(float)
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # 表头
+        name = name.strip()
+        packages[name.split(".")[0]] += int(self_us) / 1000
+        if name == module:
+            total = int(cumulative_us) / 1000
+    return total, dict(packages)
+
+
+def run(modules: List[str], runs: int, top: int) -> dict:
+    results = {}
+    for module in modules:
+        totals, packages = [], {}
+        for _ in range(runs):
+            total, packages = import_profile(module)
+            totals.append(total)
+        results[module] = {
+            "median_ms": statistics.median(totals),
+            "min_ms": min(totals),
+            "heavy_modules": [name for name in HEAVY_MODULES if name in packages],
+            "top_packages": dict(sorted(packages.items(), key=lambda item: -item[1])[:top]),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动（导入）耗时基准测试")
+    parser.add_argument("--module", action="append", help="要导入的模块（可重复，默认: src.models/tools/agents/workflow）")
+    parser.add_argument("--runs", type=int, default=5, help="每个模块的导入次数（每次一个新进程）")
+    parser.add_argument("--top", type=int, default=8, help="显示耗时最多的顶层包数")
+    parser.add_argument("--max-ms", type=float, default=0, help="导入耗时中位数上限（0 = 不检查）")
+    parser.add_argument("--json", help="将结果写入JSON文件")
+    args = parser.parse_args()
+
+    modules = args.module or DEFAULT_MODULES
+    print(f"📊 启动基准测试: {len(modules)} 个模块, 每个导入 {args.runs} 次")
+    results = run(modules, args.runs, args.top)
+
+    failed = False
+    print(f"\n{'模块':<20}{'中位数(ms)':>12}{'最小(ms)':>12}  重依赖")
+    for module, result in results.items():
+        heavy = ", ".join(result["heavy_modules"]) or "无"
+        print(f"{module:<20}{result['median_ms']:>12.1f}{result['min_ms']:>12.1f}  {heavy}")
+        if result["heavy_modules"]:
+            failed = True
+        if args.max_ms and result["median_ms"] > args.max_ms:
+            print(f"   ⚠️ 超过上限 {args.max_ms:.0f}ms")
+            failed = True
+
+    slowest = max(results, key=lambda module: results[module]["median_ms"])
+    print(f"\n{slowest} 耗时最多的顶层包:")
+    for package, ms in results[slowest]["top_packages"].items():
+        print(f"   {package:<28}{ms:>8.1f}ms")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"✅ 结果已写入 {args.json}")
+
+    if failed:
+        print("\n❌ 启动回归：导入时加载了重依赖或超过耗时上限")
+        sys.exit(1)
+    print("\n✅ 导入时未加载重依赖")
+
+
+if __name__ == "__main__":
+    main()
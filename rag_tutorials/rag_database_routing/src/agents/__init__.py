@@ -1,6 +1,31 @@
-"""Agent implementations."""
+"""Agent implementations.
 
-from .routing_agent import RoutingAgent
-from .qa_agent import QAAgent
+导出的名称在首次访问时才导入对应子模块。
+"""
 
-__all__ = ["RoutingAgent", "QAAgent"] 
\ No newline at end of file
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .routing_agent import RoutingAgent
+    from .qa_agent import QAAgent
+
+_EXPORTS = {
+    "RoutingAgent": ".routing_agent",
+    "QAAgent": ".qa_agent",
+}
+
+__all__ = ["RoutingAgent", "QAAgent"]
+
+
+def __getattr__(name: str):
+    """Import an exported name's submodule on first access."""
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
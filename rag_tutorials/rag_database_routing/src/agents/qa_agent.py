@@ -1,68 +1,203 @@
 """QA agent for answering questions based on retrieved documents."""
 
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 from langchain_core.documents import Document
-from langchain.chains.combine_documents import create_stuff_documents_chain
-from langchain.chains import create_retrieval_chain
+from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables import Runnable
 
 from ..models import get_chat_model
+from ..models.config import settings
 from ..prompts import get_qa_prompt
 from ..tools import WebSearchTool
 from ..tools.base_vector_store import BaseVectorStoreManager
+from ..tools.query_context import QueryContext
+from ..tools.sparse_index import reciprocal_rank_fusion
 from ..data import DatabaseType
 
 
 class QAAgent:
-    """Agent responsible for answering questions based on retrieved context."""
+    """Agent responsible for answering questions based on retrieved context.
+    
+    每个集合的问答链只构建一次并缓存；检索到的文档直接交给合并步骤，
+    每个问题只检索一次。路由阶段已搜到的结果（``routing_hits``）足够时
+    不再检索，不够时只补取缺少的部分。开启混合检索时，向量结果与
+    BM25关键词结果按倒数排名融合（RRF）。
+    """
+    
+    # 问答链LLM调用的标签，流式输出时据此区分答案token和其他LLM调用
+    ANSWER_TAG = "qa_answer"
     
     def __init__(self, vector_store_manager: BaseVectorStoreManager):
         """Initialize QA agent."""
+        self._qa_chains: Dict[DatabaseType, Runnable] = {}
         self.llm = get_chat_model()
         self.vector_store = vector_store_manager
         self.web_search_tool = WebSearchTool()
+        self.qa_prompt = get_qa_prompt()
+        self.top_k = settings.qa_top_k
+    
+    @property
+    def llm(self) -> BaseChatModel:
+        """Chat model used for answering."""
+        return self._llm
+    
+    @llm.setter
+    def llm(self, llm: BaseChatModel) -> None:
+        """Replace the chat model, dropping chains built with the previous one."""
+        self._llm = llm
+        self._qa_chains.clear()
+    
+    def _get_qa_chain(self, db_type: DatabaseType) -> Runnable:
+        """Get the cached QA chain of a collection, building it on first use."""
+        if db_type not in self._qa_chains:
+            # langchain.chains导入较慢，首次构建问答链时才加载
+            from langchain.chains.combine_documents import create_stuff_documents_chain
+            self._qa_chains[db_type] = create_stuff_documents_chain(self.llm, self.qa_prompt).with_config(
+                tags=[self.ANSWER_TAG]
+            )
+        return self._qa_chains[db_type]
     
     def answer_question(
         self, 
         question: str, 
-        db_type: Optional[DatabaseType] = None
+        db_type: Optional[DatabaseType] = None,
+        context: Optional[QueryContext] = None,
+        routing_hits: Optional[List[Tuple[Document, float]]] = None
     ) -> Tuple[str, List[Document]]:
         """Answer question using database or web search fallback."""
         
         if db_type:
-            return self._answer_from_database(question, db_type)
+            return self._answer_from_database(question, db_type, context, routing_hits)
         else:
             return self._answer_from_web_search(question)
     
+    async def aanswer_question(
+        self, 
+        question: str, 
+        db_type: Optional[DatabaseType] = None,
+        context: Optional[QueryContext] = None,
+        routing_hits: Optional[List[Tuple[Document, float]]] = None
+    ) -> Tuple[str, List[Document]]:
+        """Async version of ``answer_question``."""
+        if db_type:
+            return await self._aanswer_from_database(question, db_type, context, routing_hits)
+        else:
+            return await self._aanswer_from_web_search(question)
+    
     def _answer_from_database(
         self, 
         question: str, 
-        db_type: DatabaseType
+        db_type: DatabaseType,
+        context: Optional[QueryContext] = None,
+        routing_hits: Optional[List[Tuple[Document, float]]] = None
     ) -> Tuple[str, List[Document]]:
         """Answer question using specific database."""
         try:
-            # Get retriever for the specific database
-            retriever = self.vector_store.get_retriever(db_type, k=4)
-            
-            # Get relevant documents
-            relevant_docs = retriever.get_relevant_documents(question)
+            relevant_docs = self.retrieve_documents(question, db_type, context, routing_hits)
             
             if not relevant_docs:
                 return self._answer_from_web_search(question)
             
-            # Create QA chain
-            qa_prompt = get_qa_prompt()
-            combine_docs_chain = create_stuff_documents_chain(self.llm, qa_prompt)
-            retrieval_chain = create_retrieval_chain(retriever, combine_docs_chain)
-            
-            # Get answer
-            response = retrieval_chain.invoke({"input": question})
-            return response['answer'], relevant_docs
+            return self.generate_answer(question, db_type, relevant_docs), relevant_docs
             
         except Exception as e:
             error_msg = f"数据库查询出错: {str(e)}. 尝试网络搜索..."
             print(error_msg)
             return self._answer_from_web_search(question)
     
+    async def _aanswer_from_database(
+        self, 
+        question: str, 
+        db_type: DatabaseType,
+        context: Optional[QueryContext] = None,
+        routing_hits: Optional[List[Tuple[Document, float]]] = None
+    ) -> Tuple[str, List[Document]]:
+        """Async version of ``_answer_from_database``."""
+        try:
+            relevant_docs = await self.aretrieve_documents(question, db_type, context, routing_hits)
+            
+            if not relevant_docs:
+                return await self._aanswer_from_web_search(question)
+            
+            return await self.agenerate_answer(question, db_type, relevant_docs), relevant_docs
+            
+        except Exception as e:
+            print(f"数据库查询出错: {str(e)}. 尝试网络搜索...")
+            return await self._aanswer_from_web_search(question)
+    
+    def generate_answer(self, question: str, db_type: DatabaseType, documents: List[Document]) -> str:
+        """Generate an answer from already retrieved documents.
+        
+        在LangGraph中以``stream_mode="messages"``运行时，LLM的token会被逐个流式输出。
+        """
+        # 直接把已检索的文档交给合并步骤，不再经过检索链二次检索
+        return self._get_qa_chain(db_type).invoke({"input": question, "context": documents})
+    
+    async def agenerate_answer(self, question: str, db_type: DatabaseType, documents: List[Document]) -> str:
+        """Async version of ``generate_answer``."""
+        return await self._get_qa_chain(db_type).ainvoke({"input": question, "context": documents})
+    
+    def retrieve_documents(
+        self, 
+        question: str, 
+        db_type: DatabaseType,
+        context: Optional[QueryContext] = None,
+        routing_hits: Optional[List[Tuple[Document, float]]] = None
+    ) -> List[Document]:
+        """Retrieve documents for a question from a specific database."""
+        if context is None:
+            documents = self.vector_store.get_retriever(db_type, k=self.top_k).invoke(question)
+            return self._fuse_sparse(question, db_type, [(doc, 0.0) for doc in documents])
+        
+        hits = list(routing_hits or [])
+        # 路由搜索返回了结果但少于请求数量，说明集合中没有更多文档；
+        # 空结果可能是搜索超时或出错，仍然重新检索
+        exhausted = bool(hits) and len(hits) < context.routing_hits_k
+        if len(hits) < self.top_k and not exhausted:
+            # 复用请求上下文中已计算的问题向量，只补取缺少的结果
+            hits.extend(self.vector_store.similarity_search_by_vector_with_score(
+                db_type, context.embedding, k=self.top_k - len(hits), offset=len(hits)
+            ))
+        return self._fuse_sparse(question, db_type, hits)
+    
+    async def aretrieve_documents(
+        self, 
+        question: str, 
+        db_type: DatabaseType,
+        context: Optional[QueryContext] = None,
+        routing_hits: Optional[List[Tuple[Document, float]]] = None
+    ) -> List[Document]:
+        """Async version of ``retrieve_documents``."""
+        if context is None:
+            documents = await self.vector_store.get_retriever(db_type, k=self.top_k).ainvoke(question)
+            return self._fuse_sparse(question, db_type, [(doc, 0.0) for doc in documents])
+        
+        hits = list(routing_hits or [])
+        exhausted = bool(hits) and len(hits) < context.routing_hits_k
+        if len(hits) < self.top_k and not exhausted:
+            hits.extend(await self.vector_store.asimilarity_search_by_vector_with_score(
+                db_type, await context.aget_embedding(), k=self.top_k - len(hits), offset=len(hits)
+            ))
+        return self._fuse_sparse(question, db_type, hits)
+    
+    def _fuse_sparse(
+        self, 
+        question: str, 
+        db_type: DatabaseType, 
+        dense_hits: List[Tuple[Document, float]]
+    ) -> List[Document]:
+        """Fuse dense hits with BM25 hits (RRF) when hybrid search is enabled."""
+        if not settings.hybrid_search_enabled:
+            return [doc for doc, _ in dense_hits[:self.top_k]]
+        
+        try:
+            sparse_hits = self.vector_store.sparse_search(db_type, question, k=settings.hybrid_candidates)
+        except Exception as e:
+            print(f"⚠️ BM25检索失败，只使用向量结果: {e}")
+            sparse_hits = []
+        fused = reciprocal_rank_fusion([dense_hits, sparse_hits], k=settings.rrf_k)
+        return [doc for doc, _ in fused[:self.top_k]]
+    
     def _answer_from_web_search(self, question: str) -> Tuple[str, List[Document]]:
         """Answer question using web search."""
         try:
@@ -87,15 +222,35 @@ class QAAgent:
             except Exception as fallback_error:
                 return f"抱歉，由于技术问题无法回答您的问题。错误：{str(fallback_error)}", []
     
+    async def _aanswer_from_web_search(self, question: str) -> Tuple[str, List[Document]]:
+        """Async version of ``_answer_from_web_search``."""
+        try:
+            web_result = await self.web_search_tool._arun(question)
+            answer = f"由于数据库中没有找到相关文档，以下是网络搜索结果：\n\n{web_result}"
+            return answer, []
+            
+        except Exception as e:
+            try:
+                fallback_response = (await self.llm.ainvoke(
+                    f"请基于你的知识回答以下问题：{question}"
+                )).content
+                
+                answer = f"网络搜索不可用。基于一般知识的回答：\n\n{fallback_response}"
+                return answer, []
+                
+            except Exception as fallback_error:
+                return f"抱歉，由于技术问题无法回答您的问题。错误：{str(fallback_error)}", []
+    
     def get_detailed_answer(
         self, 
         question: str, 
         db_type: Optional[DatabaseType] = None,
-        include_sources: bool = True
+        include_sources: bool = True,
+        context: Optional[QueryContext] = None
     ) -> dict:
         """Get detailed answer with metadata and sources."""
         
-        answer, documents = self.answer_question(question, db_type)
+        answer, documents = self.answer_question(question, db_type, context)
         
         result = {
             "question": question,
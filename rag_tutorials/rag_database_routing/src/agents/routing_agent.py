@@ -1,6 +1,8 @@
 """Routing agent for determining which database to query."""
 
+import threading
 from typing import Optional, Dict, List, Tuple
+import numpy as np
 from langchain_core.documents import Document
 
 from ..models import get_chat_model
@@ -8,56 +10,219 @@ from ..models.config import settings
 from ..data import DatabaseType, COLLECTIONS
 from ..prompts import get_routing_prompt
 from ..tools.base_vector_store import BaseVectorStoreManager
+from ..tools.query_context import QueryContext
+from ..tools.routing_index import RoutingIndex
+from ..tools.routing_classifier import RoutingClassifier
 
 
 class RoutingAgent:
-    """Agent responsible for routing queries to appropriate databases."""
+    """Agent responsible for routing queries to appropriate databases.
     
-    def __init__(self, vector_store_manager: BaseVectorStoreManager):
+    提供``routing_index``且索引非空时，用内存中的集合原型向量打分，
+    不再搜索所有集合；否则回退到对每个集合做top-3搜索并取平均分。
+    
+    路由分三层：向量相似度 → 本地分类器（``routing_classifier``）→ LLM。
+    LLM的路由决策会作为训练样本反馈给分类器。
+    
+    ``a``前缀的方法是异步版本：embedding、Qdrant搜索和LLM调用都不阻塞事件循环。
+    """
+    
+    def __init__(
+        self, 
+        vector_store_manager: BaseVectorStoreManager, 
+        routing_index: Optional[RoutingIndex] = None,
+        routing_classifier: Optional[RoutingClassifier] = None
+    ):
         """Initialize routing agent."""
         self.llm = get_chat_model()
         self.vector_store = vector_store_manager
+        self.routing_index = routing_index
+        self.routing_classifier = routing_classifier
         self.confidence_threshold = settings.similarity_threshold
+        self.top_k = settings.routing_top_k
+        # 多取到问答所需的数量，问答阶段可以直接复用这些结果
+        self.search_k = max(settings.routing_top_k, settings.qa_top_k)
+        self.classifier_confidence = settings.routing_classifier_min_confidence
+        self._retraining = threading.Lock()
     
-    def route_query(self, question: str) -> Optional[DatabaseType]:
+    def route_query(self, question: str, context: Optional[QueryContext] = None) -> Optional[DatabaseType]:
         """Route query using hybrid approach: vector similarity + LLM fallback."""
+        context = context or QueryContext(question, self.vector_store.embeddings)
         
         # First try vector similarity routing
-        best_db_type = self._vector_similarity_routing(question)
+        best_db_type = self._vector_similarity_routing(self._database_scores(context))
         if best_db_type:
             return best_db_type
-            
-        # Fallback to LLM routing
-        return self._llm_routing(question)
+        
+        # Fallback to the local classifier, then LLM routing
+        best_db_type, _, _ = self._fallback_routing(question, context)
+        return best_db_type
     
-    def _vector_similarity_routing(self, question: str) -> Optional[DatabaseType]:
-        """Route based on vector similarity scores."""
+    async def aroute_query(self, question: str, context: Optional[QueryContext] = None) -> Optional[DatabaseType]:
+        """Async version of ``route_query``."""
+        context = context or QueryContext(question, self.vector_store.embeddings)
+        
+        best_db_type = self._vector_similarity_routing(await self._adatabase_scores(context))
+        if best_db_type:
+            return best_db_type
+        
+        best_db_type, _, _ = await self._afallback_routing(question, context)
+        return best_db_type
+    
+    def _uses_routing_index(self) -> bool:
+        """Whether routing scores come from the in-memory routing index."""
+        return self.routing_index is not None and self.routing_index.is_ready()
+    
+    def _database_scores(self, context: QueryContext) -> Dict[DatabaseType, float]:
+        """Score every database for the query."""
+        if self._uses_routing_index():
+            try:
+                return self.routing_index.score(context.embedding)
+            except Exception as e:
+                print(f"路由索引错误: {e}")
+                return {}
+        return self._average_scores(self._search_all_databases(context))
+    
+    async def _adatabase_scores(self, context: QueryContext) -> Dict[DatabaseType, float]:
+        """Async version of ``_database_scores``."""
+        if self._uses_routing_index():
+            try:
+                # 先异步计算问题向量，之后的同步访问直接使用缓存
+                await context.aget_embedding()
+            except Exception as e:
+                print(f"路由索引错误: {e}")
+                return {}
+            return self._database_scores(context)
+        return self._average_scores(await self._asearch_all_databases(context))
+    
+    def _search_all_databases(self, context: QueryContext) -> Dict[DatabaseType, List[Tuple[Document, float]]]:
+        """Search all databases with the shared query embedding, recording the hits on the context."""
         try:
-            all_results = self.vector_store.search_all_databases(question, k=3)
-            
-            best_score = -1
-            best_db_type = None
-            
-            for db_type, results in all_results.items():
-                if results:
-                    # Calculate average similarity score
-                    avg_score = sum(score for _, score in results) / len(results)
-                    
-                    if avg_score > best_score:
-                        best_score = avg_score
-                        best_db_type = db_type
-            
-            # Check confidence threshold
-            if best_score >= self.confidence_threshold and best_db_type:
-                print(f"向量相似性路由: {best_db_type} (置信度: {best_score:.3f})")
-                return best_db_type
-                
-            print(f"置信度低于阈值 ({self.confidence_threshold})，转向LLM路由")
-            return None
-            
+            all_results = self.vector_store.search_all_databases_by_vector(context.embedding, k=self.search_k)
         except Exception as e:
             print(f"向量路由错误: {e}")
-            return None
+            return {}
+        context.record_routing_hits(all_results, self.search_k)
+        return all_results
+    
+    async def _asearch_all_databases(self, context: QueryContext) -> Dict[DatabaseType, List[Tuple[Document, float]]]:
+        """Async version of ``_search_all_databases``."""
+        try:
+            all_results = await self.vector_store.asearch_all_databases_by_vector(
+                await context.aget_embedding(), k=self.search_k
+            )
+        except Exception as e:
+            print(f"向量路由错误: {e}")
+            return {}
+        context.record_routing_hits(all_results, self.search_k)
+        return all_results
+    
+    def _average_scores(self, all_results: Dict[DatabaseType, List[Tuple[Document, float]]]) -> Dict[DatabaseType, float]:
+        """Calculate average similarity score of the top hits per database."""
+        return {
+            db_type: sum(score for _, score in results[:self.top_k]) / len(results[:self.top_k])
+            for db_type, results in all_results.items()
+            if results
+        }
+    
+    def _vector_similarity_routing(self, scores: Dict[DatabaseType, float]) -> Optional[DatabaseType]:
+        """Route based on vector similarity scores."""
+        best_score = -1
+        best_db_type = None
+        
+        for db_type, avg_score in scores.items():
+            if avg_score > best_score:
+                best_score = avg_score
+                best_db_type = db_type
+        
+        # Check confidence threshold
+        if best_score >= self.confidence_threshold and best_db_type:
+            print(f"向量相似性路由: {best_db_type} (置信度: {best_score:.3f})")
+            return best_db_type
+            
+        print(f"置信度低于阈值 ({self.confidence_threshold})，转向分类器/LLM路由")
+        return None
+    
+    def _fallback_routing(
+        self, 
+        question: str, 
+        context: QueryContext
+    ) -> Tuple[Optional[DatabaseType], str, Optional[float]]:
+        """Route with the local classifier, falling back to the LLM when it is unsure.
+        
+        返回 (数据库, 路由方法, 分类器置信度)。
+        """
+        db_type, confidence = self._classifier_routing(context)
+        if db_type:
+            return db_type, "classifier", confidence
+        
+        db_type = self._llm_routing(question)
+        if db_type:
+            self._record_decision(context, db_type)
+            return db_type, "llm_fallback", confidence
+        return None, "web_search_fallback", confidence
+    
+    async def _afallback_routing(
+        self, 
+        question: str, 
+        context: QueryContext
+    ) -> Tuple[Optional[DatabaseType], str, Optional[float]]:
+        """Async version of ``_fallback_routing``."""
+        db_type, confidence = None, None
+        if self.routing_classifier is not None and self.routing_classifier.is_trained():
+            try:
+                await context.aget_embedding()
+                db_type, confidence = self._classifier_routing(context)
+            except Exception as e:
+                print(f"分类器路由错误: {e}")
+        if db_type:
+            return db_type, "classifier", confidence
+        
+        db_type = await self._allm_routing(question)
+        if db_type:
+            self._record_decision(context, db_type)
+            return db_type, "llm_fallback", confidence
+        return None, "web_search_fallback", confidence
+    
+    def _classifier_routing(self, context: QueryContext) -> Tuple[Optional[DatabaseType], Optional[float]]:
+        """Route with the local classifier."""
+        if self.routing_classifier is None or not self.routing_classifier.is_trained():
+            return None, None
+        try:
+            db_type, confidence = self.routing_classifier.predict(context.embedding)
+        except Exception as e:
+            print(f"分类器路由错误: {e}")
+            return None, None
+        
+        if db_type and confidence >= self.classifier_confidence:
+            print(f"分类器路由: {db_type} (置信度: {confidence:.3f})")
+            return db_type, confidence
+        print(f"分类器置信度低于阈值 ({self.classifier_confidence})，转向LLM路由")
+        return None, confidence
+    
+    def _record_decision(self, context: QueryContext, db_type: DatabaseType) -> None:
+        """Feed an LLM routing decision back to the classifier, retraining in the background."""
+        if self.routing_classifier is None:
+            return
+        try:
+            self.routing_classifier.add_examples(db_type, [context.embedding])
+        except Exception as e:
+            print(f"记录路由决策失败: {e}")
+            return
+        
+        if self.routing_classifier.pending_examples >= settings.routing_classifier_retrain_every:
+            if self._retraining.acquire(blocking=False):
+                threading.Thread(target=self._retrain_classifier, daemon=True).start()
+    
+    def _retrain_classifier(self) -> None:
+        """Retrain and persist the classifier."""
+        try:
+            if self.routing_classifier.train():
+                self.routing_classifier.save()
+        except Exception as e:
+            print(f"⚠️ 分类器训练失败: {e}")
+        finally:
+            self._retraining.release()
     
     def _llm_routing(self, question: str) -> Optional[DatabaseType]:
         """Route using LLM analysis."""
@@ -66,27 +231,41 @@ class RoutingAgent:
             formatted_prompt = prompt.format(question=question)
             
             response = self.llm.invoke(formatted_prompt)
+            return self._parse_llm_route(response)
             
-            # Extract and clean the response
-            content = response.content if isinstance(response.content, str) else str(response.content)
-            db_type = (content
-                      .strip()
-                      .lower()
-                      .translate(str.maketrans('', '', '`\'"')))
-            
-            if db_type in COLLECTIONS:
-                print(f"LLM路由决策: {db_type}")
-                return db_type
-                
-            print("LLM路由未找到合适的数据库")
+        except Exception as e:
+            print(f"LLM路由错误: {e}")
             return None
-            
+    
+    async def _allm_routing(self, question: str) -> Optional[DatabaseType]:
+        """Async version of ``_llm_routing``."""
+        try:
+            formatted_prompt = get_routing_prompt().format(question=question)
+            return self._parse_llm_route(await self.llm.ainvoke(formatted_prompt))
         except Exception as e:
             print(f"LLM路由错误: {e}")
             return None
     
-    def get_routing_info(self, question: str) -> Dict:
-        """Get detailed routing information for debugging."""
+    @staticmethod
+    def _parse_llm_route(response) -> Optional[DatabaseType]:
+        """Extract the database type from an LLM routing response."""
+        # Extract and clean the response
+        content = response.content if isinstance(response.content, str) else str(response.content)
+        db_type = (content
+                  .strip()
+                  .lower()
+                  .translate(str.maketrans('', '', '`\'"')))
+        
+        if db_type in COLLECTIONS:
+            print(f"LLM路由决策: {db_type}")
+            return db_type
+            
+        print("LLM路由未找到合适的数据库")
+        return None
+    
+    def get_routing_info(self, question: str, context: Optional[QueryContext] = None) -> Dict:
+        """Get detailed routing information, including the routing decision."""
+        context = context or QueryContext(question, self.vector_store.embeddings)
         info = {
             "question": question,
             "vector_scores": {},
@@ -95,27 +274,90 @@ class RoutingAgent:
         }
         
         try:
-            # Get vector similarity scores for all databases
-            all_results = self.vector_store.search_all_databases(question, k=3)
-            
-            for db_type, results in all_results.items():
-                if results:
-                    avg_score = sum(score for _, score in results) / len(results)
-                    info["vector_scores"][db_type] = avg_score
+            # Get vector similarity scores for all databases (shared embedding)
+            info["vector_scores"] = self._database_scores(context)
             
             # Determine routing
-            chosen_db = self.route_query(question)
+            chosen_db = self._vector_similarity_routing(info["vector_scores"])
+            if chosen_db:
+                info["routing_method"] = "routing_index" if self._uses_routing_index() else "vector_similarity"
+            else:
+                chosen_db, info["routing_method"], confidence = self._fallback_routing(question, context)
+                if confidence is not None:
+                    info["classifier_confidence"] = confidence
+            
             info["chosen_database"] = chosen_db
+                
+        except Exception as e:
+            info["error"] = str(e)
+        
+        info["embedding_calls"] = context.embedding_calls
+        return info
+    
+    def get_routing_info_batch(self, contexts: List[QueryContext]) -> List[Dict]:
+        """Vector-route many questions at once.
+        
+        所有问题的集合得分组成一个矩阵，一次argmax完成路由；置信度不足的问题
+        ``chosen_database``和``routing_method``为None，需要调用``_fallback_routing``。
+        """
+        if not contexts:
+            return []
+        embeddings = [context.embedding for context in contexts]
+        
+        if self._uses_routing_index():
+            all_scores = self.routing_index.score_batch(embeddings)
+            method = "routing_index"
+        else:
+            all_results = self.vector_store.search_all_databases_by_vectors(embeddings, k=self.search_k)
+            for context, results in zip(contexts, all_results):
+                context.record_routing_hits(results, self.search_k)
+            all_scores = [self._average_scores(results) for results in all_results]
+            method = "vector_similarity"
+        
+        db_types = list(COLLECTIONS)
+        matrix = np.array(
+            [[scores.get(db_type, -1.0) for db_type in db_types] for scores in all_scores], 
+            dtype=np.float32
+        )
+        best = matrix.argmax(axis=1)
+        confident = matrix[np.arange(len(contexts)), best] >= self.confidence_threshold
+        
+        return [
+            {
+                "question": context.question,
+                "vector_scores": scores,
+                "chosen_database": db_types[best[i]] if confident[i] else None,
+                "routing_method": method if confident[i] else None,
+                "embedding_calls": context.embedding_calls
+            }
+            for i, (context, scores) in enumerate(zip(contexts, all_scores))
+        ]
+    
+    async def aget_routing_info(self, question: str, context: Optional[QueryContext] = None) -> Dict:
+        """Async version of ``get_routing_info``."""
+        context = context or QueryContext(question, self.vector_store.embeddings)
+        info = {
+            "question": question,
+            "vector_scores": {},
+            "chosen_database": None,
+            "routing_method": None
+        }
+        
+        try:
+            info["vector_scores"] = await self._adatabase_scores(context)
             
-            # Determine method used
-            if chosen_db and info["vector_scores"].get(chosen_db, 0) >= self.confidence_threshold:
-                info["routing_method"] = "vector_similarity"
-            elif chosen_db:
-                info["routing_method"] = "llm_fallback"
+            chosen_db = self._vector_similarity_routing(info["vector_scores"])
+            if chosen_db:
+                info["routing_method"] = "routing_index" if self._uses_routing_index() else "vector_similarity"
             else:
-                info["routing_method"] = "web_search_fallback"
+                chosen_db, info["routing_method"], confidence = await self._afallback_routing(question, context)
+                if confidence is not None:
+                    info["classifier_confidence"] = confidence
+            
+            info["chosen_database"] = chosen_db
                 
         except Exception as e:
             info["error"] = str(e)
-            
-        return info 
\ No newline at end of file
+        
+        info["embedding_calls"] = context.embedding_calls
+        return info
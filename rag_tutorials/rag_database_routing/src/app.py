@@ -9,9 +9,26 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.workflow import RAGWorkflow
+from src.models import get_chat_model, get_embedding_model
+from src.models.config import Settings, reload_settings
 from src.data import COLLECTIONS, DatabaseType
 
 
+@st.cache_resource(max_entries=1, show_spinner="🔄 正在初始化系统...")
+def get_workflow(config_fingerprint: str) -> RAGWorkflow:
+    """Get the workflow shared by all sessions and reruns of this process.
+    
+    ``config_fingerprint``只作为缓存键：由每次重新运行时新读取的.env和集合配置计算，
+    配置变化时重新加载全局设置并重建工作流（旧实例被淘汰），
+    否则Qdrant连接、集合检查和智能体只在进程内创建一次。初始化失败不会被缓存，下次重试。
+    """
+    if reload_settings():
+        # 模型实例按旧配置缓存
+        get_chat_model.cache_clear()
+        get_embedding_model.cache_clear()
+    return RAGWorkflow()
+
+
 class StreamlitApp:
     """Main Streamlit application class."""
     
@@ -48,9 +65,7 @@ class StreamlitApp:
             return
             
         try:
-            with st.spinner("🔄 正在初始化系统..."):
-                self.workflow = RAGWorkflow()
-            st.success("✅ 系统初始化成功！")
+            self.workflow = get_workflow(RAGWorkflow.config_fingerprint(Settings()))
             
         except Exception as e:
             st.error(f"❌ 系统初始化失败: {str(e)}")
@@ -109,23 +124,45 @@ class StreamlitApp:
     
     def _process_uploaded_files(self, db_type: DatabaseType, uploaded_files):
         """Process and add uploaded files to database."""
-        with st.spinner(f"🔄 正在处理 {len(uploaded_files)} 个文件..."):
-            result = self.workflow.add_documents(db_type, uploaded_files)
+        progress_bar = st.progress(0.0, text=f"🔄 正在处理 {len(uploaded_files)} 个文件...")
+        
+        def on_progress(progress: Dict[str, Any]):
+            fraction = progress["files_parsed"] / max(progress["total_files"], 1)
+            progress_bar.progress(
+                min(fraction, 1.0),
+                text=(
+                    f"🔄 已解析 {progress['files_parsed']}/{progress['total_files']} 个文件，"
+                    f"已写入 {progress['chunks_upserted']} 个文档块"
+                )
+            )
+        
+        result = self.workflow.add_documents(db_type, uploaded_files, progress_callback=on_progress)
+        progress_bar.empty()
         
         if result["success"]:
             st.success(f"✅ {result['message']}")
+            if result.get("chunks_failed"):
+                st.warning(f"⚠️ {result['chunks_failed']} 个文档块向量化失败，未写入；重新上传该文件即可重试")
             
             # Show processing details
             with st.expander("📊 处理详情"):
-                col1, col2 = st.columns(2)
+                col1, col2, col3 = st.columns(3)
                 with col1:
                     st.metric("处理的文件数", len(result["processed_files"]))
                 with col2:
                     st.metric("生成的文档块数", result["num_chunks"])
+                with col3:
+                    st.metric("节省的Embedding次数", result.get("embeddings_saved", 0))
                 
                 st.write("**处理的文件:**")
                 for filename in result["processed_files"]:
                     st.write(f"- {filename}")
+                
+                stage_stats = result.get("stage_stats")
+                if stage_stats:
+                    st.write(f"**各阶段吞吐量** (总耗时 {result['elapsed_seconds']}s):")
+                    for stage, stats in stage_stats.items():
+                        st.write(f"- {stage}: {stats['items']} 项，{stats['items_per_second']} 项/秒")
         else:
             st.error(f"❌ 处理失败: {result['error']}")
     
@@ -147,26 +184,49 @@ class StreamlitApp:
             show_sources = st.checkbox("显示文档来源", value=True)
         
         if question:
-            with st.spinner("🔍 正在搜索答案..."):
-                result = self.workflow.process_question(question)
-            
-            self._display_query_result(result, show_routing_info, show_sources)
+            self._stream_query_result(question, show_routing_info, show_sources)
+    
+    def _stream_query_result(self, question: str, show_routing_info: bool, show_sources: bool):
+        """Stream the answer as it is generated, then show routing info and sources."""
+        status = st.empty()
+        status.info("🔍 正在路由问题...")
+        st.subheader("💡 答案")
+        result: Dict[str, Any] = {}
+        
+        def answer_tokens():
+            for event in self.workflow.stream_question(question):
+                if event["type"] == "routing":
+                    status.info(f"🧭 已路由到: {event['routed_database'] or '网络搜索'}，正在检索文档...")
+                elif event["type"] == "documents":
+                    status.info(f"📚 找到 {len(event['documents'])} 个相关文档，正在生成答案...")
+                elif event["type"] == "token":
+                    yield event["content"]
+                elif event["type"] == "done":
+                    result.update(event["result"])
+        
+        st.write_stream(answer_tokens())
+        status.empty()
+        
+        if result:
+            self._display_query_result(result, show_routing_info, show_sources, show_answer=False)
     
     def _display_query_result(
         self, 
         result: Dict[str, Any], 
         show_routing_info: bool, 
-        show_sources: bool
+        show_sources: bool,
+        show_answer: bool = True
     ):
-        """Display query result."""
+        """Display query result (``show_answer=False`` when the answer was already streamed)."""
         
         # Main answer
-        st.subheader("💡 答案")
-        if result["success"]:
-            st.write(result["answer"])
-        else:
+        if show_answer:
+            st.subheader("💡 答案")
+        if not result["success"]:
             st.error(f"❌ 查询失败: {result['error']}")
             return
+        if show_answer:
+            st.write(result["answer"])
         
         # Routing information
         if show_routing_info:
@@ -1,5 +1,5 @@
 """Data processing and loading logic."""
 
-from .collection_config import CollectionConfig, COLLECTIONS, DatabaseType
+from .collection_config import CollectionConfig, COLLECTIONS, DatabaseType, QuantizationType
 
-__all__ = ["CollectionConfig", "COLLECTIONS", "DatabaseType"] 
\ No newline at end of file
+__all__ = ["CollectionConfig", "COLLECTIONS", "DatabaseType", "QuantizationType"] 
\ No newline at end of file
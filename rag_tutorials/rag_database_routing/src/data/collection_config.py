@@ -1,17 +1,39 @@
 """Database collection configurations."""
 
-from typing import Dict, Literal
+from typing import Dict, Literal, Optional
 from dataclasses import dataclass
 
 DatabaseType = Literal["products", "support", "finance"]
+QuantizationType = Literal["int8", "pq"]
 
 
 @dataclass
 class CollectionConfig:
-    """Configuration for a Qdrant collection."""
+    """Configuration for a Qdrant collection.
+    
+    ``quantization``开启后向量压缩存储（``int8``标量量化或``pq``乘积量化），
+    搜索先在压缩向量上取``k * rescore_oversampling``个候选，再用原始向量重新打分；
+    Qdrant中原始向量存放在磁盘上（``on_disk``）。
+    
+    其余字段对应Qdrant集合参数，``None``表示使用Qdrant默认值；创建集合时使用，
+    已有集合启动时更新为一致（分片数只能在创建时设置）。
+    """
     name: str
     description: str
     collection_name: str
+    quantization: Optional[QuantizationType] = None
+    rescore_oversampling: float = 3.0
+    # HNSW索引：每个节点的边数、构建时的候选数、搜索时的候选数（越大越准越慢）
+    hnsw_m: Optional[int] = None
+    hnsw_ef_construct: Optional[int] = None
+    search_ef: Optional[int] = None
+    # 向量/负载存放在磁盘上（内存映射）；向量的None表示量化时放磁盘，否则放内存
+    on_disk_vectors: Optional[bool] = None
+    on_disk_payload: Optional[bool] = None
+    shard_number: Optional[int] = None
+    replication_factor: Optional[int] = None
+    # 段内向量数超过该值才建立HNSW索引（批量导入时可调大，导入后再调小）
+    indexing_threshold: Optional[int] = None
 
 
 # Collection configurations mapping
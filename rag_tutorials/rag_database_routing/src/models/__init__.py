@@ -1,17 +1,50 @@
-"""Model configurations and wrappers."""
+"""Model configurations and wrappers.
 
-# 专用模块导入
-from .chat_model import get_chat_model
-from .embedding_model import get_embedding_model
-# 配置和其他组件
-from .config import Settings
-from .doubao_embeddings import DoubaoEmbeddings
+导出的名称在首次访问时才导入对应子模块，``langchain_openai``等只在创建模型时加载。
+"""
+
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    # 专用模块导入
+    from .chat_model import get_chat_model
+    from .embedding_model import get_embedding_model
+    from .query_embeddings import embed_queries
+    # 配置和其他组件
+    from .config import Settings
+    from .doubao_embeddings import DoubaoEmbeddings
+    from .cached_embeddings import CachedEmbeddings
+
+_EXPORTS = {
+    "get_chat_model": ".chat_model",
+    "get_embedding_model": ".embedding_model",
+    "embed_queries": ".query_embeddings",
+    "Settings": ".config",
+    "DoubaoEmbeddings": ".doubao_embeddings",
+    "CachedEmbeddings": ".cached_embeddings",
+}
 
 __all__ = [
     # 模型接口
     "get_chat_model",
     "get_embedding_model", 
+    "embed_queries",
     # 其他组件
     "Settings", 
-    "DoubaoEmbeddings"
-] 
\ No newline at end of file
+    "DoubaoEmbeddings",
+    "CachedEmbeddings"
+]
+
+
+def __getattr__(name: str):
+    """Import an exported name's submodule on first access."""
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
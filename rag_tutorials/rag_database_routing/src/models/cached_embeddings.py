@@ -0,0 +1,196 @@
+"""带LRU内存缓存和SQLite持久化的Embedding包装器."""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+from langchain_core.embeddings import Embeddings
+
+from .query_embeddings import embed_queries
+
+
+class CachedEmbeddings(Embeddings):
+    """Embedding cache keyed by model name, embedding kind and text hash.
+
+    查找顺序：内存LRU → SQLite磁盘缓存 → 底层embedding模型。
+    查询向量和文档向量分开缓存：有些模型对同一文本的查询向量与文档向量不同。
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model_name: str,
+        cache_path: str,
+        max_entries: int = 10000
+    ):
+        """Initialize cached embeddings."""
+        self.underlying = embeddings
+        self.model_name = model_name
+        self.max_entries = max_entries
+
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        cache_dir = os.path.dirname(cache_path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _key(self, text: str, kind: str) -> str:
+        """Build the cache key for a text embedded as ``kind`` (``"query"`` or ``"doc"``)."""
+        return hashlib.sha256(f"{self.model_name}\0{kind}\0{text}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vector: List[float]) -> None:
+        """Put a vector into the in-memory LRU, evicting the oldest entry if needed."""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Look up keys in memory first, then on disk."""
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            disk_keys = []
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+                    self.memory_hits += 1
+                else:
+                    disk_keys.append(key)
+
+            # SQLite单条语句的参数数量有限，分批查询
+            for start in range(0, len(disk_keys), 500):
+                batch = disk_keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array("f", blob).tolist()
+                    found[key] = vector
+                    self._remember(key, vector)
+                    self.disk_hits += 1
+        return found
+
+    def _store(self, items: Dict[str, List[float]]) -> None:
+        """Store newly computed vectors in memory and on disk."""
+        # 不缓存零向量（底层模型调用失败时的回退值）
+        items = {key: vector for key, vector in items.items() if any(vector)}
+        if not items:
+            return
+        with self._lock:
+            for key, vector in items.items():
+                self._remember(key, vector)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, array("f", vector).tobytes()) for key, vector in items.items()]
+            )
+            self._conn.commit()
+
+    def _partition(self, texts: List[str], kind: str) -> Tuple[List[str], Dict[str, List[float]], Dict[str, str]]:
+        """Split texts into cached vectors and texts that still need embedding."""
+        keys = [self._key(text, kind) for text in texts]
+        found = self._lookup(list(dict.fromkeys(keys)))
+
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+
+        if missing:
+            with self._lock:
+                self.misses += len(missing)
+        return keys, found, missing
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """嵌入多个文档，只对未缓存的文本调用底层模型."""
+        keys, found, missing = self._partition(texts, "doc")
+
+        if missing:
+            vectors = self.underlying.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            self._store(computed)
+            found.update(computed)
+
+        return [found[key] for key in keys]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """批量嵌入查询（与逐个调用``embed_query``相同），只对未缓存的文本调用底层模型."""
+        keys, found, missing = self._partition(texts, "query")
+
+        if missing:
+            vectors = embed_queries(self.underlying, list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            self._store(computed)
+            found.update(computed)
+
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """嵌入单个查询，命中缓存时不调用底层模型."""
+        key = self._key(text, "query")
+        found = self._lookup([key])
+        if key in found:
+            return found[key]
+
+        with self._lock:
+            self.misses += 1
+        vector = self.underlying.embed_query(text)
+        self._store({key: vector})
+        return vector
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """异步嵌入多个文档，只对未缓存的文本调用底层模型."""
+        keys, found, missing = self._partition(texts, "doc")
+
+        if missing:
+            vectors = await self.underlying.aembed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            self._store(computed)
+            found.update(computed)
+
+        return [found[key] for key in keys]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """异步嵌入单个查询，命中缓存时不调用底层模型."""
+        key = self._key(text, "query")
+        found = self._lookup([key])
+        if key in found:
+            return found[key]
+
+        with self._lock:
+            self.misses += 1
+        vector = await self.underlying.aembed_query(text)
+        self._store({key: vector})
+        return vector
+
+    def stats(self) -> Dict[str, float]:
+        """Get cache hit-rate statistics."""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            total = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / total if total else 0.0,
+                "memory_entries": len(self._memory)
+            }
+
+    def close(self) -> None:
+        """Close the on-disk store."""
+        with self._lock:
+            self._conn.close()
@@ -2,12 +2,15 @@
 
 import os
 from functools import lru_cache
-from langchain_openai import ChatOpenAI
+from typing import TYPE_CHECKING
 from .config import settings
 
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+
 
 @lru_cache(maxsize=1)
-def get_chat_model() -> ChatOpenAI:
+def get_chat_model() -> "ChatOpenAI":
     """获取缓存的聊天模型实例."""
     
     if not settings.openai_api_key:
@@ -22,6 +25,8 @@ def get_chat_model() -> ChatOpenAI:
     if settings.openai_base_url:
         print(f"🔗 API端点: {settings.openai_base_url}")
     
+    from langchain_openai import ChatOpenAI
+    
     return ChatOpenAI(
         model=settings.openai_model,
         temperature=0
@@ -18,21 +18,79 @@ class Settings(BaseSettings):
     ark_api_key: Optional[str] = Field(default=None, description="ARK API key for 豆包")
     ark_base_url: Optional[str] = Field(default=None, description="ARK base URL for 豆包")
     doubao_embedding_model: Optional[str] = Field(default=None, description="豆包 embedding model")
+    doubao_max_workers: int = Field(default=8, description="豆包 embedding concurrent requests")
+    doubao_max_retries: int = Field(default=3, description="豆包 embedding retries on 429/5xx")
+    doubao_requests_per_second: float = Field(default=0, description="豆包 embedding rate limit (0 = unlimited)")
+    doubao_async_max_concurrency: int = Field(default=64, description="豆包 async embedding requests in flight")
     
     # Qdrant Configuration  
     qdrant_url: Optional[str] = Field(default=None, description="Qdrant cluster URL")
     qdrant_api_key: Optional[str] = Field(default=None, description="Qdrant API key")
+    qdrant_prefer_grpc: bool = Field(default=False, description="Use the gRPC transport instead of HTTP")
+    qdrant_grpc_port: int = Field(default=6334, description="Qdrant gRPC port")
+    qdrant_timeout: int = Field(default=30, description="Qdrant request timeout in seconds")
     
     # Application Settings
     debug: bool = Field(default=False, description="Debug mode")
     log_level: str = Field(default="INFO", description="Logging level")
     
     # Vector Store Settings
+    vector_store_backend: str = Field(default="qdrant", description="Vector store backend: qdrant or local (memory-mapped files)")
+    local_vector_store_path: str = Field(default=".cache/vector_store", description="Directory of the local vector store backend")
     vector_size: int = Field(default=1536, description="Vector dimension size")
+    matryoshka_dimension: int = Field(
+        default=0, 
+        description="Leading embedding components (renormalized) used for routing and first-pass search; full vectors only rescore (0 = full dimension)"
+    )
     similarity_threshold: float = Field(default=0.5, description="Similarity threshold for routing")
+    routing_top_k: int = Field(default=3, description="Hits per collection averaged for routing scores")
+    qa_top_k: int = Field(default=4, description="Documents passed to the QA chain")
     chunk_size: int = Field(default=1000, description="Text chunk size")
     chunk_overlap: int = Field(default=200, description="Text chunk overlap")
     
+    # PDF Parsing Settings
+    pdf_parallel_min_pages: int = Field(default=64, description="Parse PDFs with at least this many pages in a process pool")
+    pdf_pages_per_task: int = Field(default=64, description="Minimum pages per process-pool task")
+    pdf_max_workers: int = Field(default=0, description="PDF parsing processes (0 = CPU count)")
+    
+    # Ingestion Settings
+    ingest_queue_size: int = Field(default=8, description="Bounded queue size between ingestion stages")
+    ingest_batch_size: int = Field(default=64, description="Chunks per embedding/upsert batch")
+    
+    # Embedding Cache Settings
+    embedding_cache_enabled: bool = Field(default=False, description="Cache embeddings in memory and on disk")
+    embedding_cache_path: str = Field(default=".cache/embeddings.sqlite3", description="SQLite file for the embedding cache")
+    embedding_cache_max_entries: int = Field(default=10000, description="Max vectors kept in the in-memory LRU")
+    
+    # Search Settings
+    search_max_workers: int = Field(default=0, description="Worker threads for multi-collection search (0 = one per collection)")
+    search_timeout: float = Field(default=10.0, description="Per-collection search timeout in seconds")
+    hybrid_search_enabled: bool = Field(default=False, description="Fuse dense results with a local BM25 index (reciprocal rank fusion)")
+    hybrid_candidates: int = Field(default=20, description="BM25 candidates per query fused with dense results")
+    rrf_k: int = Field(default=60, description="Reciprocal rank fusion constant")
+    batch_search_size: int = Field(default=64, description="Query vectors per batched Qdrant search request")
+    unified_collection_name: Optional[str] = Field(
+        default=None,
+        description="Store all database types in one Qdrant collection (filtered by db_type) so routing search is a single batched request"
+    )
+    
+    # Batch Question Settings
+    batch_embed_size: int = Field(default=64, description="Questions embedded per request in process_questions")
+    batch_max_concurrency: int = Field(default=8, description="Concurrent answer generations in process_questions")
+    
+    # Routing Index Settings
+    routing_index_enabled: bool = Field(default=False, description="Route with in-memory collection prototypes instead of searching every collection")
+    routing_index_path: str = Field(default=".cache/routing_index.npz", description="File the routing index prototypes are saved to")
+    routing_index_prototypes: int = Field(default=8, description="Max prototype vectors (k-means centroids) per collection")
+    routing_index_sample_size: int = Field(default=2000, description="Vectors sampled per collection to bootstrap an empty routing index")
+    
+    # Routing Classifier Settings
+    routing_classifier_enabled: bool = Field(default=False, description="Try a local embedding classifier before the LLM routing fallback")
+    routing_classifier_path: str = Field(default=".cache/routing_classifier.npz", description="File the classifier examples and weights are saved to")
+    routing_classifier_min_confidence: float = Field(default=0.7, description="Min classifier probability to accept its routing decision")
+    routing_classifier_max_examples: int = Field(default=2000, description="Training examples kept per collection")
+    routing_classifier_retrain_every: int = Field(default=20, description="Retrain after this many new LLM routing decisions")
+    
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -40,4 +98,18 @@ class Settings(BaseSettings):
 
 
 # Global settings instance
-settings = Settings() 
\ No newline at end of file
+settings = Settings() 
+
+
+def reload_settings() -> bool:
+    """Re-read the environment and ``.env`` into the global ``settings``; returns whether anything changed.
+    
+    Streamlit重新运行脚本时不会重新导入模块，全局``settings``因此不会自动更新；
+    这里创建新的``Settings()``读取当前配置，并原地更新全局实例（其他模块持有的是同一个对象）。
+    """
+    fresh = Settings()
+    changed = fresh.model_dump() != settings.model_dump()
+    if changed:
+        for name in Settings.model_fields:
+            setattr(settings, name, getattr(fresh, name))
+    return changed
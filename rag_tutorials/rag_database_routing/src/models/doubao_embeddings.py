@@ -1,25 +1,75 @@
 """豆包多模态Embedding实现."""
 
+import asyncio
 import os
+import random
+import threading
+import time
+import httpx
 import requests
-from typing import List, Dict, Any, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Union
+from requests.adapters import HTTPAdapter
 from langchain_core.embeddings import Embeddings
 
+from .loop_clients import LoopLocalClients
+
+
+# 可重试的HTTP状态码：限流和服务端错误
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class _RateLimiter:
+    """简单的请求速率限制器（按固定间隔发放请求许可）."""
+    
+    def __init__(self, requests_per_second: float = 0):
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._next_time = 0.0
+        self._lock = threading.Lock()
+    
+    def reserve(self) -> float:
+        """预留一个请求许可，返回需要等待的秒数."""
+        if not self.interval:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self._next_time - now)
+            self._next_time = max(now, self._next_time) + self.interval
+            return wait
+
 
 class DoubaoEmbeddings(Embeddings):
-    """豆包多模态Embedding类."""
+    """豆包多模态Embedding类.
+    
+    豆包多模态接口会把一次请求中的多个输入融合为一个向量，无法真正批量；
+    ``embed_documents``因此使用有界线程池并发请求，共享保持连接的``requests.Session``，
+    并对429/5xx按指数退避重试，可通过``requests_per_second``限制请求速率。
+    异步接口``aembed_documents``/``aembed_query``在每个事件循环中共享一个``httpx.AsyncClient``
+    （循环结束时关闭），单个循环中最多保持``max_concurrency``个请求同时进行。
+    """
     
     def __init__(
         self, 
         model: str = "doubao-embedding-vision-250615",
         api_key: str = None,
         base_url: str = None,
+        max_workers: int = 8,
+        max_retries: int = 3,
+        requests_per_second: float = 0,
+        backoff_base: float = 0.5,
+        max_backoff: float = 30.0,
+        max_concurrency: int = 64,
         **kwargs
     ):
         """初始化豆包Embedding."""
         self.model = model
         self.api_key = api_key or os.getenv("ARK_API_KEY")
         self.base_url = base_url or os.getenv("ARK_BASE_URL", "ark.cn-beijing.volces.com/api/v3")
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self.max_concurrency = max(1, max_concurrency)
         
         if not self.api_key:
             raise ValueError("ARK_API_KEY is required for DoubaoEmbeddings")
@@ -34,6 +84,22 @@ class DoubaoEmbeddings(Embeddings):
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.api_key}"
         }
+        
+        # 连接池大小与并发数一致，保持长连接
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        
+        self._rate_limiter = _RateLimiter(requests_per_second)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        
+        # 异步客户端与创建它的事件循环绑定
+        self._async_clients: LoopLocalClients[httpx.AsyncClient] = LoopLocalClients(
+            lambda: self._create_async_client(), lambda client: client.aclose()
+        )
     
     def _create_text_input(self, text: str) -> Dict[str, Any]:
         """创建文本输入格式."""
@@ -42,59 +108,88 @@ class DoubaoEmbeddings(Embeddings):
             "text": text
         }
     
-    def _call_api(self, inputs: List[Dict[str, Any]]) -> List[List[float]]:
-        """调用豆包API."""
-        payload = {
+    def _build_payload(self, inputs: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """构建请求体."""
+        return {
             "model": self.model,
             "encoding_format": "float",
             "input": inputs
         }
+    
+    @staticmethod
+    def _parse_response(result: Dict[str, Any]) -> List[List[float]]:
+        """解析豆包响应：data.embedding 直接是向量数组（多个输入融合为一个向量）."""
+        if "data" in result and "embedding" in result["data"]:
+            embedding = result["data"]["embedding"]
+            if isinstance(embedding, list):
+                return [embedding]
+            raise ValueError(f"embedding应该是数组，但得到: {type(embedding)}")
+        raise ValueError(f"响应格式不正确，缺少data.embedding: {result}")
+    
+    def _retry_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """计算重试等待时间：优先使用Retry-After，否则指数退避加抖动（都不超过``max_backoff``）."""
+        if retry_after:
+            try:
+                return min(max(float(retry_after), 0.0), self.max_backoff)
+            except ValueError:
+                pass
+        return min(self.backoff_base * (2 ** attempt) * (1 + random.random() * 0.1), self.max_backoff)
+    
+    def _call_api(self, inputs: List[Dict[str, Any]]) -> List[List[float]]:
+        """调用豆包API（带限流和重试）."""
+        payload = self._build_payload(inputs)
         
-        try:
-            response = requests.post(
-                self.endpoint,
-                json=payload,
-                headers=self.headers,
-                timeout=30
-            )
+        for attempt in range(self.max_retries + 1):
+            wait = self._rate_limiter.reserve()
+            if wait:
+                time.sleep(wait)
+            
+            try:
+                response = self.session.post(self.endpoint, json=payload, timeout=30)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt < self.max_retries:
+                    time.sleep(self._retry_delay(attempt))
+                    continue
+                raise ValueError(f"Request failed: {str(e)}")
+            except requests.exceptions.RequestException as e:
+                raise ValueError(f"Request failed: {str(e)}")
             
             if response.status_code == 200:
-                result = response.json()
-                print(f"🔍 豆包API响应结构: {list(result.keys())}")  # 调试信息
-                
-                if "data" in result and "embedding" in result["data"]:
-                    # 豆包的格式：data.embedding 直接是向量数组
-                    embedding = result["data"]["embedding"]
-                    if isinstance(embedding, list):
-                        # 如果是单个查询，返回包含一个embedding的列表
-                        return [embedding] if len(inputs) == 1 else [embedding] * len(inputs)
-                    else:
-                        raise ValueError(f"embedding应该是数组，但得到: {type(embedding)}")
-                else:
-                    raise ValueError(f"响应格式不正确，缺少data.embedding: {result}")
-            else:
-                raise ValueError(f"API call failed: {response.status_code} - {response.text}")
-                
-        except requests.exceptions.RequestException as e:
-            raise ValueError(f"Request failed: {str(e)}")
+                return self._parse_response(response.json())
+            
+            if response.status_code in RETRYABLE_STATUS_CODES and attempt < self.max_retries:
+                time.sleep(self._retry_delay(attempt, response.headers.get("Retry-After")))
+                continue
+            
+            raise ValueError(f"API call failed: {response.status_code} - {response.text}")
+        
+        raise ValueError("API call failed: retries exhausted")
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """获取共享的有界线程池."""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="doubao-embedding"
+                )
+            return self._executor
+    
+    def _embed_text_or_zero(self, text: str) -> List[float]:
+        """嵌入单个文本，失败时返回零向量."""
+        try:
+            return self._call_api([self._create_text_input(text)])[0]
+        except Exception as e:
+            print(f"⚠️ 文档embedding失败: {e}")
+            # 返回零向量作为fallback
+            return [0.0] * 2048  # 豆包向量维度是2048
     
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        """嵌入多个文档."""
-        # 豆包API似乎不支持真正的批量处理，需要逐个调用
-        embeddings = []
+        """嵌入多个文档（并发请求，结果顺序与输入一致）."""
+        if len(texts) <= 1 or self.max_workers == 1:
+            return [self._embed_text_or_zero(text) for text in texts]
         
-        for i, text in enumerate(texts):
-            try:
-                print(f"🔄 处理文档 {i+1}/{len(texts)}: {text[:50]}{'...' if len(text) > 50 else ''}")
-                single_input = [self._create_text_input(text)]
-                result = self._call_api(single_input)
-                embeddings.append(result[0])
-            except Exception as single_error:
-                print(f"⚠️ 文档 {i+1} embedding失败: {single_error}")
-                # 返回零向量作为fallback
-                embeddings.append([0.0] * 2048)  # 豆包向量维度是2048
-                
-        return embeddings
+        return list(self._get_executor().map(self._embed_text_or_zero, texts))
     
     def embed_query(self, text: str) -> List[float]:
         """嵌入单个查询."""
@@ -107,6 +202,80 @@ class DoubaoEmbeddings(Embeddings):
             # 返回零向量作为fallback
             return [0.0] * 2048
     
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """批量嵌入查询（查询与文档的请求相同，因此并发请求，结果与逐个``embed_query``一致）."""
+        return self.embed_documents(texts)
+    
+    def _create_async_client(self) -> httpx.AsyncClient:
+        """创建异步HTTP客户端（带连接数限制）."""
+        return httpx.AsyncClient(
+            headers=self.headers,
+            timeout=30,
+            limits=httpx.Limits(
+                max_connections=self.max_concurrency,
+                max_keepalive_connections=self.max_concurrency
+            )
+        )
+    
+    async def _acall_api(self, inputs: List[Dict[str, Any]]) -> List[List[float]]:
+        """异步调用豆包API（带限流和重试）."""
+        payload = self._build_payload(inputs)
+        client = await self._async_clients.get()
+        
+        for attempt in range(self.max_retries + 1):
+            wait = self._rate_limiter.reserve()
+            if wait:
+                await asyncio.sleep(wait)
+            
+            try:
+                response = await client.post(self.endpoint, json=payload)
+            except httpx.TransportError as e:
+                if attempt < self.max_retries:
+                    await asyncio.sleep(self._retry_delay(attempt))
+                    continue
+                raise ValueError(f"Request failed: {str(e)}")
+            except httpx.HTTPError as e:
+                raise ValueError(f"Request failed: {str(e)}")
+            
+            if response.status_code == 200:
+                return self._parse_response(response.json())
+            
+            if response.status_code in RETRYABLE_STATUS_CODES and attempt < self.max_retries:
+                await asyncio.sleep(self._retry_delay(attempt, response.headers.get("Retry-After")))
+                continue
+            
+            raise ValueError(f"API call failed: {response.status_code} - {response.text}")
+        
+        raise ValueError("API call failed: retries exhausted")
+    
+    async def _aembed_text_or_zero(self, text: str, semaphore: asyncio.Semaphore) -> List[float]:
+        """异步嵌入单个文本，失败时返回零向量."""
+        async with semaphore:
+            try:
+                return (await self._acall_api([self._create_text_input(text)]))[0]
+            except Exception as e:
+                print(f"⚠️ 文档embedding失败: {e}")
+                return [0.0] * 2048
+    
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """异步嵌入多个文档（单事件循环内有界并发，结果顺序与输入一致）."""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        return list(await asyncio.gather(
+            *(self._aembed_text_or_zero(text, semaphore) for text in texts)
+        ))
+    
+    async def aembed_query(self, text: str) -> List[float]:
+        """异步嵌入单个查询."""
+        try:
+            return (await self._acall_api([self._create_text_input(text)]))[0]
+        except Exception as e:
+            print(f"⚠️ 豆包embedding查询失败: {e}")
+            return [0.0] * 2048
+    
+    async def aclose(self) -> None:
+        """关闭当前事件循环的异步HTTP客户端（循环结束时也会自动关闭）."""
+        await self._async_clients.aclose()
+    
     def embed_multimodal(
         self, 
         text: str = None,
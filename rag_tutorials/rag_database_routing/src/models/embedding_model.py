@@ -1,16 +1,32 @@
 """嵌入模型配置和管理."""
 
 import os
-from typing import Union
 from functools import lru_cache
-from langchain_openai import OpenAIEmbeddings
+from langchain_core.embeddings import Embeddings
 from .config import settings
 from .doubao_embeddings import DoubaoEmbeddings
+from .cached_embeddings import CachedEmbeddings
 
 
 @lru_cache(maxsize=1) 
-def get_embedding_model() -> Union[OpenAIEmbeddings, DoubaoEmbeddings]:
+def get_embedding_model() -> Embeddings:
     """获取缓存的嵌入模型实例 (支持OpenAI、豆包等)."""
+    embeddings, model_name = _create_embedding_model()
+    
+    if settings.embedding_cache_enabled:
+        print(f"💾 启用Embedding缓存: {settings.embedding_cache_path}")
+        return CachedEmbeddings(
+            embeddings,
+            model_name=model_name,
+            cache_path=settings.embedding_cache_path,
+            max_entries=settings.embedding_cache_max_entries
+        )
+    
+    return embeddings
+
+
+def _create_embedding_model() -> tuple[Embeddings, str]:
+    """创建底层嵌入模型，返回模型实例和模型名称."""
     
     # 优先检查豆包配置
     if settings.ark_api_key and settings.ark_base_url and settings.doubao_embedding_model:
@@ -20,8 +36,12 @@ def get_embedding_model() -> Union[OpenAIEmbeddings, DoubaoEmbeddings]:
         return DoubaoEmbeddings(
             model=settings.doubao_embedding_model,
             api_key=settings.ark_api_key,
-            base_url=settings.ark_base_url
-        )
+            base_url=settings.ark_base_url,
+            max_workers=settings.doubao_max_workers,
+            max_retries=settings.doubao_max_retries,
+            requests_per_second=settings.doubao_requests_per_second,
+            max_concurrency=settings.doubao_async_max_concurrency
+        ), settings.doubao_embedding_model
     
     # 使用OpenAI embedding
     if not settings.openai_api_key:
@@ -40,6 +60,8 @@ def get_embedding_model() -> Union[OpenAIEmbeddings, DoubaoEmbeddings]:
     if settings.openai_base_url:
         os.environ["OPENAI_BASE_URL"] = settings.openai_base_url
     
+    from langchain_openai import OpenAIEmbeddings
+    
     return OpenAIEmbeddings(
         model=settings.embedding_model
-    )
\ No newline at end of file
+    ), settings.embedding_model
\ No newline at end of file
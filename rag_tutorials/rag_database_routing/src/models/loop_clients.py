@@ -0,0 +1,61 @@
+"""Per-event-loop async clients."""
+
+import asyncio
+import threading
+from typing import AsyncIterator, Awaitable, Callable, Generic, Optional, Tuple, TypeVar
+from weakref import WeakKeyDictionary
+
+T = TypeVar("T")
+
+
+class LoopLocalClients(Generic[T]):
+    """One async client per event loop, closed inside that loop when it shuts down.
+
+    httpx等异步连接池绑定在创建它的事件循环上，不能跨循环复用，也不能在其他循环中关闭。
+    每个循环首次使用时创建客户端，并登记一个异步生成器：``asyncio.run``结束前调用
+    ``loop.shutdown_asyncgens()``，生成器的``finally``在同一个循环中关闭客户端，
+    每个问题一次``asyncio.run``也不会泄漏连接。多个线程各自的事件循环互不影响。
+    """
+
+    def __init__(self, create: Callable[[], T], close: Callable[[T], Awaitable[None]]):
+        self._create = create
+        self._close = close
+        self._clients: "WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple[T, AsyncIterator[None]]]" = WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    async def get(self) -> T:
+        """Get the running loop's client, creating it on first use."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._clients.get(loop)
+            if entry is not None:
+                return entry[0]
+            client = self._create()
+            closer = self._close_on_shutdown(client)
+            self._clients[loop] = (client, closer)
+        # 第一次迭代时事件循环登记该生成器，关闭循环前会对它调用aclose()
+        await closer.__anext__()
+        return client
+
+    def current(self) -> Optional[T]:
+        """Get the running loop's client without creating one."""
+        with self._lock:
+            entry = self._clients.get(asyncio.get_running_loop())
+        return entry[0] if entry else None
+
+    async def aclose(self) -> None:
+        """Close the running loop's client now."""
+        with self._lock:
+            entry = self._clients.pop(asyncio.get_running_loop(), None)
+        if entry is not None:
+            await entry[1].aclose()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._clients)
+
+    async def _close_on_shutdown(self, client: T) -> AsyncIterator[None]:
+        try:
+            yield
+        finally:
+            await self._close(client)
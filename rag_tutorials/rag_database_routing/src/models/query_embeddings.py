@@ -0,0 +1,22 @@
+"""Batched query embeddings."""
+
+import sys
+from typing import List
+from langchain_core.embeddings import Embeddings
+
+
+def embed_queries(embeddings: Embeddings, texts: List[str]) -> List[List[float]]:
+    """Embed many queries; each vector equals ``embeddings.embed_query(text)``.
+
+    有些模型的查询向量与文档向量不同（例如带检索指令前缀），不能用``embed_documents``代替。
+    模型提供``embed_queries``时（豆包、Embedding缓存）直接使用；OpenAI的``embed_query``
+    就是单条的``embed_documents``，可以批量请求；其他模型逐个调用``embed_query``。
+    """
+    batch = getattr(embeddings, "embed_queries", None)
+    if callable(batch):
+        return batch(texts)
+    # 只在已经导入langchain_openai时检查，避免为此加载它
+    openai = sys.modules.get("langchain_openai")
+    if openai is not None and isinstance(embeddings, openai.OpenAIEmbeddings):
+        return embeddings.embed_documents(texts)
+    return [embeddings.embed_query(text) for text in texts]
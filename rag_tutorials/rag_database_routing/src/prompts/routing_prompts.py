@@ -1,6 +1,6 @@
 """Prompt templates for routing and QA."""
 
-from langchain.prompts import ChatPromptTemplate
+from langchain_core.prompts import ChatPromptTemplate
 
 
 def get_routing_prompt() -> str:
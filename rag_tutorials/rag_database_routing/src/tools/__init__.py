@@ -1,7 +1,45 @@
-"""Custom tools and utilities."""
+"""Custom tools and utilities.
 
-from .vector_store import VectorStoreManager
-from .document_processor import DocumentProcessor
-from .web_search import WebSearchTool
+导出的名称在首次访问时才导入对应子模块，``import src.tools``不会加载qdrant_client、pypdf等重依赖。
+"""
 
-__all__ = ["VectorStoreManager", "DocumentProcessor", "WebSearchTool"] 
\ No newline at end of file
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .vector_store import VectorStoreManager
+    from .local_vector_store import LocalVectorStoreManager
+    from .document_processor import DocumentProcessor
+    from .web_search import WebSearchTool
+    from .query_context import QueryContext
+    from .ingestion_pipeline import IngestionPipeline
+    from .routing_index import RoutingIndex
+    from .routing_classifier import RoutingClassifier
+    from .sparse_index import BM25Index
+
+_EXPORTS = {
+    "VectorStoreManager": ".vector_store",
+    "LocalVectorStoreManager": ".local_vector_store",
+    "DocumentProcessor": ".document_processor",
+    "WebSearchTool": ".web_search",
+    "QueryContext": ".query_context",
+    "IngestionPipeline": ".ingestion_pipeline",
+    "RoutingIndex": ".routing_index",
+    "RoutingClassifier": ".routing_classifier",
+    "BM25Index": ".sparse_index",
+}
+
+__all__ = ["VectorStoreManager", "LocalVectorStoreManager", "DocumentProcessor", "WebSearchTool", "QueryContext", "IngestionPipeline", "RoutingIndex", "RoutingClassifier", "BM25Index"]
+
+
+def __getattr__(name: str):
+    """Import an exported name's submodule on first access."""
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,10 +1,36 @@
 """Base vector store interface."""
 
+import asyncio
+import hashlib
+import uuid
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any, Protocol
+from typing import Dict, List, Any, Iterable, Optional, Protocol, Set
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 
-from ..data import DatabaseType
+from ..data import DatabaseType, COLLECTIONS
+
+
+# 文档块ID命名空间：相同数据库、来源和内容总是得到相同的点ID
+DOCUMENT_ID_NAMESPACE = uuid.UUID("6f1c3f8e-2b4a-4c55-9a61-3d0f5c2e7b19")
+
+
+def content_hash(text: str) -> str:
+    """Hash chunk content."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def document_source(document: Document) -> str:
+    """Get the source (file name) a chunk came from."""
+    return str(document.metadata.get("source") or document.metadata.get("filename") or "")
+
+
+def document_id(db_type: DatabaseType, document: Document) -> str:
+    """Deterministic point ID derived from database, source and content hash."""
+    return str(uuid.uuid5(
+        DOCUMENT_ID_NAMESPACE,
+        f"{db_type}\0{document_source(document)}\0{content_hash(document.page_content)}"
+    ))
 
 
 class BaseRetriever(Protocol):
@@ -16,13 +42,46 @@ class BaseRetriever(Protocol):
 
 
 class BaseVectorStoreManager(ABC):
-    """Abstract base class for vector store managers."""
+    """Abstract base class for vector store managers.
+    
+    异步方法默认在线程中调用同步实现，子类可以用原生异步客户端覆盖。
+    """
+    
+    embeddings: Embeddings
     
     @abstractmethod
     def add_documents(self, db_type: DatabaseType, documents: List[Document]) -> None:
         """Add documents to a specific collection."""
         pass
     
+    @abstractmethod
+    def add_embedded_documents(
+        self, 
+        db_type: DatabaseType, 
+        documents: List[Document], 
+        vectors: List[List[float]]
+    ) -> None:
+        """Add documents with precomputed embeddings to a specific collection.
+        
+        点ID由``document_id``确定性生成，重复写入相同内容会覆盖而不是新增。
+        """
+        pass
+    
+    @abstractmethod
+    def get_document_ids(self, db_type: DatabaseType, source: str) -> Set[str]:
+        """Get IDs of all chunks stored for a source file."""
+        pass
+    
+    @abstractmethod
+    def delete_documents(self, db_type: DatabaseType, ids: Iterable[str]) -> None:
+        """Delete chunks by ID."""
+        pass
+    
+    @abstractmethod
+    def sample_vectors(self, db_type: DatabaseType, limit: int) -> List[List[float]]:
+        """Get up to ``limit`` stored vectors of a collection (used to build the routing index)."""
+        pass
+    
     @abstractmethod
     def similarity_search_with_score(
         self, 
@@ -33,6 +92,32 @@ class BaseVectorStoreManager(ABC):
         """Search for similar documents with scores."""
         pass
     
+    @abstractmethod
+    def similarity_search_by_vector_with_score(
+        self, 
+        db_type: DatabaseType, 
+        embedding: List[float], 
+        k: int = 3,
+        offset: int = 0
+    ) -> List[tuple[Document, float]]:
+        """Search for similar documents with scores using a precomputed query embedding.
+        
+        ``offset``跳过前若干个结果，用于只补取已有结果之后的文档。
+        """
+        pass
+    
+    async def asimilarity_search_by_vector_with_score(
+        self, 
+        db_type: DatabaseType, 
+        embedding: List[float], 
+        k: int = 3,
+        offset: int = 0
+    ) -> List[tuple[Document, float]]:
+        """Async version of ``similarity_search_by_vector_with_score``."""
+        return await asyncio.to_thread(
+            self.similarity_search_by_vector_with_score, db_type, embedding, k, offset
+        )
+    
     @abstractmethod
     def get_retriever(self, db_type: DatabaseType, k: int = 4) -> BaseRetriever:
         """Get retriever for a specific database."""
@@ -41,4 +126,55 @@ class BaseVectorStoreManager(ABC):
     @abstractmethod
     def search_all_databases(self, query: str, k: int = 3) -> Dict[DatabaseType, List[tuple[Document, float]]]:
         """Search all databases and return results with scores."""
-        pass 
\ No newline at end of file
+        pass
+    
+    @abstractmethod
+    def search_all_databases_by_vector(
+        self, 
+        embedding: List[float], 
+        k: int = 3
+    ) -> Dict[DatabaseType, List[tuple[Document, float]]]:
+        """Search all databases with a precomputed query embedding."""
+        pass
+    
+    def search_batch_by_vectors(
+        self, 
+        db_type: DatabaseType, 
+        embeddings: List[List[float]], 
+        k: int = 3
+    ) -> List[List[tuple[Document, float]]]:
+        """Search one collection for many query embeddings (results in input order)."""
+        return [self.similarity_search_by_vector_with_score(db_type, embedding, k) for embedding in embeddings]
+    
+    def search_all_databases_by_vectors(
+        self, 
+        embeddings: List[List[float]], 
+        k: int = 3
+    ) -> List[Dict[DatabaseType, List[tuple[Document, float]]]]:
+        """Search every collection for many query embeddings, grouped by collection.
+        
+        出错的集合返回空列表；结果按输入顺序返回，每个问题一个``{数据库: 结果}``字典。
+        """
+        per_collection = {}
+        for db_type in COLLECTIONS:
+            try:
+                per_collection[db_type] = self.search_batch_by_vectors(db_type, embeddings, k)
+            except Exception as e:
+                print(f"Error searching {db_type}: {e}")
+                per_collection[db_type] = [[] for _ in embeddings]
+        return [
+            {db_type: results[i] for db_type, results in per_collection.items()}
+            for i in range(len(embeddings))
+        ]
+    
+    def sparse_search(self, db_type: DatabaseType, query: str, k: int = 10) -> List[tuple[Document, float]]:
+        """Keyword (BM25) search; returns nothing for stores without a sparse index."""
+        return []
+    
+    async def asearch_all_databases_by_vector(
+        self, 
+        embedding: List[float], 
+        k: int = 3
+    ) -> Dict[DatabaseType, List[tuple[Document, float]]]:
+        """Async version of ``search_all_databases_by_vector``."""
+        return await asyncio.to_thread(self.search_all_databases_by_vector, embedding, k)
@@ -1,48 +1,137 @@
 """Document processing utilities."""
 
 import os
-import tempfile
-from typing import List, Optional, Dict, Any
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from typing import Iterator, List, Optional, Dict, Any, Tuple
 from langchain_core.documents import Document
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import PyPDFLoader
 
 from ..models.config import settings
 
 
+_pdf_executor: Optional[ProcessPoolExecutor] = None
+_pdf_executor_lock = threading.Lock()
+
+
+def _pdf_worker_count() -> int:
+    """PDF解析进程数."""
+    return settings.pdf_max_workers or os.cpu_count() or 1
+
+
+def _get_pdf_executor() -> ProcessPoolExecutor:
+    """获取共享的PDF解析进程池（使用spawn，避免在多线程进程中fork）."""
+    global _pdf_executor
+    with _pdf_executor_lock:
+        if _pdf_executor is None:
+            _pdf_executor = ProcessPoolExecutor(
+                max_workers=_pdf_worker_count(),
+                mp_context=get_context("spawn")
+            )
+        return _pdf_executor
+
+
+def _extract_page_range(shm_name: str, size: int, start: int, end: int) -> List[Tuple[int, str]]:
+    """在子进程中从共享内存读取PDF并提取指定页范围的文本."""
+    from pypdf import PdfReader
+    
+    shm = SharedMemory(name=shm_name)
+    try:
+        reader = PdfReader(BytesIO(bytes(shm.buf[:size])))
+        return [(i, reader.pages[i].extract_text()) for i in range(start, end)]
+    finally:
+        shm.close()
+
+
 class DocumentProcessor:
-    """Handles document loading and processing."""
+    """Handles document loading and processing.
+    
+    ``pypdf``和文本分割器在第一次处理文档时才导入。
+    """
     
     def __init__(self):
         """Initialize document processor."""
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=settings.chunk_size,
-            chunk_overlap=settings.chunk_overlap
-        )
+        self._text_splitter = None
+    
+    @property
+    def text_splitter(self):
+        """Text splitter, created on first use."""
+        if self._text_splitter is None:
+            from langchain.text_splitter import RecursiveCharacterTextSplitter
+            self._text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=settings.chunk_size,
+                chunk_overlap=settings.chunk_overlap
+            )
+        return self._text_splitter
     
-    def process_pdf(self, file_content: bytes) -> List[Document]:
-        """Process PDF file content and return document chunks."""
+    def iter_pdf_pages(self, file_content: bytes, source: Optional[str] = None) -> Iterator[Document]:
+        """Load PDF file content page by page (pages are not split).
+        
+        在内存中解析，不写临时文件；页数达到``pdf_parallel_min_pages``时
+        按页范围分发到进程池并行提取，页面按顺序逐批产出。
+        """
         try:
-            # Create temporary file
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-                tmp_file.write(file_content)
-                tmp_path = tmp_file.name
+            from pypdf import PdfReader
             
-            # Load PDF
-            loader = PyPDFLoader(tmp_path)
-            documents = loader.load()
+            reader = PdfReader(BytesIO(file_content))
+            total_pages = len(reader.pages)
             
-            # Clean up temporary file
-            os.unlink(tmp_path)
+            def make_document(page: int, text: str) -> Document:
+                return Document(
+                    page_content=text,
+                    metadata={"source": source, "page": page, "total_pages": total_pages}
+                )
             
-            # Split documents into chunks
-            texts = self.text_splitter.split_documents(documents)
+            if total_pages < settings.pdf_parallel_min_pages or _pdf_worker_count() < 2:
+                for page in range(total_pages):
+                    yield make_document(page, reader.pages[page].extract_text())
+                return
             
-            return texts
+            for page, text in self._extract_pages_parallel(file_content, total_pages):
+                yield make_document(page, text)
             
         except Exception as e:
             raise ValueError(f"Error processing PDF: {e}")
     
+    def _extract_pages_parallel(self, file_content: bytes, total_pages: int) -> Iterator[Tuple[int, str]]:
+        """Extract page text across the process pool, yielding pages in order."""
+        # PDF字节只复制一次到共享内存，子进程按名称读取，避免每个任务序列化整个文件
+        shm = SharedMemory(create=True, size=max(len(file_content), 1))
+        futures = []
+        try:
+            shm.buf[:len(file_content)] = file_content
+            executor = _get_pdf_executor()
+            # 每个任务都要重新解析PDF结构，任务不宜过小：至少每个进程分到两个任务的量
+            step = max(1, settings.pdf_pages_per_task, -(-total_pages // (_pdf_worker_count() * 2)))
+            futures = [
+                executor.submit(_extract_page_range, shm.name, len(file_content), start, min(start + step, total_pages))
+                for start in range(0, total_pages, step)
+            ]
+            for future in futures:
+                yield from future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+            for future in futures:
+                if not future.cancelled():
+                    future.exception()  # 等待运行中的任务结束后再释放共享内存
+            shm.close()
+            shm.unlink()
+    
+    def process_pdf(self, file_content: bytes, source: Optional[str] = None) -> List[Document]:
+        """Process PDF file content and return document chunks (split page by page)."""
+        return [
+            chunk
+            for page in self.iter_pdf_pages(file_content, source)
+            for chunk in self.split_documents([page])
+        ]
+    
+    def split_documents(self, documents) -> List[Document]:
+        """Split loaded documents into chunks."""
+        return self.text_splitter.split_documents(documents)
+    
     def process_text(self, text: str, metadata: Optional[Dict[str, Any]] = None) -> List[Document]:
         """Process plain text and return document chunks."""
         try:
@@ -57,18 +146,25 @@ class DocumentProcessor:
         except Exception as e:
             raise ValueError(f"Error processing text: {e}")
     
-    def process_uploaded_file(self, uploaded_file) -> List[Document]:
-        """Process uploaded file (Streamlit file upload object)."""
+    def iter_uploaded_file(self, uploaded_file) -> Iterator[Document]:
+        """Load uploaded file (Streamlit file upload object) without splitting.
+        
+        PDF按页产出文档，文本文件产出单个文档。
+        """
         try:
             file_content = uploaded_file.getvalue()
             
             if uploaded_file.type == "application/pdf":
-                return self.process_pdf(file_content)
+                yield from self.iter_pdf_pages(file_content, uploaded_file.name)
             else:
                 # Try to decode as text
                 text_content = file_content.decode('utf-8')
-                metadata = {"filename": uploaded_file.name}
-                return self.process_text(text_content, metadata)
+                metadata = {"filename": uploaded_file.name, "source": uploaded_file.name}
+                yield Document(page_content=text_content, metadata=metadata)
                 
         except Exception as e:
-            raise ValueError(f"Error processing uploaded file: {e}") 
\ No newline at end of file
+            raise ValueError(f"Error processing uploaded file: {e}")
+    
+    def process_uploaded_file(self, uploaded_file) -> List[Document]:
+        """Process uploaded file (Streamlit file upload object)."""
+        return self.split_documents(self.iter_uploaded_file(uploaded_file)) 
\ No newline at end of file
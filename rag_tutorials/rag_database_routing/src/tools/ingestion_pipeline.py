@@ -0,0 +1,297 @@
+"""Streaming ingestion pipeline: parse → split → embed → upsert."""
+
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Set
+from langchain_core.documents import Document
+
+from ..models.config import settings
+from ..data import DatabaseType
+from .base_vector_store import BaseVectorStoreManager, content_hash, document_id, document_source
+from .document_processor import DocumentProcessor
+from .routing_index import RoutingIndex
+from .routing_classifier import RoutingClassifier
+
+
+# 阶段结束标记
+_DONE = object()
+
+
+@dataclass
+class _FileDone:
+    """Marker emitted after the last page of a file."""
+    source: str
+
+
+@dataclass
+class _Delete:
+    """Request to delete stale chunks of a re-uploaded file."""
+    ids: List[str]
+
+
+@dataclass
+class StageStats:
+    """Throughput statistics for a pipeline stage."""
+    name: str
+    items: int = 0
+    busy_seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        """Convert stats to a serializable dict."""
+        return {
+            "items": self.items,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "items_per_second": round(self.items / self.busy_seconds, 2) if self.busy_seconds else 0.0
+        }
+
+
+class _PipelineAborted(Exception):
+    """Raised inside a stage when another stage has failed."""
+
+
+class IngestionPipeline:
+    """Staged ingestion connected by bounded queues.
+
+    解析、分块、向量化在后台线程中运行，写入在调用线程中运行；
+    阶段之间使用有界队列，下游变慢时上游会阻塞（背压），
+    内存占用与队列容量相关，而不是与上传文件总大小相关。
+
+    文档块使用确定性ID（数据库 + 来源 + 内容哈希）：重新上传同一文件时
+    跳过未变化的块，只向量化新增/修改的块，并删除文件中已不存在的块。
+    向量化失败（零向量）的块不写入，计入``chunks_failed``，下次上传同一文件时会重新向量化。
+    
+    提供``routing_index``/``routing_classifier``时，写入的向量同时用于
+    增量更新该集合的路由原型和分类器训练样本。
+    """
+
+    def __init__(
+        self,
+        vector_store_manager: BaseVectorStoreManager,
+        doc_processor: DocumentProcessor,
+        queue_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        routing_index: Optional[RoutingIndex] = None,
+        routing_classifier: Optional[RoutingClassifier] = None
+    ):
+        """Initialize ingestion pipeline."""
+        self.vector_store = vector_store_manager
+        self.doc_processor = doc_processor
+        self.queue_size = queue_size or settings.ingest_queue_size
+        self.batch_size = batch_size or settings.ingest_batch_size
+        self.progress_callback = progress_callback
+        self.routing_index = routing_index
+        self.routing_classifier = routing_classifier
+
+    def run(self, db_type: DatabaseType, uploaded_files: List[Any]) -> Dict[str, Any]:
+        """Ingest uploaded files into a database and return a summary."""
+        self._stop = threading.Event()
+        self._error: Optional[str] = None
+        self._processed_files: List[str] = []
+        self._total_files = len(uploaded_files)
+        self._stats = {name: StageStats(name) for name in ("parse", "split", "embed", "upsert")}
+        self._chunks_skipped = 0
+        self._chunks_deleted = 0
+        self._chunks_failed = 0
+
+        pages: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        chunk_batches: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        embedded_batches: queue.Queue = queue.Queue(maxsize=self.queue_size)
+
+        start_time = time.perf_counter()
+        workers = [
+            threading.Thread(target=self._guard, args=(self._parse_stage, uploaded_files, pages), daemon=True),
+            threading.Thread(target=self._guard, args=(self._split_stage, db_type, pages, chunk_batches), daemon=True),
+            threading.Thread(target=self._guard, args=(self._embed_stage, chunk_batches, embedded_batches), daemon=True),
+        ]
+        for worker in workers:
+            worker.start()
+
+        # 写入阶段在调用线程中运行，进度回调因此也在调用线程中触发
+        self._guard(self._upsert_stage, db_type, embedded_batches)
+        for worker in workers:
+            worker.join()
+
+        elapsed = time.perf_counter() - start_time
+        num_chunks = self._stats["upsert"].items
+        summary = {
+            "processed_files": list(self._processed_files),
+            "num_chunks": num_chunks,
+            "chunks_skipped": self._chunks_skipped,
+            "chunks_deleted": self._chunks_deleted,
+            "chunks_failed": self._chunks_failed,
+            "embeddings_saved": self._chunks_skipped,
+            "elapsed_seconds": round(elapsed, 3),
+            "chunks_per_second": round(num_chunks / elapsed, 2) if elapsed else 0.0,
+            "stage_stats": {name: stats.to_dict() for name, stats in self._stats.items()}
+        }
+
+        if self._error:
+            return {"success": False, "error": self._error, **summary}
+        if not num_chunks and self._chunks_failed:
+            return {"success": False, "error": f"Embedding failed for all {self._chunks_failed} new chunks.", **summary}
+        if not num_chunks and not self._chunks_skipped and not self._chunks_deleted:
+            return {"success": False, "error": "No documents were extracted from the uploaded files.", **summary}
+        return {
+            "success": True,
+            "message": (
+                f"Successfully processed {len(self._processed_files)} files and added {num_chunks} document chunks "
+                f"to {db_type} database ({self._chunks_skipped} unchanged chunks skipped, "
+                f"{self._chunks_deleted} stale chunks removed, {self._chunks_failed} chunks failed to embed)."
+            ),
+            **summary
+        }
+
+    def _guard(self, stage: Callable, *args) -> None:
+        """Run a stage, recording the first error and stopping the other stages."""
+        try:
+            stage(*args)
+        except _PipelineAborted:
+            pass
+        except Exception as e:
+            if self._error is None:
+                self._error = str(e)
+            self._stop.set()
+
+    def _put(self, target: queue.Queue, item: Any) -> None:
+        """Put an item, blocking while the queue is full (backpressure)."""
+        while True:
+            if self._stop.is_set():
+                raise _PipelineAborted()
+            try:
+                target.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, source: queue.Queue) -> Any:
+        """Get an item, aborting if another stage failed."""
+        while True:
+            if self._stop.is_set():
+                raise _PipelineAborted()
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+    def _parse_stage(self, uploaded_files: List[Any], pages: queue.Queue) -> None:
+        """Parse files into pages/documents."""
+        stats = self._stats["parse"]
+        for uploaded_file in uploaded_files:
+            iterator = self.doc_processor.iter_uploaded_file(uploaded_file)
+            while True:
+                started = time.perf_counter()
+                try:
+                    document = next(iterator)
+                except StopIteration:
+                    break
+                except Exception as e:
+                    raise ValueError(f"Error processing file {uploaded_file.name}: {str(e)}")
+                finally:
+                    stats.busy_seconds += time.perf_counter() - started
+                stats.items += 1
+                self._put(pages, document)
+            self._processed_files.append(uploaded_file.name)
+            self._put(pages, _FileDone(uploaded_file.name))
+        self._put(pages, _DONE)
+
+    def _split_stage(self, db_type: DatabaseType, pages: queue.Queue, chunk_batches: queue.Queue) -> None:
+        """Split pages into new/changed chunks and group them into embedding batches."""
+        stats = self._stats["split"]
+        batch: List[Document] = []
+        existing_ids: Dict[str, Set[str]] = {}
+        seen_ids: Dict[str, Set[str]] = {}
+
+        while (item := self._get(pages)) is not _DONE:
+            if isinstance(item, _FileDone):
+                # 文件处理完毕：删除旧版本中已不存在的块
+                stale = existing_ids.pop(item.source, set()) - seen_ids.pop(item.source, set())
+                if stale:
+                    self._put(chunk_batches, _Delete(sorted(stale)))
+                continue
+
+            started = time.perf_counter()
+            chunks = self.doc_processor.split_documents([item])
+            new_chunks = []
+            for chunk in chunks:
+                source = document_source(chunk)
+                if source not in existing_ids:
+                    existing_ids[source] = self.vector_store.get_document_ids(db_type, source) if source else set()
+                    seen_ids[source] = set()
+
+                chunk_id = document_id(db_type, chunk)
+                if chunk_id in existing_ids[source] or chunk_id in seen_ids[source]:
+                    self._chunks_skipped += 1
+                else:
+                    chunk.metadata["content_hash"] = content_hash(chunk.page_content)
+                    new_chunks.append(chunk)
+                seen_ids[source].add(chunk_id)
+            stats.busy_seconds += time.perf_counter() - started
+            stats.items += len(chunks)
+
+            batch.extend(new_chunks)
+            while len(batch) >= self.batch_size:
+                self._put(chunk_batches, batch[:self.batch_size])
+                batch = batch[self.batch_size:]
+        if batch:
+            self._put(chunk_batches, batch)
+        self._put(chunk_batches, _DONE)
+
+    def _embed_stage(self, chunk_batches: queue.Queue, embedded_batches: queue.Queue) -> None:
+        """Embed chunk batches."""
+        stats = self._stats["embed"]
+        while (batch := self._get(chunk_batches)) is not _DONE:
+            if isinstance(batch, _Delete):
+                self._put(embedded_batches, batch)
+                continue
+            started = time.perf_counter()
+            vectors = self.vector_store.embeddings.embed_documents([doc.page_content for doc in batch])
+            stats.busy_seconds += time.perf_counter() - started
+            stats.items += len(batch)
+            self._put(embedded_batches, (batch, vectors))
+        self._put(embedded_batches, _DONE)
+
+    def _upsert_stage(self, db_type: DatabaseType, embedded_batches: queue.Queue) -> None:
+        """Write embedded batches to the vector store."""
+        stats = self._stats["upsert"]
+        while (item := self._get(embedded_batches)) is not _DONE:
+            if isinstance(item, _Delete):
+                self.vector_store.delete_documents(db_type, item.ids)
+                self._chunks_deleted += len(item.ids)
+                continue
+            batch, vectors = item
+            started = time.perf_counter()
+            # embedding失败时返回零向量：不写入，下次上传同一文件时重新向量化
+            embedded = [(doc, vector) for doc, vector in zip(batch, vectors) if any(vector)]
+            self._chunks_failed += len(batch) - len(embedded)
+            if not embedded:
+                stats.busy_seconds += time.perf_counter() - started
+                self._report_progress()
+                continue
+            batch = [doc for doc, _ in embedded]
+            vectors = [vector for _, vector in embedded]
+            self.vector_store.add_embedded_documents(db_type, batch, vectors)
+            if self.routing_index is not None:
+                self.routing_index.partial_fit(db_type, vectors)
+            if self.routing_classifier is not None:
+                self.routing_classifier.add_examples(db_type, vectors)
+            stats.busy_seconds += time.perf_counter() - started
+            stats.items += len(batch)
+            self._report_progress()
+
+    def _report_progress(self) -> None:
+        """Report progress to the callback."""
+        if self.progress_callback is None:
+            return
+        self.progress_callback({
+            "files_parsed": len(self._processed_files),
+            "total_files": self._total_files,
+            "pages_parsed": self._stats["parse"].items,
+            "chunks_split": self._stats["split"].items,
+            "chunks_embedded": self._stats["embed"].items,
+            "chunks_upserted": self._stats["upsert"].items,
+            "chunks_skipped": self._chunks_skipped,
+            "chunks_failed": self._chunks_failed
+        })
@@ -0,0 +1,566 @@
+"""In-process vector store backed by memory-mapped files."""
+
+import json
+import math
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+
+from ..models import get_embedding_model
+from ..models.config import settings
+from ..data import DatabaseType, COLLECTIONS
+from .base_vector_store import BaseVectorStoreManager, document_id, document_source
+from .routing_index import _normalize, _truncate
+from .sparse_index import BM25Index
+
+
+class LocalCollection:
+    """One collection stored on local disk.
+
+    向量归一化后以float32写入内存映射文件（``vectors.f32``，按行追加，容量不足时倍增），
+    文本和元数据写入只追加的``payloads.jsonl``日志，启动时重放日志恢复ID与行号的对应关系。
+    删除只记录日志并把该行标记为无效，不移动数据。
+
+    ``quantization="int8"``或``search_dimension``小于向量维度时，另存一份用于第一轮搜索的副本
+    （前``search_dimension``维重新归一化，int8时按行缩放，``search_vectors.bin``），
+    搜索只扫描该副本，取``k * rescore_oversampling``个候选后从float32文件读取这些行重新打分，
+    float32原始向量不必常驻内存。
+    """
+
+    VECTORS_FILE = "vectors.f32"
+    SEARCH_FILE = "search_vectors.bin"
+    SCALES_FILE = "search_scales.f32"
+    SEARCH_META_FILE = "search.json"
+    PAYLOADS_FILE = "payloads.jsonl"
+    META_FILE = "meta.json"
+
+    # 每次矩阵乘法处理的行数，限制大集合搜索时的临时内存
+    SEARCH_BLOCK_ROWS = 65536
+
+    def __init__(
+        self,
+        directory: str,
+        collection_name: str,
+        quantization: Optional[str] = None,
+        rescore_oversampling: float = 3.0,
+        search_dimension: Optional[int] = None
+    ):
+        """Open (or create) a collection directory."""
+        if quantization not in (None, "int8"):
+            raise ValueError(f"本地向量存储只支持int8量化，不支持: {quantization}")
+        self.directory = directory
+        self.collection_name = collection_name
+        self.quantization = quantization
+        self.rescore_oversampling = rescore_oversampling
+        self.search_dimension = search_dimension
+        self.dimension: Optional[int] = None
+
+        self._lock = threading.RLock()
+        self._vectors: Optional[np.memmap] = None
+        self._search_layout: Optional[dict] = None
+        self._search_vectors: Optional[np.memmap] = None
+        self._scales: Optional[np.memmap] = None
+        self._capacity = 0
+        self._count = 0
+        self._alive = np.zeros(0, dtype=bool)
+        self._row_ids: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+        self._payloads: Dict[int, Tuple[str, dict]] = {}
+        self._sources: Dict[str, Set[str]] = {}
+
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _read_json(self, name: str) -> Optional[dict]:
+        if not os.path.exists(self._path(name)):
+            return None
+        with open(self._path(name), encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_json(self, name: str, data: dict) -> None:
+        with open(self._path(name), "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+    def _set_dimension(self, dimension: int) -> None:
+        """Fix the vector dimension and the layout of the first-pass copy."""
+        self.dimension = dimension
+        width = min(self.search_dimension or dimension, dimension)
+        if self.quantization or width < dimension:
+            self._search_layout = {"dimension": width, "quantization": self.quantization}
+
+    def _load(self) -> None:
+        """Map the vector files and replay the payload log."""
+        meta = self._read_json(self.META_FILE)
+        if meta is None:
+            return
+        self._set_dimension(int(meta["dimension"]))
+
+        if os.path.exists(self._path(self.PAYLOADS_FILE)):
+            with open(self._path(self.PAYLOADS_FILE), encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    if record.get("deleted"):
+                        self._forget(record["id"])
+                    else:
+                        self._remember(record["id"], record["row"], record["content"], record["metadata"])
+
+        self._count = len(self._row_ids)
+        vectors_path = self._path(self.VECTORS_FILE)
+        capacity = os.path.getsize(vectors_path) // (4 * self.dimension) if os.path.exists(vectors_path) else 0
+        if capacity < self._count:
+            raise RuntimeError(f"{self.collection_name}: 向量文件比负载日志短，数据可能已损坏")
+
+        if self._search_layout is None:
+            # 不使用第一轮副本时写入不会更新它：删除旧副本，之后重新开启量化/截断时完整重建
+            for name in (self.SEARCH_META_FILE, self.SEARCH_FILE, self.SCALES_FILE):
+                if os.path.exists(self._path(name)):
+                    os.remove(self._path(name))
+
+        rebuild = self._search_layout is not None and (
+            self._read_json(self.SEARCH_META_FILE) != self._search_layout
+            or not os.path.exists(self._path(self.SEARCH_FILE))
+            or os.path.getsize(self._path(self.SEARCH_FILE)) < capacity * self._search_row_bytes()
+        )
+        if rebuild:
+            # 量化或截断设置变化：丢弃旧副本，从float32向量重新生成
+            for name in (self.SEARCH_FILE, self.SCALES_FILE):
+                if os.path.exists(self._path(name)):
+                    os.remove(self._path(name))
+            self._resize_files(capacity)
+        self._map(capacity)
+        if rebuild:
+            for start in range(0, self._count, self.SEARCH_BLOCK_ROWS):
+                stop = min(start + self.SEARCH_BLOCK_ROWS, self._count)
+                self._write_search_copy(np.arange(start, stop), np.asarray(self._vectors[start:stop]))
+            self._flush()
+            self._write_json(self.SEARCH_META_FILE, self._search_layout)
+
+    def _search_row_bytes(self) -> int:
+        """Bytes per row of the first-pass copy."""
+        itemsize = 1 if self._search_layout["quantization"] else 4
+        return self._search_layout["dimension"] * itemsize
+
+    def _map(self, capacity: int) -> None:
+        """(Re)map the vector files with the given row capacity."""
+        self._flush()
+        self._capacity = capacity
+        self._vectors = np.memmap(
+            self._path(self.VECTORS_FILE), dtype=np.float32, mode="r+", shape=(capacity, self.dimension)
+        ) if capacity else None
+        if self._search_layout and capacity:
+            self._search_vectors = np.memmap(
+                self._path(self.SEARCH_FILE),
+                dtype=np.int8 if self.quantization else np.float32,
+                mode="r+",
+                shape=(capacity, self._search_layout["dimension"])
+            )
+            if self.quantization:
+                self._scales = np.memmap(self._path(self.SCALES_FILE), dtype=np.float32, mode="r+", shape=(capacity,))
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:len(self._alive)] = self._alive[:capacity]
+        for row in self._payloads:
+            alive[row] = True
+        self._alive = alive
+
+    def _reserve(self, rows: int) -> None:
+        """Grow the vector files so they hold at least ``rows`` rows (caller holds the lock)."""
+        if rows <= self._capacity:
+            return
+        capacity = max(rows, self._capacity * 2, 1024)
+        self._resize_files(capacity)
+        self._map(capacity)
+
+    def _resize_files(self, capacity: int) -> None:
+        """Resize the vector files to ``capacity`` rows."""
+        files = [(self.VECTORS_FILE, 4 * self.dimension)]
+        if self._search_layout:
+            files.append((self.SEARCH_FILE, self._search_row_bytes()))
+            if self.quantization:
+                files.append((self.SCALES_FILE, 4))
+        for name, row_bytes in files:
+            with open(self._path(name), "ab") as f:
+                f.truncate(capacity * row_bytes)
+
+    def _flush(self) -> None:
+        for array in (self._vectors, self._search_vectors, self._scales):
+            if array is not None:
+                array.flush()
+
+    def _write_search_copy(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        """Store rows in the first-pass copy: truncated, then int8 with one scale per row (caller holds the lock)."""
+        vectors = _truncate(vectors, self._search_layout["dimension"])
+        if not self.quantization:
+            self._search_vectors[rows] = vectors
+            return
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        self._search_vectors[rows] = np.rint(vectors / scales[:, None]).astype(np.int8)
+        self._scales[rows] = scales
+
+    def _remember(self, doc_id: str, row: int, content: str, metadata: dict) -> None:
+        """Record a chunk's row and payload in memory."""
+        self._forget(doc_id)
+        while len(self._row_ids) <= row:
+            self._row_ids.append(None)
+        self._row_ids[row] = doc_id
+        self._rows[doc_id] = row
+        self._payloads[row] = (content, metadata)
+        self._sources.setdefault(self._source(metadata), set()).add(doc_id)
+        if row < len(self._alive):
+            self._alive[row] = True
+
+    def _forget(self, doc_id: str) -> None:
+        """Drop a chunk from the in-memory maps (its row becomes a hole)."""
+        row = self._rows.pop(doc_id, None)
+        if row is None:
+            return
+        _, metadata = self._payloads.pop(row)
+        source_ids = self._sources.get(self._source(metadata))
+        if source_ids is not None:
+            source_ids.discard(doc_id)
+        if row < len(self._alive):
+            self._alive[row] = False
+
+    @staticmethod
+    def _source(metadata: dict) -> str:
+        return document_source(Document(page_content="", metadata=metadata))
+
+    def upsert(self, ids: List[str], documents: List[Document], vectors: np.ndarray) -> None:
+        """Write chunks; an existing ID is overwritten in place."""
+        if not len(ids):
+            return
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+
+        with self._lock:
+            if self.dimension is None:
+                self._set_dimension(int(vectors.shape[1]))
+                self._write_json(self.META_FILE, {"dimension": self.dimension})
+                if self._search_layout:
+                    self._write_json(self.SEARCH_META_FILE, self._search_layout)
+            elif vectors.shape[1] != self.dimension:
+                raise ValueError(f"{self.collection_name}: 向量维度 {vectors.shape[1]} 与集合维度 {self.dimension} 不一致")
+
+            rows = []
+            next_row = self._count
+            for doc_id in ids:
+                row = self._rows.get(doc_id)
+                if row is None:
+                    row, next_row = next_row, next_row + 1
+                rows.append(row)
+            self._reserve(next_row)
+
+            # 先写向量再写日志：日志中出现的行一定已有向量
+            self._vectors[rows] = vectors
+            if self._search_layout:
+                self._write_search_copy(np.asarray(rows), vectors)
+            self._flush()
+            with open(self._path(self.PAYLOADS_FILE), "a", encoding="utf-8") as f:
+                for doc_id, row, doc in zip(ids, rows, documents):
+                    f.write(json.dumps({
+                        "id": doc_id, "row": row, "content": doc.page_content, "metadata": doc.metadata
+                    }, ensure_ascii=False, default=str) + "\n")
+            for doc_id, row, doc in zip(ids, rows, documents):
+                self._remember(doc_id, row, doc.page_content, dict(doc.metadata))
+            self._count = next_row
+
+    def delete(self, ids: Iterable[str]) -> None:
+        """Delete chunks by ID."""
+        with self._lock:
+            ids = [doc_id for doc_id in ids if doc_id in self._rows]
+            if not ids:
+                return
+            with open(self._path(self.PAYLOADS_FILE), "a", encoding="utf-8") as f:
+                for doc_id in ids:
+                    f.write(json.dumps({"id": doc_id, "deleted": True}) + "\n")
+            for doc_id in ids:
+                self._forget(doc_id)
+
+    def ids_for_source(self, source: str) -> Set[str]:
+        """Get IDs of all chunks from a source file."""
+        with self._lock:
+            return set(self._sources.get(source, ()))
+
+    def document(self, row: int) -> Document:
+        """Build the LangChain document stored at a row."""
+        content, metadata = self._payloads[row]
+        metadata = dict(metadata)
+        metadata["_id"] = self._row_ids[row]
+        metadata["_collection_name"] = self.collection_name
+        return Document(page_content=content, metadata=metadata)
+
+    def documents(self) -> List[Tuple[str, Document]]:
+        """Get all stored chunks as ``(id, document)`` pairs."""
+        with self._lock:
+            return [(self._row_ids[row], self.document(row)) for row in self._payloads]
+
+    def sample(self, limit: int) -> np.ndarray:
+        """Get up to ``limit`` stored vectors, spread evenly over the collection."""
+        with self._lock:
+            rows = np.flatnonzero(self._alive[:self._count])
+            if not len(rows):
+                return np.empty((0, self.dimension or 0), dtype=np.float32)
+            if len(rows) > limit:
+                rows = rows[np.linspace(0, len(rows) - 1, limit).astype(int)]
+            return np.array(self._vectors[rows])
+
+    def search(self, queries: np.ndarray, k: int, offset: int = 0) -> List[List[Tuple[Document, float]]]:
+        """Top-k cosine search for a batch of queries with blockwise matrix products.
+
+        没有第一轮副本时为精确搜索；否则先在（截断/int8）副本上取候选，再用float32向量重新打分。
+        """
+        queries = _normalize(np.asarray(queries, dtype=np.float32))
+        with self._lock:
+            count, vectors, alive = self._count, self._vectors, self._alive[:self._count].copy()
+            search_vectors, scales = self._search_vectors, self._scales
+        if not count or not alive.any() or k <= 0:
+            return [[] for _ in queries]
+        if queries.shape[1] != self.dimension:
+            raise ValueError(f"{self.collection_name}: 查询维度 {queries.shape[1]} 与集合维度 {self.dimension} 不一致")
+
+        n = k + offset
+        if self._search_layout:
+            first_pass = _truncate(queries, self._search_layout["dimension"])
+
+            def block_scores(start: int, stop: int) -> np.ndarray:
+                scores = first_pass @ np.asarray(search_vectors[start:stop], dtype=np.float32).T
+                # 第一轮分数只用于排序：int8的查询缩放对同一查询的所有行相同，可以省略
+                return scores * scales[start:stop] if self.quantization else scores
+
+            best_scores, best_rows = self._top_rows(
+                queries, count, alive, math.ceil(n * self.rescore_oversampling), block_scores
+            )
+            best_scores = self._rescore(queries, vectors, best_scores, best_rows)
+        else:
+            best_scores, best_rows = self._top_rows(
+                queries, count, alive, n, lambda start, stop: queries @ vectors[start:stop].T
+            )
+
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        best_scores = np.take_along_axis(best_scores, order, axis=1)[:, offset:n]
+        best_rows = np.take_along_axis(best_rows, order, axis=1)[:, offset:n]
+
+        results = []
+        with self._lock:
+            for scores, rows in zip(best_scores, best_rows):
+                results.append([
+                    (self.document(int(row)), float(score))
+                    for score, row in zip(scores, rows)
+                    if np.isfinite(score) and int(row) in self._payloads
+                ])
+        return results
+
+    def _top_rows(
+        self,
+        queries: np.ndarray,
+        count: int,
+        alive: np.ndarray,
+        n: int,
+        block_scores
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Keep the ``n`` best (unsorted) rows per query while scanning blocks of rows."""
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        for start in range(0, count, self.SEARCH_BLOCK_ROWS):
+            stop = min(start + self.SEARCH_BLOCK_ROWS, count)
+            scores = block_scores(start, stop)
+            scores[:, ~alive[start:stop]] = -np.inf
+            rows = np.broadcast_to(np.arange(start, stop), scores.shape)
+            # 当前块的候选与之前的最优结果合并，只保留前n个
+            scores = np.concatenate([best_scores, scores], axis=1)
+            rows = np.concatenate([best_rows, rows], axis=1)
+            if scores.shape[1] > n:
+                top = np.argpartition(-scores, n - 1, axis=1)[:, :n]
+                scores = np.take_along_axis(scores, top, axis=1)
+                rows = np.take_along_axis(rows, top, axis=1)
+            best_scores, best_rows = scores, rows
+        return best_scores, best_rows
+
+    @staticmethod
+    def _rescore(
+        queries: np.ndarray,
+        vectors: np.ndarray,
+        scores: np.ndarray,
+        rows: np.ndarray
+    ) -> np.ndarray:
+        """Replace candidate scores with exact float32 scores, reading only the candidate rows."""
+        valid = np.isfinite(scores)
+        candidates, positions = np.unique(rows[valid], return_inverse=True)
+        exact = np.asarray(vectors[candidates]) @ queries.T
+        rescored = np.full(scores.shape, -np.inf, dtype=np.float32)
+        rescored[valid] = exact[positions, np.nonzero(valid)[0]]
+        return rescored
+
+    def close(self) -> None:
+        """Flush and unmap the vector file."""
+        with self._lock:
+            self._flush()
+            self._vectors = self._search_vectors = self._scales = None
+
+
+class LocalRetriever(BaseRetriever):
+    """LangChain retriever over a local collection."""
+
+    manager: Any
+    db_type: str
+    k: int = 4
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return [doc for doc, _ in self.manager.similarity_search_with_score(self.db_type, query, self.k)]
+
+
+class LocalVectorStoreManager(BaseVectorStoreManager):
+    """Vector store that runs in-process without a Qdrant server.
+
+    每个集合一个目录（``<path>/<collection_name>``），精确top-k搜索，
+    多个查询向量合并为一次矩阵乘法。适合几百万个文档块以内的语料，
+    也用作离线测试和基准测试的后端。
+    """
+
+    def __init__(self, path: Optional[str] = None, embeddings: Optional[Embeddings] = None):
+        """Initialize local vector store manager.
+
+        ``path``默认为``settings.local_vector_store_path``。
+        """
+        self.path = path or settings.local_vector_store_path
+        self.embeddings = embeddings or get_embedding_model()
+        self.databases: Dict[DatabaseType, LocalCollection] = {
+            db_type: LocalCollection(
+                os.path.join(self.path, config.collection_name),
+                config.collection_name,
+                quantization=config.quantization,
+                rescore_oversampling=config.rescore_oversampling,
+                search_dimension=settings.matryoshka_dimension or None
+            )
+            for db_type, config in COLLECTIONS.items()
+        }
+        self.sparse_indexes: Dict[DatabaseType, BM25Index] = {}
+        self._sparse_lock = threading.Lock()
+
+    def _collection(self, db_type: DatabaseType) -> LocalCollection:
+        if db_type not in self.databases:
+            raise ValueError(f"Database type {db_type} not found")
+        return self.databases[db_type]
+
+    def add_documents(self, db_type: DatabaseType, documents: List[Document]) -> None:
+        """Add documents to a specific collection."""
+        self._collection(db_type)
+        vectors = self.embeddings.embed_documents([doc.page_content for doc in documents])
+        self.add_embedded_documents(db_type, documents, vectors)
+
+    def add_embedded_documents(
+        self,
+        db_type: DatabaseType,
+        documents: List[Document],
+        vectors: List[List[float]]
+    ) -> None:
+        """Add documents with precomputed embeddings to a specific collection."""
+        collection = self._collection(db_type)
+        ids = [document_id(db_type, doc) for doc in documents]
+        collection.upsert(ids, documents, np.asarray(vectors, dtype=np.float32))
+
+        index = self.sparse_indexes.get(db_type)
+        if index is not None:
+            for doc_id, doc in zip(ids, documents):
+                index.add(doc_id, Document(
+                    page_content=doc.page_content,
+                    metadata={**doc.metadata, "_id": doc_id, "_collection_name": collection.collection_name}
+                ))
+
+    def get_document_ids(self, db_type: DatabaseType, source: str) -> Set[str]:
+        """Get IDs of all chunks stored for a source file."""
+        return self._collection(db_type).ids_for_source(source)
+
+    def delete_documents(self, db_type: DatabaseType, ids: Iterable[str]) -> None:
+        """Delete chunks by ID."""
+        ids = [str(doc_id) for doc_id in ids]
+        self._collection(db_type).delete(ids)
+        if db_type in self.sparse_indexes:
+            self.sparse_indexes[db_type].remove(ids)
+
+    def sample_vectors(self, db_type: DatabaseType, limit: int) -> List[List[float]]:
+        """Get up to ``limit`` stored vectors of a collection (used to build the routing index)."""
+        return self._collection(db_type).sample(limit).tolist()
+
+    def similarity_search_with_score(
+        self,
+        db_type: DatabaseType,
+        query: str,
+        k: int = 3
+    ) -> List[tuple[Document, float]]:
+        """Search for similar documents with scores."""
+        return self.similarity_search_by_vector_with_score(db_type, self.embeddings.embed_query(query), k)
+
+    def similarity_search_by_vector_with_score(
+        self,
+        db_type: DatabaseType,
+        embedding: List[float],
+        k: int = 3,
+        offset: int = 0
+    ) -> List[tuple[Document, float]]:
+        """Search for similar documents with scores using a precomputed query embedding."""
+        return self._collection(db_type).search(np.asarray([embedding]), k, offset)[0]
+
+    def search_batch_by_vectors(
+        self,
+        db_type: DatabaseType,
+        embeddings: List[List[float]],
+        k: int = 3
+    ) -> List[List[tuple[Document, float]]]:
+        """Search one collection for many query embeddings with one matrix product per block."""
+        if not len(embeddings):
+            return []
+        return self._collection(db_type).search(np.asarray(embeddings), k)
+
+    def get_retriever(self, db_type: DatabaseType, k: int = 4) -> LocalRetriever:
+        """Get retriever for a specific database."""
+        self._collection(db_type)
+        return LocalRetriever(manager=self, db_type=db_type, k=k)
+
+    def search_all_databases(self, query: str, k: int = 3) -> Dict[DatabaseType, List[tuple[Document, float]]]:
+        """Search all databases and return results with scores."""
+        return self.search_all_databases_by_vector(self.embeddings.embed_query(query), k)
+
+    def search_all_databases_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 3
+    ) -> Dict[DatabaseType, List[tuple[Document, float]]]:
+        """Search all databases with a precomputed query embedding (errors give empty results)."""
+        return self.search_all_databases_by_vectors([embedding], k)[0]
+
+    def sparse_search(self, db_type: DatabaseType, query: str, k: int = 10) -> List[tuple[Document, float]]:
+        """Keyword (BM25) search over a collection; empty unless hybrid search is enabled."""
+        if not settings.hybrid_search_enabled:
+            return []
+        collection = self._collection(db_type)
+        if db_type not in self.sparse_indexes:
+            with self._sparse_lock:
+                if db_type not in self.sparse_indexes:
+                    index = BM25Index()
+                    for doc_id, doc in collection.documents():
+                        index.add(doc_id, doc)
+                    self.sparse_indexes[db_type] = index
+        return self.sparse_indexes[db_type].search(query, k)
+
+    def close(self) -> None:
+        """Flush all vector files."""
+        for collection in self.databases.values():
+            collection.close()
@@ -0,0 +1,43 @@
+"""Per-request query context shared by routing and QA."""
+
+from typing import Dict, List, Optional, Tuple
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+
+class QueryContext:
+    """Holds the question of a single request and its lazily computed embedding.
+
+    路由和问答共用同一个上下文，问题向量只计算一次；
+    ``embedding_calls`` 记录实际调用embedding模型的次数。
+    路由阶段的搜索结果记录在``routing_hits``中，供问答阶段复用。
+    """
+
+    def __init__(self, question: str, embeddings: Embeddings, embedding: Optional[List[float]] = None):
+        """Initialize query context (``embedding`` may be precomputed, e.g. by a batch request)."""
+        self.question = question
+        self.embeddings = embeddings
+        self.embedding_calls = 0
+        self._embedding: Optional[List[float]] = embedding
+        self.routing_hits: Dict[str, List[Tuple[Document, float]]] = {}
+        self.routing_hits_k = 0
+
+    @property
+    def embedding(self) -> List[float]:
+        """Get the query embedding, computing it on first access."""
+        if self._embedding is None:
+            self._embedding = self.embeddings.embed_query(self.question)
+            self.embedding_calls += 1
+        return self._embedding
+    
+    async def aget_embedding(self) -> List[float]:
+        """Async version of ``embedding``."""
+        if self._embedding is None:
+            self._embedding = await self.embeddings.aembed_query(self.question)
+            self.embedding_calls += 1
+        return self._embedding
+    
+    def record_routing_hits(self, hits: Dict[str, List[Tuple[Document, float]]], k: int) -> None:
+        """Remember the per-collection hits of the routing search (searched with top-``k``)."""
+        self.routing_hits = hits
+        self.routing_hits_k = k
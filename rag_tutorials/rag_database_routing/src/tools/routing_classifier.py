@@ -0,0 +1,199 @@
+"""Local embedding classifier used as the middle routing tier."""
+
+import os
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..data import DatabaseType, COLLECTIONS
+from .routing_index import _truncate
+
+
+class RoutingClassifier:
+    """Multinomial logistic regression over query embeddings.
+
+    训练样本来自两处：写入文档时的文档块向量（每个集合做蓄水池采样，
+    最多保留``max_examples_per_collection``条），以及LLM路由的历史决策
+    （问题向量 + 选中的数据库）。向量路由置信度不足时先用分类器判断，
+    分类器也不确定时才调用LLM。设置``dimension``后只使用向量的前``dimension``维。
+    """
+
+    def __init__(
+        self,
+        max_examples_per_collection: int = 2000,
+        epochs: int = 200,
+        learning_rate: float = 1.0,
+        l2: float = 1e-4,
+        dimension: Optional[int] = None
+    ):
+        """Initialize routing classifier."""
+        self.max_examples_per_collection = max_examples_per_collection
+        self.dimension = dimension
+        self.epochs = epochs
+        self.learning_rate = learning_rate
+        self.l2 = l2
+        self.path: Optional[str] = None
+
+        self._examples: Dict[DatabaseType, np.ndarray] = {}
+        self._seen: Dict[DatabaseType, int] = {}
+        self._rng = np.random.default_rng(0)
+        self._lock = threading.Lock()
+        self._new_examples = 0
+
+        self._labels: List[DatabaseType] = []
+        self._mean: Optional[np.ndarray] = None
+        self._weights: Optional[np.ndarray] = None
+        self._bias: Optional[np.ndarray] = None
+
+    def is_trained(self) -> bool:
+        """Whether the classifier has been trained on at least two collections."""
+        return self._weights is not None
+
+    def has_collection(self, db_type: DatabaseType) -> bool:
+        """Whether there are training examples for a collection."""
+        return db_type in self._examples
+
+    @property
+    def pending_examples(self) -> int:
+        """Examples added since the last training run."""
+        return self._new_examples
+
+    def add_examples(self, db_type: DatabaseType, vectors: Sequence[Sequence[float]]) -> None:
+        """Add labelled vectors, keeping a uniform sample per collection (reservoir sampling)."""
+        data = _truncate(np.asarray(vectors, dtype=np.float32), self.dimension)
+        # 跳过零向量（embedding失败时的回退值）
+        data = data[data.any(axis=1)] if len(data) else data
+        if not len(data):
+            return
+
+        with self._lock:
+            examples = self._examples.get(db_type, np.empty((0, data.shape[1]), dtype=np.float32))
+            seen = self._seen.get(db_type, 0)
+
+            room = max(self.max_examples_per_collection - len(examples), 0)
+            if room:
+                examples = np.vstack([examples, data[:room]])
+            seen += len(data[:room])
+            for vector in data[room:]:
+                seen += 1
+                slot = int(self._rng.integers(seen))
+                if slot < self.max_examples_per_collection:
+                    examples[slot] = vector
+            self._new_examples += len(data)
+
+            if len(examples):
+                self._examples[db_type] = examples
+                self._seen[db_type] = seen
+
+    def train(self) -> bool:
+        """Train on the collected examples; returns False if fewer than two collections have examples."""
+        with self._lock:
+            labels = [db_type for db_type in COLLECTIONS if db_type in self._examples]
+            if len(labels) < 2:
+                return False
+            features = np.vstack([self._examples[db_type] for db_type in labels])
+            targets = np.concatenate([
+                np.full(len(self._examples[db_type]), i) for i, db_type in enumerate(labels)
+            ])
+            self._new_examples = 0
+
+        # 中心化后各集合之间的差异更明显，梯度下降收敛更快
+        mean = features.mean(axis=0)
+        features = features - mean
+        one_hot = np.eye(len(labels), dtype=np.float32)[targets]
+        # 按类别加权，避免样本多的集合压过样本少的集合
+        class_weights = len(targets) / (len(labels) * np.bincount(targets, minlength=len(labels)))
+        sample_weights = (class_weights[targets][:, None] / len(targets)).astype(np.float32)
+
+        weights = np.zeros((features.shape[1], len(labels)), dtype=np.float32)
+        bias = np.zeros(len(labels), dtype=np.float32)
+        for _ in range(self.epochs):
+            probabilities = self._softmax(features @ weights + bias)
+            error = (probabilities - one_hot) * sample_weights
+            weights -= self.learning_rate * (features.T @ error + self.l2 * weights)
+            bias -= self.learning_rate * error.sum(axis=0)
+
+        with self._lock:
+            self._labels, self._mean, self._weights, self._bias = labels, mean, weights, bias
+        return True
+
+    @staticmethod
+    def _softmax(logits: np.ndarray) -> np.ndarray:
+        """Row-wise softmax."""
+        exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def predict_proba(self, embedding: Sequence[float]) -> Dict[DatabaseType, float]:
+        """Get class probabilities for a query embedding."""
+        with self._lock:
+            labels, mean, weights, bias = self._labels, self._mean, self._weights, self._bias
+        if weights is None:
+            return {}
+        features = _truncate(np.asarray([embedding], dtype=np.float32), self.dimension) - mean
+        probabilities = self._softmax(features @ weights + bias)[0]
+        return {db_type: float(p) for db_type, p in zip(labels, probabilities)}
+
+    def predict(self, embedding: Sequence[float]) -> Tuple[Optional[DatabaseType], float]:
+        """Get the most likely database and its probability."""
+        probabilities = self.predict_proba(embedding)
+        if not probabilities:
+            return None, 0.0
+        db_type = max(probabilities, key=probabilities.get)
+        return db_type, probabilities[db_type]
+
+    def save(self, path: Optional[str] = None) -> None:
+        """Persist examples and model weights to an .npz file (defaults to the path it was loaded from)."""
+        path = path or self.path
+        if not path:
+            return
+        with self._lock:
+            arrays = {"dimension": np.array(self.dimension or 0)}
+            for db_type, examples in self._examples.items():
+                arrays[f"{db_type}__examples"] = examples
+                arrays[f"{db_type}__seen"] = np.array(self._seen[db_type])
+            if self._weights is not None:
+                arrays["labels"] = np.array(self._labels)
+                arrays["mean"] = self._mean
+                arrays["weights"] = self._weights
+                arrays["bias"] = self._bias
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(
+        cls, 
+        path: str, 
+        max_examples_per_collection: int = 2000, 
+        dimension: Optional[int] = None
+    ) -> "RoutingClassifier":
+        """Load a classifier from an .npz file (untrained if the file doesn't exist).
+        
+        保存时的维度与``dimension``不同时：样本能截断到``dimension``则截断并标记为需要重新训练，
+        否则丢弃。
+        """
+        classifier = cls(max_examples_per_collection, dimension=dimension)
+        classifier.path = path
+        if not os.path.exists(path):
+            return classifier
+        with np.load(path) as data:
+            saved_dimension = int(data["dimension"]) if "dimension" in data else 0
+            same_dimension = saved_dimension == (dimension or 0)
+            for db_type in COLLECTIONS:
+                if f"{db_type}__examples" in data:
+                    examples = data[f"{db_type}__examples"].astype(np.float32)
+                    if not same_dimension and not (dimension and examples.shape[1] >= dimension):
+                        continue
+                    classifier._examples[db_type] = _truncate(examples, dimension)
+                    classifier._seen[db_type] = int(data[f"{db_type}__seen"])
+            if not same_dimension:
+                # 模型按其他维度训练，只保留（截断后的）样本，由调用方重新训练
+                classifier._new_examples = sum(len(examples) for examples in classifier._examples.values())
+            elif "weights" in data:
+                classifier._labels = [str(label) for label in data["labels"]]
+                classifier._mean = data["mean"]
+                classifier._weights = data["weights"]
+                classifier._bias = data["bias"]
+        return classifier
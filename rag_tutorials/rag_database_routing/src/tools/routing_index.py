@@ -0,0 +1,170 @@
+"""In-memory prototype (centroid) index for query routing."""
+
+import os
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from ..data import DatabaseType, COLLECTIONS
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows (zero rows stay zero)."""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def _truncate(vectors: np.ndarray, dimension: Optional[int]) -> np.ndarray:
+    """Keep the leading ``dimension`` components (Matryoshka embeddings) and L2-normalize."""
+    if dimension:
+        vectors = vectors[..., :dimension]
+    return _normalize(vectors)
+
+
+class RoutingIndex:
+    """Keeps a few prototype vectors per collection in one NumPy matrix.
+
+    每个集合保存最多``prototypes_per_collection``个原型向量（k-means质心），
+    写入文档时用在线k-means增量更新；路由时只需一次矩阵-向量乘法，
+    集合得分为查询与该集合各原型的最大余弦相似度。
+    设置``dimension``后只使用向量的前``dimension``维（重新归一化）。
+    """
+
+    def __init__(self, prototypes_per_collection: int = 8, dimension: Optional[int] = None):
+        """Initialize routing index."""
+        self.prototypes_per_collection = prototypes_per_collection
+        self.dimension = dimension
+        self._centroids: Dict[DatabaseType, np.ndarray] = {}
+        self._counts: Dict[DatabaseType, np.ndarray] = {}
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None
+        self._labels: List[DatabaseType] = []
+        self._offsets: List[int] = []
+
+    def is_ready(self) -> bool:
+        """Whether at least one collection has prototypes."""
+        return bool(self._centroids)
+
+    def has_collection(self, db_type: DatabaseType) -> bool:
+        """Whether a collection has prototypes."""
+        return db_type in self._centroids
+
+    def fit(self, db_type: DatabaseType, vectors: Sequence[Sequence[float]], iterations: int = 10) -> None:
+        """Replace a collection's prototypes with k-means centroids of the given vectors."""
+        data = _truncate(np.asarray(vectors, dtype=np.float32), self.dimension)
+        if not len(data):
+            return
+        k = min(self.prototypes_per_collection, len(data))
+
+        rng = np.random.default_rng(0)
+        centroids = data[rng.choice(len(data), size=k, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(data @ centroids.T, axis=1)
+            for j in range(k):
+                members = data[assignment == j]
+                if len(members):
+                    centroids[j] = members.mean(axis=0)
+        counts = np.bincount(np.argmax(data @ _normalize(centroids).T, axis=1), minlength=k).astype(np.float32)
+
+        with self._lock:
+            self._centroids[db_type] = centroids
+            self._counts[db_type] = np.maximum(counts, 1.0)
+            self._rebuild_matrix()
+
+    def partial_fit(self, db_type: DatabaseType, vectors: Sequence[Sequence[float]]) -> None:
+        """Incrementally update a collection's prototypes with new vectors (online k-means)."""
+        data = _truncate(np.asarray(vectors, dtype=np.float32), self.dimension)
+        if not len(data):
+            return
+
+        with self._lock:
+            centroids = self._centroids.get(db_type, np.empty((0, data.shape[1]), dtype=np.float32))
+            counts = self._counts.get(db_type, np.empty(0, dtype=np.float32))
+
+            for vector in data:
+                if not vector.any():
+                    continue
+                if len(centroids) < self.prototypes_per_collection:
+                    centroids = np.vstack([centroids, vector])
+                    counts = np.append(counts, 1.0)
+                    continue
+                nearest = int(np.argmax(_normalize(centroids) @ vector))
+                counts[nearest] += 1
+                centroids[nearest] += (vector - centroids[nearest]) / counts[nearest]
+
+            if len(centroids):
+                self._centroids[db_type] = centroids
+                self._counts[db_type] = counts
+                self._rebuild_matrix()
+
+    def _rebuild_matrix(self) -> None:
+        """Stack all prototypes into one normalized matrix (caller holds the lock)."""
+        self._labels = [db_type for db_type in COLLECTIONS if db_type in self._centroids]
+        self._offsets = []
+        offset = 0
+        for db_type in self._labels:
+            self._offsets.append(offset)
+            offset += len(self._centroids[db_type])
+        self._matrix = _normalize(np.vstack([self._centroids[db_type] for db_type in self._labels]))
+
+    def score(self, embedding: Sequence[float]) -> Dict[DatabaseType, float]:
+        """Score every indexed collection for a query embedding."""
+        return self.score_batch([embedding])[0]
+
+    def score_batch(self, embeddings: Sequence[Sequence[float]]) -> List[Dict[DatabaseType, float]]:
+        """Score every indexed collection for many query embeddings with one matrix product."""
+        with self._lock:
+            matrix, labels, offsets = self._matrix, self._labels, self._offsets
+        if matrix is None:
+            return [{} for _ in embeddings]
+
+        queries = _truncate(np.asarray(embeddings, dtype=np.float32), self.dimension)
+        similarities = queries @ matrix.T
+        # 每个集合取其原型中的最大相似度
+        per_collection = np.maximum.reduceat(similarities, offsets, axis=1)
+        return [
+            {db_type: float(row[i]) for i, db_type in enumerate(labels)}
+            for row in per_collection
+        ]
+
+    def save(self, path: str) -> None:
+        """Persist prototypes to an .npz file."""
+        with self._lock:
+            arrays = {"dimension": np.array(self.dimension or 0)}
+            for db_type in self._centroids:
+                arrays[f"{db_type}__centroids"] = self._centroids[db_type]
+                arrays[f"{db_type}__counts"] = self._counts[db_type]
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(
+        cls, 
+        path: str, 
+        prototypes_per_collection: int = 8, 
+        dimension: Optional[int] = None
+    ) -> "RoutingIndex":
+        """Load prototypes from an .npz file (empty index if the file doesn't exist).
+        
+        保存时的维度与``dimension``不同时：原型能截断到``dimension``则截断使用，
+        否则丢弃，之后重新采样构建。
+        """
+        index = cls(prototypes_per_collection, dimension)
+        if not os.path.exists(path):
+            return index
+        with np.load(path) as data:
+            saved_dimension = int(data["dimension"]) if "dimension" in data else 0
+            same_dimension = saved_dimension == (dimension or 0)
+            for db_type in COLLECTIONS:
+                if f"{db_type}__centroids" in data:
+                    centroids = data[f"{db_type}__centroids"].astype(np.float32)
+                    if not same_dimension and not (dimension and centroids.shape[1] >= dimension):
+                        continue
+                    index._centroids[db_type] = _truncate(centroids, dimension)
+                    index._counts[db_type] = data[f"{db_type}__counts"].astype(np.float32)
+        if index._centroids:
+            index._rebuild_matrix()
+        return index
@@ -0,0 +1,127 @@
+"""Local BM25 sparse index and reciprocal rank fusion for hybrid retrieval."""
+
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Sequence, Tuple
+from langchain_core.documents import Document
+
+from .base_vector_store import content_hash
+
+
+# 英文/数字编码（SKU-0001、INV-2024-001、ERR_404）整体作为一个词，中文连续片段单独处理
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*|[\u3400-\u4dbf\u4e00-\u9fff]+")
+_CODE_SEPARATORS = re.compile(r"[-_./]")
+
+
+def tokenize(text: str) -> List[str]:
+    """Tokenize mixed Chinese/English text for BM25.
+
+    中文按单字 + 相邻二字切分（无需分词词典）；编码类词语保留完整形式，
+    同时加入按分隔符拆开的各部分，"SKU-0001"和"0001"都能命中。
+    """
+    tokens: List[str] = []
+    for match in _TOKEN_PATTERN.findall(text.lower()):
+        if match[0].isascii():
+            tokens.append(match)
+            parts = _CODE_SEPARATORS.split(match)
+            if len(parts) > 1:
+                tokens.extend(part for part in parts if part)
+        else:
+            tokens.extend(match)
+            tokens.extend(a + b for a, b in zip(match, match[1:]))
+    return tokens
+
+
+class BM25Index:
+    """In-memory BM25 inverted index over one collection's chunks."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """Initialize BM25 index."""
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._documents: Dict[str, Document] = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def add(self, doc_id: str, document: Document) -> None:
+        """Index a chunk (re-adding an ID replaces the previous version)."""
+        counts = Counter(tokenize(document.page_content))
+        with self._lock:
+            self._remove(doc_id)
+            for term, tf in counts.items():
+                self._postings.setdefault(term, {})[doc_id] = tf
+            length = sum(counts.values())
+            self._lengths[doc_id] = length
+            self._total_length += length
+            self._documents[doc_id] = document
+
+    def remove(self, doc_ids: Iterable[str]) -> None:
+        """Remove chunks by ID."""
+        with self._lock:
+            for doc_id in doc_ids:
+                self._remove(str(doc_id))
+
+    def _remove(self, doc_id: str) -> None:
+        """Remove one chunk (caller holds the lock)."""
+        document = self._documents.pop(doc_id, None)
+        if document is None:
+            return
+        for term in set(tokenize(document.page_content)):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._lengths.pop(doc_id, 0)
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[Document, float]]:
+        """Get the top-``k`` chunks by BM25 score."""
+        terms = set(tokenize(query))
+        with self._lock:
+            total = len(self._documents)
+            if not total or not terms:
+                return []
+            average_length = self._total_length / total
+
+            scores: Dict[str, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / average_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+            top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+            return [(self._documents[doc_id], score) for doc_id, score in top]
+
+
+def reciprocal_rank_fusion(
+    result_lists: Sequence[Sequence[Tuple[Document, float]]],
+    k: int = 60
+) -> List[Tuple[Document, float]]:
+    """Fuse ranked result lists by reciprocal rank fusion (score = Σ 1 / (k + rank)).
+
+    只使用排名，不比较不同检索方式的原始分数；文档按``_id``（没有则按内容哈希）去重。
+    """
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+    for results in result_lists:
+        for rank, (document, _) in enumerate(results, start=1):
+            key = str(document.metadata.get("_id") or content_hash(document.page_content))
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            documents.setdefault(key, document)
+    return sorted(
+        ((documents[key], score) for key, score in scores.items()),
+        key=lambda item: item[1],
+        reverse=True
+    )
@@ -1,90 +1,487 @@
 """Vector store management for Qdrant."""
 
-from typing import Dict, List, Optional
+import asyncio
+import math
+import threading
+import time
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, Iterable, List, Optional, Set
 from langchain_qdrant import QdrantVectorStore
 from langchain_core.documents import Document
-from qdrant_client import QdrantClient
+from langchain_core.embeddings import Embeddings
+from qdrant_client import AsyncQdrantClient, QdrantClient, models
 from qdrant_client.models import Distance, VectorParams
 
 from ..models import get_embedding_model
 from ..models.config import settings
-from ..data import DatabaseType, COLLECTIONS
-from .base_vector_store import BaseVectorStoreManager
+from ..models.loop_clients import LoopLocalClients
+from ..data import CollectionConfig, DatabaseType, COLLECTIONS
+from .base_vector_store import BaseVectorStoreManager, document_id
+from .sparse_index import BM25Index
+
+
+class _LazyStores(Mapping):
+    """``databases`` mapping whose stores are created on first access."""
+    
+    def __init__(self, manager: "VectorStoreManager"):
+        self._manager = manager
+    
+    def __getitem__(self, db_type: DatabaseType) -> QdrantVectorStore:
+        if db_type not in COLLECTIONS:
+            raise KeyError(db_type)
+        return self._manager._get_store(db_type)
+    
+    def __contains__(self, db_type: object) -> bool:
+        return db_type in COLLECTIONS
+    
+    def __iter__(self):
+        return iter(COLLECTIONS)
+    
+    def __len__(self) -> int:
+        return len(COLLECTIONS)
 
 
 class VectorStoreManager(BaseVectorStoreManager):
-    """Manages Qdrant vector store collections."""
+    """Manages Qdrant vector store collections.
+    
+    设置``unified_collection_name``后，所有数据库类型共用一个集合，
+    通过``metadata.db_type``负载索引区分，路由搜索合并为一次批量请求。
+    
+    异步搜索使用``AsyncQdrantClient``；只注入了同步``client``时，
+    异步方法退回到在线程中调用同步实现。
+    
+    集合在首次使用时才检查/创建：启动时只调用一次``get_collections``，
+    各阶段耗时记录在``startup_timings``中。
+    
+    ``CollectionConfig.quantization``开启时，集合使用Qdrant标量/乘积量化，
+    原始向量存放在磁盘上，搜索在量化向量上进行并用原始向量重新打分。
     
-    def __init__(self):
-        """Initialize vector store manager."""
-        if not settings.qdrant_url or not settings.qdrant_api_key:
+    开启``hybrid_search_enabled``时，每个集合维护一个本地BM25索引：
+    首次使用时从Qdrant负载构建，之后随写入/删除增量更新。
+    """
+    
+    DB_TYPE_KEY = "db_type"
+    
+    def __init__(
+        self, 
+        client: Optional[QdrantClient] = None, 
+        embeddings: Optional[Embeddings] = None,
+        async_client: Optional[AsyncQdrantClient] = None
+    ):
+        """Initialize vector store manager.
+        
+        ``client``、``async_client``和``embeddings``可选注入（例如测试中使用内存模式的Qdrant）。
+        """
+        if client is None and (not settings.qdrant_url or not settings.qdrant_api_key):
             raise ValueError("Qdrant URL and API key are required. Please check your .env configuration.")
         
         try:
-            self.client = QdrantClient(
+            self.startup_timings: Dict[str, float] = {}
+            start = time.perf_counter()
+            self.client = client or QdrantClient(
                 url=settings.qdrant_url,
                 api_key=settings.qdrant_api_key,
-                timeout=30,  # 增加超时时间
-                prefer_grpc=False  # 使用HTTP而不是gRPC
+                timeout=settings.qdrant_timeout,
+                prefer_grpc=settings.qdrant_prefer_grpc,
+                grpc_port=settings.qdrant_grpc_port
             )
-            self.embeddings = get_embedding_model()
-            self.databases: Dict[DatabaseType, QdrantVectorStore] = {}
+            self.startup_timings["client"] = time.perf_counter() - start
+            self.embeddings = embeddings or get_embedding_model()
+            # 未注入任何客户端时按配置创建异步客户端（每个事件循环一个，循环结束时关闭）
+            self._async_client = async_client
+            self._async_clients: Optional[LoopLocalClients[AsyncQdrantClient]] = None
+            if client is None and async_client is None:
+                self._async_clients = LoopLocalClients(
+                    lambda: self._create_async_client(), lambda async_client: async_client.close()
+                )
+            self.sparse_indexes: Dict[DatabaseType, BM25Index] = {}
+            self._sparse_lock = threading.Lock()
+            self._stores: Dict[DatabaseType, QdrantVectorStore] = {}
+            self._store_lock = threading.Lock()
+            self._collection_locks: Dict[str, threading.Lock] = {}
+            self._prepared_collections: Set[str] = set()
+            self._existing_collections: Set[str] = set()
+            self.databases: Mapping[DatabaseType, QdrantVectorStore] = _LazyStores(self)
+            self.unified_collection = settings.unified_collection_name
+            self._search_executor = self._create_search_executor()
+            self._search_executor_lock = threading.Lock()
             self._initialize_collections()
         except Exception as e:
             raise RuntimeError(f"Failed to connect to Qdrant: {str(e)}. Please check your network connection and Qdrant credentials.")
     
     def _initialize_collections(self) -> None:
-        """Initialize all Qdrant collections."""
-        # Test connection
-        self.client.get_collections()
+        """Check which collections exist with a single request.
         
-        for db_type, config in COLLECTIONS.items():
-            try:
-                # Try to get existing collection
-                self.client.get_collection(config.collection_name)
-            except Exception:
-                # Create collection if it doesn't exist
-                self.client.create_collection(
-                    collection_name=config.collection_name,
-                    vectors_config=VectorParams(
-                        size=settings.vector_size, 
-                        distance=Distance.COSINE
-                    )
-                )
-            
-            # Create QdrantVectorStore instance for this collection
-            try:
-                self.databases[db_type] = QdrantVectorStore(
+        集合的检查/创建和``QdrantVectorStore``的构建推迟到首次使用（见``_get_store``），
+        启动耗时不随集合数量增长。
+        """
+        start = time.perf_counter()
+        self._existing_collections = {
+            collection.name for collection in self.client.get_collections().collections
+        }
+        self.startup_timings["get_collections"] = time.perf_counter() - start
+        print(
+            f"⏱️ Qdrant启动: 客户端 {self.startup_timings['client'] * 1000:.1f}ms, "
+            f"get_collections {self.startup_timings['get_collections'] * 1000:.1f}ms "
+            f"({len(self._existing_collections)} 个已有集合)"
+        )
+    
+    def _get_store(self, db_type: DatabaseType) -> QdrantVectorStore:
+        """Get a database type's store, preparing its collection on first use."""
+        store = self._stores.get(db_type)
+        if store is not None:
+            return store
+        
+        collection_name = self._collection_name(db_type)
+        with self._store_lock:
+            collection_lock = self._collection_locks.setdefault(collection_name, threading.Lock())
+        # 每个集合一把锁：并发首次搜索不同集合时并行准备
+        with collection_lock:
+            if db_type not in self._stores:
+                start = time.perf_counter()
+                if collection_name not in self._prepared_collections:
+                    # 统一集合按第一个数据库类型的存储配置创建
+                    config_type = next(iter(COLLECTIONS)) if self.unified_collection else db_type
+                    self._prepare_collection(collection_name, self._storage_config(config_type))
+                    self._prepared_collections.add(collection_name)
+                # 集合已在上面检查过，跳过QdrantVectorStore的重复校验请求
+                self._stores[db_type] = QdrantVectorStore(
                     client=self.client,
-                    collection_name=config.collection_name,
-                    embedding=self.embeddings
+                    collection_name=collection_name,
+                    embedding=self.embeddings,
+                    validate_collection_config=False
                 )
-            except Exception as e:
-                if "dimensions" in str(e) or "force_recreate" in str(e):
-                    # 维度不匹配，使用force_recreate重新创建
-                    print(f"⚠️ 集合 {config.collection_name} 维度不匹配，使用force_recreate重新创建...")
-                    
-                    # 使用from_documents方法创建，并传递force_recreate参数
-                    from langchain_core.documents import Document
-                    dummy_doc = Document(page_content="dummy", metadata={})
-                    
-                    self.databases[db_type] = QdrantVectorStore.from_documents(
-                        documents=[dummy_doc],
-                        embedding=self.embeddings,
-                        url=settings.qdrant_url,
-                        api_key=settings.qdrant_api_key,
-                        collection_name=config.collection_name,
-                        force_recreate=True
-                    )
-                else:
-                    raise e
+                self.startup_timings[f"collection:{db_type}"] = time.perf_counter() - start
+        return self._stores[db_type]
+    
+    def _prepare_collection(self, collection_name: str, config: CollectionConfig) -> None:
+        """Create a missing collection, or check and update an existing one (recreated on dimension mismatch)."""
+        if collection_name in self._existing_collections:
+            info = self.client.get_collection(collection_name)
+            vectors = info.config.params.vectors
+            if not isinstance(vectors, VectorParams) or vectors.size == settings.vector_size:
+                self._update_collection(collection_name, config, info)
+                return
+            print(f"⚠️ 集合 {collection_name} 维度不匹配 ({vectors.size} != {settings.vector_size})，重新创建...")
+            self.client.delete_collection(collection_name)
+        
+        self._create_collection(collection_name, config)
+        if self.unified_collection:
+            self._ensure_db_type_index(collection_name)
+        self._existing_collections.add(collection_name)
+    
+    def _create_collection(self, collection_name: str, config: CollectionConfig) -> None:
+        """Create a collection with the params from ``config`` and the source payload index."""
+        self.client.create_collection(
+            collection_name=collection_name,
+            vectors_config=VectorParams(
+                size=settings.vector_size, 
+                distance=Distance.COSINE,
+                on_disk=self._vectors_on_disk(config)
+            ),
+            hnsw_config=self._hnsw_config(config),
+            optimizers_config=self._optimizers_config(config),
+            on_disk_payload=config.on_disk_payload,
+            shard_number=config.shard_number,
+            replication_factor=config.replication_factor,
+            quantization_config=self._quantization_config(config)
+        )
+        # 按来源文件增量更新时需要按source过滤
+        self.client.create_payload_index(
+            collection_name=collection_name,
+            field_name=f"{QdrantVectorStore.METADATA_KEY}.source",
+            field_schema=models.PayloadSchemaType.KEYWORD
+        )
+    
+    def _update_collection(self, collection_name: str, config: CollectionConfig, info: models.CollectionInfo) -> None:
+        """Apply config values that differ from an existing collection."""
+        params = info.config.params
+        changes = {}
+        
+        hnsw = info.config.hnsw_config
+        if (config.hnsw_m is not None and hnsw.m != config.hnsw_m) or \
+                (config.hnsw_ef_construct is not None and hnsw.ef_construct != config.hnsw_ef_construct):
+            changes["hnsw_config"] = self._hnsw_config(config)
+        
+        if config.indexing_threshold is not None and \
+                info.config.optimizer_config.indexing_threshold != config.indexing_threshold:
+            changes["optimizers_config"] = self._optimizers_config(config)
+        
+        collection_params = {}
+        if config.on_disk_payload is not None and bool(params.on_disk_payload) != config.on_disk_payload:
+            collection_params["on_disk_payload"] = config.on_disk_payload
+        if config.replication_factor is not None and (params.replication_factor or 1) != config.replication_factor:
+            collection_params["replication_factor"] = config.replication_factor
+        if collection_params:
+            changes["collection_params"] = models.CollectionParamsDiff(**collection_params)
+        
+        on_disk = self._vectors_on_disk(config)
+        # 只处理默认（未命名）向量的集合
+        if on_disk is not None and isinstance(params.vectors, VectorParams) and bool(params.vectors.on_disk) != on_disk:
+            changes["vectors_config"] = {"": models.VectorParamsDiff(on_disk=on_disk)}
+        
+        quantization_config = self._quantization_config(config)
+        if quantization_config and info.config.quantization_config is None:
+            # 已有集合开启量化：Qdrant在后台为现有向量建立量化版本
+            changes["quantization_config"] = quantization_config
+        
+        if config.shard_number is not None and (params.shard_number or 1) != config.shard_number:
+            print(f"⚠️ 集合 {collection_name} 的分片数为 {params.shard_number or 1}，分片数只能在创建集合时设置")
+        
+        if changes:
+            self.client.update_collection(collection_name=collection_name, **changes)
+            print(f"✅ 集合 {collection_name} 配置已更新: {', '.join(changes)}")
+    
+    @staticmethod
+    def _hnsw_config(config: CollectionConfig) -> Optional[models.HnswConfigDiff]:
+        """Get the HNSW index config for a collection (None = Qdrant defaults)."""
+        if config.hnsw_m is None and config.hnsw_ef_construct is None:
+            return None
+        return models.HnswConfigDiff(m=config.hnsw_m, ef_construct=config.hnsw_ef_construct)
+    
+    @staticmethod
+    def _optimizers_config(config: CollectionConfig) -> Optional[models.OptimizersConfigDiff]:
+        """Get the optimizer config for a collection (None = Qdrant defaults)."""
+        if config.indexing_threshold is None:
+            return None
+        return models.OptimizersConfigDiff(indexing_threshold=config.indexing_threshold)
+    
+    @staticmethod
+    def _vectors_on_disk(config: CollectionConfig) -> Optional[bool]:
+        """Whether original vectors live on disk (quantized collections default to on disk)."""
+        if config.on_disk_vectors is not None:
+            return config.on_disk_vectors
+        # 量化后搜索只读内存中的压缩向量，原始向量只在重新打分时从磁盘读取
+        return True if config.quantization else None
+    
+    def _ensure_db_type_index(self, collection_name: str) -> None:
+        """Create the keyword payload index used to filter by database type."""
+        self.client.create_payload_index(
+            collection_name=collection_name,
+            field_name=f"{QdrantVectorStore.METADATA_KEY}.{self.DB_TYPE_KEY}",
+            field_schema=models.PayloadSchemaType.KEYWORD
+        )
+    
+    @staticmethod
+    def _quantization_config(config: CollectionConfig) -> Optional[models.QuantizationConfig]:
+        """Get the Qdrant quantization config for a collection (None = full precision)."""
+        if config.quantization == "int8":
+            return models.ScalarQuantization(scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8, quantile=0.99, always_ram=True
+            ))
+        if config.quantization == "pq":
+            return models.ProductQuantization(product=models.ProductQuantizationConfig(
+                compression=models.CompressionRatio.X16, always_ram=True
+            ))
+        if config.quantization:
+            raise ValueError(f"Unknown quantization: {config.quantization}")
+        return None
+    
+    def _storage_config(self, db_type: DatabaseType) -> CollectionConfig:
+        """Get the config that decides how a database type's vectors are stored.
+        
+        统一集合中所有数据库类型共用存储：使用第一个开启量化的配置，都未开启时使用各自的配置
+        （统一集合按第一个数据库类型的配置创建）。
+        """
+        if not self.unified_collection:
+            return COLLECTIONS[db_type]
+        return next((config for config in COLLECTIONS.values() if config.quantization), COLLECTIONS[db_type])
+    
+    def _search_params(self, db_type: DatabaseType) -> Optional[models.SearchParams]:
+        """Get search-time params for a database type."""
+        return self._collection_search_params(self._storage_config(db_type))
+    
+    @staticmethod
+    def _collection_search_params(config: CollectionConfig) -> Optional[models.SearchParams]:
+        """Get search-time params: HNSW ``ef`` and quantized search with rescoring."""
+        if not config.quantization and config.search_ef is None:
+            return None
+        quantization = None
+        if config.quantization:
+            # 在量化向量上搜索，再用原始向量为放大后的候选重新打分
+            quantization = models.QuantizationSearchParams(rescore=True, oversampling=config.rescore_oversampling)
+        return models.SearchParams(hnsw_ef=config.search_ef, quantization=quantization)
+    
+    def _collection_name(self, db_type: DatabaseType) -> str:
+        """Get the Qdrant collection that stores a database type."""
+        return self.unified_collection or COLLECTIONS[db_type].collection_name
+    
+    def _db_type_filter(self, db_type: DatabaseType) -> Optional[models.Filter]:
+        """Get the payload filter for a database type (unified collection only)."""
+        if not self.unified_collection:
+            return None
+        return models.Filter(must=[
+            models.FieldCondition(
+                key=f"{QdrantVectorStore.METADATA_KEY}.{self.DB_TYPE_KEY}",
+                match=models.MatchValue(value=db_type)
+            )
+        ])
     
     def add_documents(self, db_type: DatabaseType, documents: List[Document]) -> None:
         """Add documents to a specific collection."""
         if db_type not in self.databases:
             raise ValueError(f"Database type {db_type} not found")
         
-        self.databases[db_type].add_documents(documents)
+        if self.unified_collection:
+            documents = [
+                Document(
+                    page_content=doc.page_content,
+                    metadata={**doc.metadata, self.DB_TYPE_KEY: db_type}
+                )
+                for doc in documents
+            ]
+        
+        ids = [document_id(db_type, doc) for doc in documents]
+        self.databases[db_type].add_documents(documents, ids=ids)
+        self._update_sparse_index(db_type, ids, documents)
+    
+    def add_embedded_documents(
+        self, 
+        db_type: DatabaseType, 
+        documents: List[Document], 
+        vectors: List[List[float]]
+    ) -> None:
+        """Add documents with precomputed embeddings to a specific collection."""
+        if db_type not in self.databases:
+            raise ValueError(f"Database type {db_type} not found")
+        
+        store = self.databases[db_type]
+        points = []
+        for doc, vector in zip(documents, vectors):
+            metadata = dict(doc.metadata)
+            if self.unified_collection:
+                metadata[self.DB_TYPE_KEY] = db_type
+            points.append(models.PointStruct(
+                id=document_id(db_type, doc),
+                vector={store.vector_name: vector},
+                payload={
+                    store.content_payload_key: doc.page_content,
+                    store.metadata_payload_key: metadata
+                }
+            ))
+        
+        self.client.upsert(collection_name=store.collection_name, points=points)
+        self._update_sparse_index(db_type, [point.id for point in points], documents)
+    
+    def get_document_ids(self, db_type: DatabaseType, source: str) -> Set[str]:
+        """Get IDs of all chunks stored for a source file."""
+        if db_type not in self.databases:
+            raise ValueError(f"Database type {db_type} not found")
+        
+        conditions = [
+            models.FieldCondition(
+                key=f"{QdrantVectorStore.METADATA_KEY}.source",
+                match=models.MatchValue(value=source)
+            )
+        ]
+        db_type_filter = self._db_type_filter(db_type)
+        if db_type_filter:
+            conditions.extend(db_type_filter.must)
+        
+        ids: Set[str] = set()
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.databases[db_type].collection_name,
+                scroll_filter=models.Filter(must=conditions),
+                limit=1000,
+                offset=offset,
+                with_payload=False,
+                with_vectors=False
+            )
+            ids.update(str(point.id) for point in points)
+            if offset is None:
+                return ids
+    
+    def delete_documents(self, db_type: DatabaseType, ids: Iterable[str]) -> None:
+        """Delete chunks by ID."""
+        if db_type not in self.databases:
+            raise ValueError(f"Database type {db_type} not found")
+        
+        ids = list(ids)
+        if ids:
+            self.client.delete(
+                collection_name=self.databases[db_type].collection_name,
+                points_selector=models.PointIdsList(points=ids)
+            )
+            if db_type in self.sparse_indexes:
+                self.sparse_indexes[db_type].remove(ids)
+    
+    def _update_sparse_index(self, db_type: DatabaseType, ids: List[str], documents: List[Document]) -> None:
+        """Add written chunks to the BM25 index (only once it has been built)."""
+        index = self.sparse_indexes.get(db_type)
+        if index is None:
+            # 索引尚未构建：之后首次使用时会从Qdrant完整构建，包含这些文档
+            return
+        collection_name = self._collection_name(db_type)
+        for doc_id, doc in zip(ids, documents):
+            index.add(str(doc_id), Document(
+                page_content=doc.page_content,
+                metadata={**doc.metadata, "_id": str(doc_id), "_collection_name": collection_name}
+            ))
+    
+    def _get_sparse_index(self, db_type: DatabaseType) -> BM25Index:
+        """Get a collection's BM25 index, building it from stored payloads on first use."""
+        if db_type in self.sparse_indexes:
+            return self.sparse_indexes[db_type]
+        
+        with self._sparse_lock:
+            if db_type not in self.sparse_indexes:
+                store = self.databases[db_type]
+                index = BM25Index()
+                offset = None
+                while True:
+                    points, offset = self.client.scroll(
+                        collection_name=store.collection_name,
+                        scroll_filter=self._db_type_filter(db_type),
+                        limit=1000,
+                        offset=offset,
+                        with_payload=True,
+                        with_vectors=False
+                    )
+                    for point in points:
+                        index.add(str(point.id), self._document_from_point(store, point))
+                    if offset is None:
+                        break
+                self.sparse_indexes[db_type] = index
+                print(f"✅ {db_type} BM25索引已构建 ({len(index)} 个文档块)")
+        return self.sparse_indexes[db_type]
+    
+    def sparse_search(self, db_type: DatabaseType, query: str, k: int = 10) -> List[tuple[Document, float]]:
+        """Keyword (BM25) search over a collection; empty unless hybrid search is enabled."""
+        if not settings.hybrid_search_enabled:
+            return []
+        if db_type not in self.databases:
+            raise ValueError(f"Database type {db_type} not found")
+        return self._get_sparse_index(db_type).search(query, k)
+    
+    def sample_vectors(self, db_type: DatabaseType, limit: int) -> List[List[float]]:
+        """Get up to ``limit`` stored vectors of a collection (used to build the routing index)."""
+        if db_type not in self.databases:
+            raise ValueError(f"Database type {db_type} not found")
+        
+        store = self.databases[db_type]
+        vectors: List[List[float]] = []
+        offset = None
+        while len(vectors) < limit:
+            points, offset = self.client.scroll(
+                collection_name=store.collection_name,
+                scroll_filter=self._db_type_filter(db_type),
+                limit=min(1000, limit - len(vectors)),
+                offset=offset,
+                with_payload=False,
+                with_vectors=True
+            )
+            for point in points:
+                vector = point.vector
+                if isinstance(vector, dict):
+                    vector = vector.get(store.vector_name)
+                if vector:
+                    vectors.append(list(vector))
+            if offset is None:
+                break
+        return vectors
     
     def similarity_search_with_score(
         self, 
@@ -96,25 +493,350 @@ class VectorStoreManager(BaseVectorStoreManager):
         if db_type not in self.databases:
             raise ValueError(f"Database type {db_type} not found")
         
-        return self.databases[db_type].similarity_search_with_score(query, k=k)
+        return self.databases[db_type].similarity_search_with_score(
+            query, k=k, filter=self._db_type_filter(db_type), search_params=self._search_params(db_type)
+        )
+    
+    def similarity_search_by_vector_with_score(
+        self, 
+        db_type: DatabaseType, 
+        embedding: List[float], 
+        k: int = 3,
+        offset: int = 0
+    ) -> List[tuple[Document, float]]:
+        """Search for similar documents with scores using a precomputed query embedding."""
+        if db_type not in self.databases:
+            raise ValueError(f"Database type {db_type} not found")
+        
+        store = self.databases[db_type]
+        points = self.client.query_points(
+            collection_name=store.collection_name,
+            query=embedding,
+            using=store.vector_name,
+            query_filter=self._db_type_filter(db_type),
+            search_params=self._search_params(db_type),
+            limit=k,
+            offset=offset or None,
+            with_payload=True,
+            with_vectors=False,
+            timeout=self._search_request_timeout()
+        ).points
+        
+        return [(self._document_from_point(store, point), point.score) for point in points]
+    
+    @staticmethod
+    def _document_from_point(store: QdrantVectorStore, point) -> Document:
+        """Convert a Qdrant point into a LangChain document."""
+        payload = point.payload or {}
+        metadata = dict(payload.get(store.metadata_payload_key) or {})
+        metadata["_id"] = point.id
+        metadata["_collection_name"] = store.collection_name
+        return Document(
+            page_content=payload.get(store.content_payload_key, ""),
+            metadata=metadata
+        )
+    
+    def search_batch_by_vectors(
+        self, 
+        db_type: DatabaseType, 
+        embeddings: List[List[float]], 
+        k: int = 3
+    ) -> List[List[tuple[Document, float]]]:
+        """Search one collection for many query embeddings with batched requests."""
+        if db_type not in self.databases:
+            raise ValueError(f"Database type {db_type} not found")
+        
+        store = self.databases[db_type]
+        results: List[List[tuple[Document, float]]] = []
+        for start in range(0, len(embeddings), settings.batch_search_size):
+            responses = self.client.query_batch_points(
+                collection_name=store.collection_name,
+                requests=[
+                    models.QueryRequest(
+                        query=embedding,
+                        using=store.vector_name or None,
+                        filter=self._db_type_filter(db_type),
+                        params=self._search_params(db_type),
+                        limit=k,
+                        with_payload=True,
+                        with_vector=False
+                    )
+                    for embedding in embeddings[start:start + settings.batch_search_size]
+                ],
+                timeout=self._search_request_timeout()
+            )
+            results.extend(
+                [(self._document_from_point(store, point), point.score) for point in response.points]
+                for response in responses
+            )
+        return results
+    
+    def search_all_databases_by_vectors(
+        self, 
+        embeddings: List[List[float]], 
+        k: int = 3
+    ) -> List[Dict[DatabaseType, List[tuple[Document, float]]]]:
+        """Search every collection for many query embeddings, collections searched concurrently.
+        
+        与单个问题的搜索相同：每个批量请求最多``search_timeout``，
+        超时或出错的集合返回空列表，有请求超时后换用新的线程池。
+        """
+        futures = {
+            db_type: self._search_executor.submit(self.search_batch_by_vectors, db_type, embeddings, k)
+            for db_type in self.databases
+        }
+        # 每个集合按顺序发送ceil(问题数 / batch_search_size)个批量请求
+        num_requests = max(1, math.ceil(len(embeddings) / settings.batch_search_size))
+        done, _ = wait(futures.values(), timeout=settings.search_timeout * num_requests)
+        
+        per_collection = {}
+        for db_type, future in futures.items():
+            if future not in done:
+                future.cancel()
+                print(f"⚠️ 批量搜索 {db_type} 超时 ({settings.search_timeout}s/请求)，返回空结果")
+                per_collection[db_type] = [[] for _ in embeddings]
+                continue
+            try:
+                per_collection[db_type] = future.result()
+            except Exception as e:
+                print(f"Error searching {db_type}: {e}")
+                per_collection[db_type] = [[] for _ in embeddings]
+        if len(done) < len(futures):
+            self._recycle_search_executor()
+        return [
+            {db_type: results[i] for db_type, results in per_collection.items()}
+            for i in range(len(embeddings))
+        ]
+    
+    def _create_async_client(self) -> AsyncQdrantClient:
+        """Create an async client from settings."""
+        return AsyncQdrantClient(
+            url=settings.qdrant_url,
+            api_key=settings.qdrant_api_key,
+            timeout=settings.qdrant_timeout,
+            prefer_grpc=settings.qdrant_prefer_grpc,
+            grpc_port=settings.qdrant_grpc_port
+        )
+    
+    async def _get_async_client(self) -> Optional[AsyncQdrantClient]:
+        """Get the async client for the running event loop (None when only a sync client was injected)."""
+        if self._async_clients is None:
+            return self._async_client
+        # httpx连接池绑定在创建它的事件循环上
+        return await self._async_clients.get()
+    
+    async def aclose(self) -> None:
+        """Close the running event loop's async client (also closed automatically when the loop ends)."""
+        if self._async_clients is not None:
+            await self._async_clients.aclose()
+    
+    async def asimilarity_search_by_vector_with_score(
+        self, 
+        db_type: DatabaseType, 
+        embedding: List[float], 
+        k: int = 3,
+        offset: int = 0
+    ) -> List[tuple[Document, float]]:
+        """Async version of ``similarity_search_by_vector_with_score``."""
+        async_client = await self._get_async_client()
+        if async_client is None:
+            return await super().asimilarity_search_by_vector_with_score(db_type, embedding, k, offset)
+        if db_type not in self.databases:
+            raise ValueError(f"Database type {db_type} not found")
+        
+        store = self.databases[db_type]
+        response = await async_client.query_points(
+            collection_name=store.collection_name,
+            query=embedding,
+            using=store.vector_name,
+            query_filter=self._db_type_filter(db_type),
+            search_params=self._search_params(db_type),
+            limit=k,
+            offset=offset or None,
+            with_payload=True,
+            with_vectors=False,
+            timeout=self._search_request_timeout()
+        )
+        return [(self._document_from_point(store, point), point.score) for point in response.points]
+    
+    async def asearch_all_databases_by_vector(
+        self, 
+        embedding: List[float], 
+        k: int = 3
+    ) -> Dict[DatabaseType, List[tuple[Document, float]]]:
+        """Async version of ``search_all_databases_by_vector``.
+        
+        超时或出错的集合返回空列表，其余集合的结果照常返回。
+        """
+        async_client = await self._get_async_client()
+        if async_client is None:
+            return await super().asearch_all_databases_by_vector(embedding, k)
+        if self.unified_collection:
+            return await self._abatch_search_unified(async_client, embedding, k)
+        
+        async def search(db_type: DatabaseType) -> List[tuple[Document, float]]:
+            try:
+                return await asyncio.wait_for(
+                    self.asimilarity_search_by_vector_with_score(db_type, embedding, k),
+                    timeout=settings.search_timeout
+                )
+            except asyncio.TimeoutError:
+                print(f"⚠️ 搜索 {db_type} 超时 ({settings.search_timeout}s)，返回部分结果")
+            except Exception as e:
+                print(f"Error searching {db_type}: {e}")
+            return []
+        
+        db_types = list(self.databases)
+        results = await asyncio.gather(*(search(db_type) for db_type in db_types))
+        return dict(zip(db_types, results))
     
     def get_retriever(self, db_type: DatabaseType, k: int = 4):
         """Get retriever for a specific database."""
         if db_type not in self.databases:
             raise ValueError(f"Database type {db_type} not found")
         
+        search_kwargs = {"k": k}
+        if self.unified_collection:
+            search_kwargs["filter"] = self._db_type_filter(db_type)
+        search_params = self._search_params(db_type)
+        if search_params:
+            search_kwargs["search_params"] = search_params
+        
         return self.databases[db_type].as_retriever(
             search_type="similarity",
-            search_kwargs={"k": k}
+            search_kwargs=search_kwargs
         )
     
     def search_all_databases(self, query: str, k: int = 3) -> Dict[DatabaseType, List[tuple[Document, float]]]:
         """Search all databases and return results with scores."""
+        # 只计算一次查询向量，然后在所有集合中复用
+        return self.search_all_databases_by_vector(self.embeddings.embed_query(query), k)
+    
+    def search_all_databases_by_vector(
+        self, 
+        embedding: List[float], 
+        k: int = 3
+    ) -> Dict[DatabaseType, List[tuple[Document, float]]]:
+        """Search all databases concurrently with a precomputed query embedding.
+        
+        超时或出错的集合返回空列表，其余集合的结果照常返回。
+        超时的请求无法中断，会继续占用线程直到Qdrant请求超时；
+        此时换用新的线程池，避免卡住的线程拖慢后续搜索。
+        """
+        if self.unified_collection:
+            return self._batch_search_unified(embedding, k)
+        
+        futures = {
+            db_type: self._search_executor.submit(
+                self.similarity_search_by_vector_with_score, db_type, embedding, k
+            )
+            for db_type in self.databases
+        }
+        done, _ = wait(futures.values(), timeout=settings.search_timeout)
+        
         results = {}
-        for db_type in self.databases:
+        for db_type, future in futures.items():
+            if future not in done:
+                future.cancel()
+                print(f"⚠️ 搜索 {db_type} 超时 ({settings.search_timeout}s)，返回部分结果")
+                results[db_type] = []
+                continue
             try:
-                results[db_type] = self.similarity_search_with_score(db_type, query, k)
+                results[db_type] = future.result()
             except Exception as e:
                 print(f"Error searching {db_type}: {e}")
                 results[db_type] = []
-        return results 
\ No newline at end of file
+        if len(done) < len(futures):
+            self._recycle_search_executor()
+        return results
+    
+    def _create_search_executor(self) -> ThreadPoolExecutor:
+        """Create the thread pool used for concurrent collection searches."""
+        return ThreadPoolExecutor(
+            max_workers=settings.search_max_workers or len(COLLECTIONS),
+            thread_name_prefix="qdrant-search"
+        )
+    
+    def _recycle_search_executor(self) -> None:
+        """Replace the search pool; the old one finishes its running searches in the background."""
+        with self._search_executor_lock:
+            stale, self._search_executor = self._search_executor, self._create_search_executor()
+        # 不取消排队中的任务：它们可能属于其他线程中同时进行的搜索
+        stale.shutdown(wait=False)
+    
+    @staticmethod
+    def _search_request_timeout() -> int:
+        """Per-request Qdrant timeout (whole seconds) derived from ``search_timeout``."""
+        return max(1, math.ceil(settings.search_timeout))
+    
+    def _batch_search_unified(
+        self, 
+        embedding: List[float], 
+        k: int
+    ) -> Dict[DatabaseType, List[tuple[Document, float]]]:
+        """Search every database type with one batched request against the unified collection."""
+        db_types = list(self.databases)
+        try:
+            responses = self.client.query_batch_points(
+                collection_name=self.databases[db_types[0]].collection_name,
+                requests=self._unified_requests(db_types, embedding, k),
+                timeout=self._search_request_timeout()
+            )
+        except Exception as e:
+            print(f"Error searching unified collection {self.unified_collection}: {e}")
+            return {db_type: [] for db_type in db_types}
+        
+        return self._unified_results(db_types, responses)
+    
+    async def _abatch_search_unified(
+        self, 
+        async_client: AsyncQdrantClient,
+        embedding: List[float], 
+        k: int
+    ) -> Dict[DatabaseType, List[tuple[Document, float]]]:
+        """Async version of ``_batch_search_unified``."""
+        db_types = list(self.databases)
+        try:
+            responses = await async_client.query_batch_points(
+                collection_name=self.databases[db_types[0]].collection_name,
+                requests=self._unified_requests(db_types, embedding, k),
+                timeout=self._search_request_timeout()
+            )
+        except Exception as e:
+            print(f"Error searching unified collection {self.unified_collection}: {e}")
+            return {db_type: [] for db_type in db_types}
+        
+        return self._unified_results(db_types, responses)
+    
+    def _unified_requests(
+        self, 
+        db_types: List[DatabaseType], 
+        embedding: List[float], 
+        k: int
+    ) -> List[models.QueryRequest]:
+        """Build one filtered query per database type against the unified collection."""
+        return [
+            models.QueryRequest(
+                query=embedding,
+                filter=self._db_type_filter(db_type),
+                params=self._search_params(db_type),
+                limit=k,
+                with_payload=True,
+                with_vector=False
+            )
+            for db_type in db_types
+        ]
+    
+    def _unified_results(
+        self, 
+        db_types: List[DatabaseType], 
+        responses: List[models.QueryResponse]
+    ) -> Dict[DatabaseType, List[tuple[Document, float]]]:
+        """Convert batched unified-collection responses into per-database results."""
+        return {
+            db_type: [
+                (self._document_from_point(self.databases[db_type], point), point.score)
+                for point in response.points
+            ]
+            for db_type, response in zip(db_types, responses)
+        }
@@ -1,20 +1,36 @@
 """Web search tool for fallback scenarios."""
 
+import asyncio
+import threading
 from typing import Any, Dict
 from langchain_core.tools import BaseTool
-from langchain_community.tools import DuckDuckGoSearchRun
 from pydantic import Field
 
 
 class WebSearchTool:
-    """Web search tool using DuckDuckGo."""
+    """Web search tool using DuckDuckGo.
+    
+    搜索引擎（``langchain_community``）在第一次搜索时才创建。
+    """
     
     def __init__(self, **kwargs):
-        try:
-            self.search_engine = DuckDuckGoSearchRun()
-        except Exception as e:
-            print(f"⚠️  网络搜索初始化失败: {e}")
-            self.search_engine = None
+        self._search_engine = None
+        self._initialized = False
+        self._init_lock = threading.Lock()
+    
+    @property
+    def search_engine(self):
+        """DuckDuckGo search runner (None when it failed to initialize)."""
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    try:
+                        from langchain_community.tools import DuckDuckGoSearchRun
+                        self._search_engine = DuckDuckGoSearchRun()
+                    except Exception as e:
+                        print(f"⚠️  网络搜索初始化失败: {e}")
+                    self._initialized = True
+        return self._search_engine
     
     def _run(self, query: str) -> str:
         """Execute web search."""
@@ -28,5 +44,5 @@ class WebSearchTool:
             return f"网络搜索失败：{str(e)}。基于一般知识提供答案。"
     
     async def _arun(self, query: str) -> str:
-        """Async version of web search."""
-        return self._run(query) 
\ No newline at end of file
+        """Async version of web search (DuckDuckGo is blocking, so it runs in a worker thread)."""
+        return await asyncio.to_thread(self._run, query) 
\ No newline at end of file
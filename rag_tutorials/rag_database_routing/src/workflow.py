@@ -1,14 +1,25 @@
 """LangGraph workflow for RAG database routing system."""
 
-from typing import Dict, Any, Optional, List
+import asyncio
+import hashlib
+import json
+from dataclasses import asdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Iterator, Optional, List, Tuple
 from typing_extensions import TypedDict
 from langgraph.graph import StateGraph, END
 from langgraph.graph.state import CompiledStateGraph
 from langchain_core.documents import Document
+from langchain_core.runnables import RunnableLambda
 
 from .agents import RoutingAgent, QAAgent
-from .tools import VectorStoreManager, DocumentProcessor
-from .data import DatabaseType
+from .tools import LocalVectorStoreManager, DocumentProcessor, QueryContext, IngestionPipeline
+from .tools.base_vector_store import BaseVectorStoreManager
+from .tools.routing_index import RoutingIndex
+from .tools.routing_classifier import RoutingClassifier
+from .models.config import Settings, settings
+from .models.query_embeddings import embed_queries
+from .data import DatabaseType, COLLECTIONS
 
 
 class RAGState(TypedDict):
@@ -18,19 +29,40 @@ class RAGState(TypedDict):
     answer: str
     documents: List[Document]
     routing_info: Dict[str, Any]
+    routing_hits: Dict[DatabaseType, List[Tuple[Document, float]]]
+    query_context: Optional[QueryContext]
     error: Optional[str]
 
 
 class RAGWorkflow:
     """LangGraph workflow for RAG database routing."""
     
-    def __init__(self):
-        """Initialize the workflow."""
+    def __init__(
+        self, 
+        vector_store_manager: Optional[BaseVectorStoreManager] = None,
+        routing_index: Optional[RoutingIndex] = None,
+        routing_classifier: Optional[RoutingClassifier] = None
+    ):
+        """Initialize the workflow.
+        
+        未传入``routing_index``/``routing_classifier``且对应的设置开启时，
+        从磁盘加载，并为还没有数据的集合采样已有向量进行初始化。
+        """
         try:
-            self.vector_store_manager = VectorStoreManager()
-            print("✅ 成功连接到Qdrant向量数据库")
+            self.vector_store_manager = vector_store_manager or self._create_vector_store_manager()
+            
+            self._sampled_vectors: Dict[DatabaseType, List[List[float]]] = {}
+            self.routing_index = routing_index
+            if self.routing_index is None and settings.routing_index_enabled:
+                self.routing_index = self._load_routing_index()
+            self.routing_classifier = routing_classifier
+            if self.routing_classifier is None and settings.routing_classifier_enabled:
+                self.routing_classifier = self._load_routing_classifier()
+            self._sampled_vectors.clear()
             
-            self.routing_agent = RoutingAgent(self.vector_store_manager)
+            self.routing_agent = RoutingAgent(
+                self.vector_store_manager, self.routing_index, self.routing_classifier
+            )
             self.qa_agent = QAAgent(self.vector_store_manager)
             self.doc_processor = DocumentProcessor()
             
@@ -45,15 +77,115 @@ class RAGWorkflow:
             print(f"[DEBUG] Full traceback: {traceback.format_exc()}")
             raise RuntimeError(error_msg)
     
+    @staticmethod
+    def config_fingerprint(current_settings: Optional[Settings] = None) -> str:
+        """Hash of the settings and collection configs a workflow is built from.
+        
+        用作共享工作流（例如Streamlit的``st.cache_resource``）的缓存键：配置不变时复用，变化时重建。
+        传入新建的``Settings()``时按当前的环境变量和.env计算（全局``settings``只在导入时读取一次）。
+        """
+        config = {
+            "settings": (current_settings or settings).model_dump(mode="json"),
+            "collections": {db_type: asdict(config) for db_type, config in COLLECTIONS.items()}
+        }
+        payload = json.dumps(config, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    @staticmethod
+    def _create_vector_store_manager() -> BaseVectorStoreManager:
+        """Create the vector store backend selected by ``settings.vector_store_backend``."""
+        if settings.vector_store_backend == "local":
+            manager = LocalVectorStoreManager()
+            print(f"✅ 使用本地向量存储: {manager.path}")
+            return manager
+        if settings.vector_store_backend != "qdrant":
+            raise ValueError(f"Unknown vector store backend: {settings.vector_store_backend}")
+        # langchain_qdrant/qdrant_client只在使用Qdrant后端时导入
+        from .tools.vector_store import VectorStoreManager
+        manager = VectorStoreManager()
+        print("✅ 成功连接到Qdrant向量数据库")
+        return manager
+    
+    def _load_routing_index(self) -> RoutingIndex:
+        """Load the routing index and bootstrap collections that have no prototypes yet."""
+        routing_index = RoutingIndex.load(
+            settings.routing_index_path, 
+            settings.routing_index_prototypes, 
+            dimension=settings.matryoshka_dimension or None
+        )
+        
+        bootstrapped = False
+        for db_type in COLLECTIONS:
+            if routing_index.has_collection(db_type):
+                continue
+            vectors = self._sample_vectors(db_type)
+            if vectors:
+                routing_index.fit(db_type, vectors)
+                bootstrapped = True
+        
+        if bootstrapped:
+            self._save_routing_index(routing_index)
+        print(f"✅ 路由索引已加载 ({'可用' if routing_index.is_ready() else '为空，使用向量搜索路由'})")
+        return routing_index
+    
+    def _load_routing_classifier(self) -> RoutingClassifier:
+        """Load the routing classifier and train it from stored vectors if needed."""
+        classifier = RoutingClassifier.load(
+            settings.routing_classifier_path, 
+            settings.routing_classifier_max_examples, 
+            dimension=settings.matryoshka_dimension or None
+        )
+        
+        for db_type in COLLECTIONS:
+            if not classifier.has_collection(db_type):
+                classifier.add_examples(db_type, self._sample_vectors(db_type))
+        
+        if classifier.pending_examples and classifier.train():
+            self._save_routing_classifier(classifier)
+        print(f"✅ 路由分类器已加载 ({'已训练' if classifier.is_trained() else '样本不足，未训练'})")
+        return classifier
+    
+    def _sample_vectors(self, db_type: DatabaseType) -> List[List[float]]:
+        """Sample stored vectors of a collection once for bootstrapping routing models."""
+        if db_type not in self._sampled_vectors:
+            limit = max(settings.routing_index_sample_size, settings.routing_classifier_max_examples)
+            try:
+                self._sampled_vectors[db_type] = self.vector_store_manager.sample_vectors(db_type, limit)
+            except Exception as e:
+                print(f"⚠️ 采样 {db_type} 向量失败: {e}")
+                self._sampled_vectors[db_type] = []
+        return self._sampled_vectors[db_type]
+    
+    @staticmethod
+    def _save_routing_classifier(classifier: RoutingClassifier) -> None:
+        """Persist the routing classifier (failures only disable persistence)."""
+        try:
+            classifier.save()
+        except Exception as e:
+            print(f"⚠️ 保存路由分类器失败: {e}")
+    
+    @staticmethod
+    def _save_routing_index(routing_index: RoutingIndex) -> None:
+        """Persist the routing index (failures only disable persistence)."""
+        try:
+            routing_index.save(settings.routing_index_path)
+        except Exception as e:
+            print(f"⚠️ 保存路由索引失败: {e}")
+    
     def _build_workflow(self) -> CompiledStateGraph:
         """Build the LangGraph workflow."""
         
         workflow = StateGraph(RAGState)
         
-        # Add nodes
-        workflow.add_node("route_query", self._route_query_node)
-        workflow.add_node("answer_question", self._answer_question_node)
-        workflow.add_node("handle_error", self._handle_error_node)
+        # Add nodes（同步和异步实现共用同一张图：invoke走同步，ainvoke走异步）
+        workflow.add_node("route_query", RunnableLambda(self._route_query_node, afunc=self._aroute_query_node))
+        workflow.add_node("retrieve_documents", RunnableLambda(
+            self._retrieve_documents_node, afunc=self._aretrieve_documents_node
+        ))
+        workflow.add_node("generate_answer", RunnableLambda(
+            self._generate_answer_node, afunc=self._agenerate_answer_node
+        ))
+        workflow.add_node("handle_error", RunnableLambda(self._handle_error_node, afunc=self._ahandle_error_node))
         
         # Add edges
         workflow.set_entry_point("route_query")
@@ -63,13 +195,16 @@ class RAGWorkflow:
             "route_query",
             self._should_continue_to_qa,
             {
-                "answer": "answer_question",
+                "answer": "retrieve_documents",
                 "error": "handle_error"
             }
         )
         
+        # 检索和生成分成两个节点，流式输出时文档可以先于答案返回
+        workflow.add_edge("retrieve_documents", "generate_answer")
+        
         # End after answering or handling error
-        workflow.add_edge("answer_question", END)
+        workflow.add_edge("generate_answer", END)
         workflow.add_edge("handle_error", END)
         
         return workflow.compile()
@@ -79,14 +214,16 @@ class RAGWorkflow:
         try:
             question = state["question"]
             
-            # Get routing information
-            routing_info = self.routing_agent.get_routing_info(question)
-            routed_database = self.routing_agent.route_query(question)
+            # Get routing information (includes the routing decision)
+            routing_info = self.routing_agent.get_routing_info(question, state["query_context"])
+            routed_database = routing_info["chosen_database"]
             
             return {
                 **state,
                 "routed_database": routed_database,
                 "routing_info": routing_info,
+                # 路由搜索的结果留给问答节点复用
+                "routing_hits": state["query_context"].routing_hits,
                 "error": None
             }
             
@@ -98,15 +235,106 @@ class RAGWorkflow:
                 "routing_info": {}
             }
     
-    def _answer_question_node(self, state: RAGState) -> RAGState:
-        """Node for answering the question."""
+    async def _aroute_query_node(self, state: RAGState) -> RAGState:
+        """Async version of ``_route_query_node``."""
         try:
-            question = state["question"]
-            routed_database = state["routed_database"]
+            routing_info = await self.routing_agent.aget_routing_info(state["question"], state["query_context"])
+            
+            return {
+                **state,
+                "routed_database": routing_info["chosen_database"],
+                "routing_info": routing_info,
+                "routing_hits": state["query_context"].routing_hits,
+                "error": None
+            }
             
-            # Get answer and documents
-            answer, documents = self.qa_agent.answer_question(question, routed_database)
+        except Exception as e:
+            return {
+                **state,
+                "error": f"Routing error: {str(e)}",
+                "routed_database": None,
+                "routing_info": {}
+            }
+    
+    def _retrieve_documents_node(self, state: RAGState) -> RAGState:
+        """Node for retrieving documents from the routed database."""
+        routed_database = state["routed_database"]
+        if not routed_database:
+            return {**state, "documents": []}
+        
+        try:
+            documents = self.qa_agent.retrieve_documents(
+                state["question"], 
+                routed_database, 
+                state["query_context"], 
+                state["routing_hits"].get(routed_database)
+            )
+        except Exception as e:
+            print(f"数据库查询出错: {str(e)}. 尝试网络搜索...")
+            documents = []
+        
+        return {**state, "documents": documents}
+    
+    async def _aretrieve_documents_node(self, state: RAGState) -> RAGState:
+        """Async version of ``_retrieve_documents_node``."""
+        routed_database = state["routed_database"]
+        if not routed_database:
+            return {**state, "documents": []}
+        
+        try:
+            documents = await self.qa_agent.aretrieve_documents(
+                state["question"], 
+                routed_database, 
+                state["query_context"], 
+                state["routing_hits"].get(routed_database)
+            )
+        except Exception as e:
+            print(f"数据库查询出错: {str(e)}. 尝试网络搜索...")
+            documents = []
+        
+        return {**state, "documents": documents}
+    
+    def _generate_answer_node(self, state: RAGState) -> RAGState:
+        """Node for generating the answer (web search when no documents were found)."""
+        question = state["question"]
+        try:
+            if state["documents"]:
+                try:
+                    answer = self.qa_agent.generate_answer(question, state["routed_database"], state["documents"])
+                    return {**state, "answer": answer, "error": None}
+                except Exception as e:
+                    print(f"数据库查询出错: {str(e)}. 尝试网络搜索...")
+            
+            answer, documents = self.qa_agent._answer_from_web_search(question)
+            return {
+                **state,
+                "answer": answer,
+                "documents": documents,
+                "error": None
+            }
+            
+        except Exception as e:
+            return {
+                **state,
+                "answer": f"Sorry, I encountered an error while answering: {str(e)}",
+                "documents": [],
+                "error": f"QA error: {str(e)}"
+            }
+    
+    async def _agenerate_answer_node(self, state: RAGState) -> RAGState:
+        """Async version of ``_generate_answer_node``."""
+        question = state["question"]
+        try:
+            if state["documents"]:
+                try:
+                    answer = await self.qa_agent.agenerate_answer(
+                        question, state["routed_database"], state["documents"]
+                    )
+                    return {**state, "answer": answer, "error": None}
+                except Exception as e:
+                    print(f"数据库查询出错: {str(e)}. 尝试网络搜索...")
             
+            answer, documents = await self.qa_agent._aanswer_from_web_search(question)
             return {
                 **state,
                 "answer": answer,
@@ -143,87 +371,266 @@ class RAGWorkflow:
                 "documents": []
             }
     
+    async def _ahandle_error_node(self, state: RAGState) -> RAGState:
+        """Async version of ``_handle_error_node``."""
+        try:
+            answer, documents = await self.qa_agent._aanswer_from_web_search(state["question"])
+            return {
+                **state,
+                "answer": answer,
+                "documents": documents
+            }
+            
+        except Exception as e:
+            return {
+                **state,
+                "answer": f"Sorry, all fallback methods failed. Error: {str(e)}",
+                "documents": []
+            }
+    
     def _should_continue_to_qa(self, state: RAGState) -> str:
         """Decide whether to continue to QA or handle error."""
         if state.get("error"):
             return "error"
         return "answer"
     
-    def process_question(self, question: str) -> Dict[str, Any]:
-        """Process a question through the workflow."""
-        initial_state = RAGState(
+    def _initial_state(self, question: str) -> RAGState:
+        """Create the initial workflow state for a question."""
+        return RAGState(
             question=question,
             routed_database=None,
             answer="",
             documents=[],
             routing_info={},
+            routing_hits={},
+            query_context=QueryContext(question, self.vector_store_manager.embeddings),
             error=None
         )
+    
+    @staticmethod
+    def _result_from_state(state: RAGState) -> Dict[str, Any]:
+        """Convert a final workflow state into a result dict."""
+        return {
+            "question": state["question"],
+            "answer": state["answer"],
+            "routed_database": state["routed_database"],
+            "num_documents": len(state["documents"]),
+            "documents": state["documents"],
+            "routing_info": state["routing_info"],
+            "embedding_calls": state["query_context"].embedding_calls,
+            "success": not state.get("error"),
+            "error": state.get("error")
+        }
+    
+    @staticmethod
+    def _failed_result(state: RAGState, error: Exception) -> Dict[str, Any]:
+        """Build the result dict for a failed workflow run."""
+        return {
+            "question": state["question"],
+            "answer": f"Workflow execution failed: {str(error)}",
+            "routed_database": None,
+            "num_documents": 0,
+            "documents": [],
+            "routing_info": {},
+            "embedding_calls": state["query_context"].embedding_calls,
+            "success": False,
+            "error": str(error)
+        }
+    
+    def process_question(self, question: str) -> Dict[str, Any]:
+        """Process a question through the workflow."""
+        initial_state = self._initial_state(question)
         
         try:
             # Run the workflow
-            result = self.workflow.invoke(initial_state)
+            return self._result_from_state(self.workflow.invoke(initial_state))
+        except Exception as e:
+            return self._failed_result(initial_state, e)
+    
+    def process_questions(
+        self, 
+        questions: List[str], 
+        max_concurrency: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Process many questions, returning results in input order.
+        
+        批量流程（不经过逐题的LangGraph图，但复用相同的节点逻辑）：
+        1. 按``batch_embed_size``分批计算所有问题的向量（与逐题的``embed_query``结果相同）
+        2. 所有问题的路由得分作为一个矩阵一次完成（置信度不足的问题在第4步回退到分类器/LLM）
+        3. 需要补充检索的问题按集合分组，每个集合一次批量查询
+        4. 以最多``max_concurrency``个并发生成答案，单个问题出错只影响该问题的结果
+        """
+        if not questions:
+            return []
+        states = [self._initial_state(question) for question in questions]
+        
+        try:
+            embeddings = self.vector_store_manager.embeddings
+            vectors: List[List[float]] = []
+            for start in range(0, len(questions), settings.batch_embed_size):
+                vectors.extend(embed_queries(embeddings, questions[start:start + settings.batch_embed_size]))
+            for state, vector in zip(states, vectors):
+                state["query_context"] = QueryContext(state["question"], embeddings, embedding=vector)
             
-            return {
-                "question": result["question"],
-                "answer": result["answer"],
-                "routed_database": result["routed_database"],
-                "num_documents": len(result["documents"]),
-                "documents": result["documents"],
-                "routing_info": result["routing_info"],
-                "success": not result.get("error"),
-                "error": result.get("error")
-            }
+            contexts = [state["query_context"] for state in states]
+            for state, routing_info in zip(states, self.routing_agent.get_routing_info_batch(contexts)):
+                state["routed_database"] = routing_info["chosen_database"]
+                state["routing_info"] = routing_info
+                state["routing_hits"] = state["query_context"].routing_hits
             
+            self._retrieve_batch(states)
         except Exception as e:
-            return {
-                "question": question,
-                "answer": f"Workflow execution failed: {str(e)}",
-                "routed_database": None,
-                "num_documents": 0,
-                "documents": [],
-                "routing_info": {},
-                "success": False,
-                "error": str(e)
-            }
+            return [self._failed_result(state, e) for state in states]
+        
+        with ThreadPoolExecutor(max_workers=max_concurrency or settings.batch_max_concurrency) as executor:
+            return list(executor.map(self._answer_batch_item, states))
     
-    def add_documents(self, db_type: DatabaseType, uploaded_files: List[Any]) -> Dict[str, Any]:
-        """Add documents to a specific database."""
+    def _retrieve_batch(self, states: List[RAGState]) -> None:
+        """Fetch documents for routed questions without enough routing hits, one batch per collection."""
+        top_k = self.qa_agent.top_k
+        groups: Dict[DatabaseType, List[RAGState]] = {}
+        for state in states:
+            db_type = state["routed_database"]
+            hits = state["routing_hits"].get(db_type) or []
+            # 路由搜索结果少于请求数量说明集合中没有更多文档
+            exhausted = bool(hits) and len(hits) < state["query_context"].routing_hits_k
+            if db_type and len(hits) < top_k and not exhausted:
+                groups.setdefault(db_type, []).append(state)
+        
+        for db_type, group in groups.items():
+            try:
+                results = self.vector_store_manager.search_batch_by_vectors(
+                    db_type, [state["query_context"].embedding for state in group], k=top_k
+                )
+            except Exception as e:
+                # 批量检索失败时由各问题单独检索
+                print(f"批量检索 {db_type} 出错: {e}")
+                continue
+            for state, hits in zip(group, results):
+                state["query_context"].record_routing_hits({db_type: hits}, top_k)
+                state["routing_hits"] = state["query_context"].routing_hits
+    
+    def _answer_batch_item(self, state: RAGState) -> Dict[str, Any]:
+        """Finish routing (if undecided), retrieve and answer one question of a batch."""
         try:
-            all_documents = []
-            processed_files = []
+            routing_info = state["routing_info"]
+            if routing_info["routing_method"] is None:
+                chosen_db, method, confidence = self.routing_agent._fallback_routing(
+                    state["question"], state["query_context"]
+                )
+                routing_info = {**routing_info, "chosen_database": chosen_db, "routing_method": method}
+                if confidence is not None:
+                    routing_info["classifier_confidence"] = confidence
+                state = {**state, "routed_database": chosen_db, "routing_info": routing_info}
             
-            for uploaded_file in uploaded_files:
-                try:
-                    documents = self.doc_processor.process_uploaded_file(uploaded_file)
-                    all_documents.extend(documents)
-                    processed_files.append(uploaded_file.name)
-                except Exception as e:
-                    return {
-                        "success": False,
-                        "error": f"Error processing file {uploaded_file.name}: {str(e)}",
-                        "processed_files": processed_files
-                    }
-            
-            if all_documents:
-                self.vector_store_manager.add_documents(db_type, all_documents)
+            state = self._retrieve_documents_node(state)
+            state = self._generate_answer_node(state)
+            return self._result_from_state(state)
+        except Exception as e:
+            return self._failed_result(state, e)
+    
+    async def aprocess_question(self, question: str) -> Dict[str, Any]:
+        """Async version of ``process_question``.
+        
+        embedding、Qdrant搜索、LLM调用和网络搜索都以异步方式执行，
+        一个事件循环即可并发处理大量问题。
+        """
+        initial_state = self._initial_state(question)
+        
+        try:
+            return self._result_from_state(await self.workflow.ainvoke(initial_state))
+        except Exception as e:
+            return self._failed_result(initial_state, e)
+    
+    def stream_question(self, question: str) -> Iterator[Dict[str, Any]]:
+        """Process a question, yielding events as the workflow makes progress.
+        
+        依次产生：
+        - ``{"type": "routing", "routed_database", "routing_info"}``
+        - ``{"type": "documents", "documents"}``
+        - ``{"type": "token", "content"}``：LLM生成的答案片段（网络搜索回退时为整段答案）
+        - ``{"type": "done", "result"}``：与``process_question``相同的结果
+        """
+        state = self._initial_state(question)
+        streamed_tokens = False
+        
+        try:
+            for mode, payload in self.workflow.stream(state, stream_mode=["updates", "messages"]):
+                if mode == "messages":
+                    chunk, metadata = payload
+                    # 只转发问答链生成的答案，路由和回退阶段的LLM调用不输出
+                    if QAAgent.ANSWER_TAG in (metadata.get("tags") or []):
+                        content = chunk.content if isinstance(chunk.content, str) else str(chunk.content)
+                        if content:
+                            streamed_tokens = True
+                            yield {"type": "token", "content": content}
+                    continue
                 
-                return {
-                    "success": True,
-                    "message": f"Successfully processed {len(processed_files)} files and added {len(all_documents)} document chunks to {db_type} database.",
-                    "processed_files": processed_files,
-                    "num_chunks": len(all_documents)
-                }
-            else:
-                return {
-                    "success": False,
-                    "error": "No documents were extracted from the uploaded files.",
-                    "processed_files": []
-                }
+                for node, update in payload.items():
+                    state = {**state, **(update or {})}
+                    if node == "route_query":
+                        yield {
+                            "type": "routing",
+                            "routed_database": state["routed_database"],
+                            "routing_info": state["routing_info"]
+                        }
+                    elif node == "retrieve_documents":
+                        yield {"type": "documents", "documents": state["documents"]}
+                    elif node in ("generate_answer", "handle_error") and not streamed_tokens:
+                        # 网络搜索等非流式回答整段输出
+                        if node == "handle_error":
+                            yield {"type": "documents", "documents": state["documents"]}
+                        yield {"type": "token", "content": state["answer"]}
+            
+            yield {"type": "done", "result": self._result_from_state(state)}
+            
+        except Exception as e:
+            yield {"type": "done", "result": self._failed_result(state, e)}
+    
+    def add_documents(
+        self, 
+        db_type: DatabaseType, 
+        uploaded_files: List[Any],
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """Add documents to a specific database.
+        
+        文件经过 解析 → 分块 → 向量化 → 写入 的流式管道处理，各阶段并行，
+        ``progress_callback``在每批写入后收到进度信息。
+        """
+        try:
+            pipeline = IngestionPipeline(
+                self.vector_store_manager,
+                self.doc_processor,
+                progress_callback=progress_callback,
+                routing_index=self.routing_index,
+                routing_classifier=self.routing_classifier
+            )
+            result = pipeline.run(db_type, uploaded_files)
+            if result.get("num_chunks"):
+                if self.routing_index is not None and settings.routing_index_enabled:
+                    self._save_routing_index(self.routing_index)
+                if self.routing_classifier is not None and self.routing_classifier.train():
+                    self._save_routing_classifier(self.routing_classifier)
+            return result
                 
         except Exception as e:
             return {
                 "success": False,
                 "error": f"Failed to add documents: {str(e)}",
                 "processed_files": []
-            } 
\ No newline at end of file
+            }
+    
+    async def aadd_documents(
+        self, 
+        db_type: DatabaseType, 
+        uploaded_files: List[Any],
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """Async version of ``add_documents``.
+        
+        写入管道本身由多个线程阶段组成（解析和分块是CPU密集型），
+        这里在工作线程中运行整个管道，不阻塞事件循环；
+        ``progress_callback``因此在该工作线程中被调用。
+        """
+        return await asyncio.to_thread(self.add_documents, db_type, uploaded_files, progress_callback)
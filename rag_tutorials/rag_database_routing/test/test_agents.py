@@ -217,6 +217,57 @@ def test_prompt_templates():
         traceback.print_exc()
         return False
 
+def test_qa_single_retrieval():
+    """测试问答链缓存和单次检索"""
+    print("\n🧪 测试问答单次检索")
+    print("="*40)
+    
+    try:
+        from qdrant_client import QdrantClient
+        from langchain_core.documents import Document
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        from langchain_core.language_models.fake_chat_models import FakeListChatModel
+        from src.agents.qa_agent import QAAgent
+        from src.models.config import settings
+        from src.tools.vector_store import VectorStoreManager
+        
+        class CountingEmbeddings(DeterministicFakeEmbedding):
+            """统计查询embedding次数（每次检索计算一次）"""
+            query_calls: int = 0
+            
+            def embed_query(self, text):
+                self.query_calls += 1
+                return super().embed_query(text)
+        
+        embeddings = CountingEmbeddings(size=settings.vector_size)
+        manager = VectorStoreManager(client=QdrantClient(":memory:"), embeddings=embeddings)
+        manager.add_documents("products", [
+            Document(page_content="产品支持AI功能", metadata={"source": "test"})
+        ])
+        
+        agent = QAAgent(manager)
+        agent.llm = FakeListChatModel(responses=["答案一", "答案二"])
+        
+        calls_before = embeddings.query_calls
+        answer, documents = agent.answer_question("产品有什么功能？", "products")
+        print(f"   答案: {answer} (文档数: {len(documents)})")
+        print(f"   检索次数: {embeddings.query_calls - calls_before}")
+        assert answer == "答案一"
+        assert embeddings.query_calls - calls_before == 1
+        
+        chain = agent._get_qa_chain("products")
+        answer, _ = agent.answer_question("产品支持什么？", "products")
+        assert answer == "答案二"
+        assert agent._get_qa_chain("products") is chain
+        print(f"   问答链已缓存: {list(agent._qa_chains)}")
+        
+        return True
+    except Exception as e:
+        print(f"❌ 问答单次检索测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
 def main():
     """运行所有代理测试"""
     print("🔧 RAG数据库路由系统 - 代理测试")
@@ -226,7 +277,8 @@ def main():
         ("路由代理", test_routing_agent),
         ("问答代理", test_qa_agent),
         ("代理集成", test_agent_integration),
-        ("提示词模板", test_prompt_templates)
+        ("提示词模板", test_prompt_templates),
+        ("问答单次检索", test_qa_single_retrieval)
     ]
     
     results = {}
@@ -127,6 +127,248 @@ def test_doubao_embeddings():
         traceback.print_exc()
         return False
 
+def _doubao_vector(text):
+    """模拟豆包接口返回的向量（由文本编号决定，便于检查顺序）"""
+    return [float(text.split("-")[1]), 1.0]
+
+class _MockDoubaoAdapter:
+    """模拟豆包接口的requests适配器：按``statuses``依次返回状态码，之后返回200"""
+    
+    def __init__(self, statuses=(), retry_after=None, max_delay=0.0):
+        import threading
+        from requests.adapters import BaseAdapter
+        self.statuses = list(statuses)
+        self.retry_after = retry_after
+        self.max_delay = max_delay
+        self.calls = []
+        self._lock = threading.Lock()
+        
+        adapter = self
+        class Adapter(BaseAdapter):
+            def send(self, request, **kwargs):
+                return adapter.respond(request)
+            def close(self):
+                pass
+        self.adapter = Adapter()
+    
+    def respond(self, request):
+        import json
+        import random
+        import time
+        import requests
+        text = json.loads(request.body)["input"][0]["text"]
+        with self._lock:
+            self.calls.append((text, time.monotonic()))
+            status = self.statuses.pop(0) if self.statuses else 200
+        # 随机延迟使并发请求乱序完成
+        time.sleep(random.random() * self.max_delay)
+        response = requests.Response()
+        response.status_code = status
+        response.request = request
+        response.url = request.url
+        if status == 200:
+            response._content = json.dumps({"data": {"embedding": _doubao_vector(text)}}).encode("utf-8")
+        else:
+            response._content = b'{"error": "rate limited"}'
+            if self.retry_after is not None:
+                response.headers["Retry-After"] = self.retry_after
+        return response
+
+def _mock_doubao_embeddings(mock, **kwargs):
+    from src.models.doubao_embeddings import DoubaoEmbeddings
+    embeddings = DoubaoEmbeddings(api_key="test", base_url="https://doubao.test/api/v3", backoff_base=0.01, **kwargs)
+    embeddings.session.mount("https://", mock.adapter)
+    return embeddings
+
+def test_doubao_concurrency_and_retries():
+    """测试豆包embedding的并发、重试和限流（模拟接口）"""
+    print("\n🧪 测试豆包Embedding并发与重试")
+    print("="*40)
+    
+    try:
+        import time
+        from src.models.doubao_embeddings import _RateLimiter
+        
+        texts = [f"doc-{i}" for i in range(40)]
+        mock = _MockDoubaoAdapter(max_delay=0.01)
+        vectors = _mock_doubao_embeddings(mock, max_workers=8).embed_documents(texts)
+        print(f"   并发请求: {len(mock.calls)} 次")
+        assert vectors == [_doubao_vector(text) for text in texts]
+        
+        print("\n📝 测试429后重试成功（Retry-After被限制在max_backoff内）...")
+        mock = _MockDoubaoAdapter(statuses=[429, 429], retry_after="3600")
+        start = time.perf_counter()
+        vector = _mock_doubao_embeddings(mock, max_backoff=0.05).embed_query("doc-7")
+        elapsed = time.perf_counter() - start
+        print(f"   请求 {len(mock.calls)} 次, 耗时 {elapsed:.2f}s")
+        assert vector == _doubao_vector("doc-7") and len(mock.calls) == 3
+        assert elapsed < 1.0
+        
+        print("\n📝 测试超过最大重试次数后放弃...")
+        mock = _MockDoubaoAdapter(statuses=[503] * 10)
+        vector = _mock_doubao_embeddings(mock, max_retries=2).embed_query("doc-1")
+        print(f"   请求 {len(mock.calls)} 次")
+        assert len(mock.calls) == 3 and vector == [0.0] * 2048
+        
+        print("\n📝 测试限流...")
+        limiter = _RateLimiter(requests_per_second=10)
+        waits = [limiter.reserve() for _ in range(5)]
+        assert waits[0] == 0.0 and all(abs(b - a - 0.1) < 0.02 for a, b in zip(waits, waits[1:]))
+        mock = _MockDoubaoAdapter()
+        _mock_doubao_embeddings(mock, max_workers=4, requests_per_second=50).embed_documents(texts[:10])
+        times = sorted(t for _, t in mock.calls)
+        span = times[-1] - times[0]
+        print(f"   10个请求（50次/秒）跨度: {span:.3f}s")
+        assert span >= 9 * 0.02 * 0.9
+        
+        return True
+    except Exception as e:
+        print(f"❌ 豆包Embedding并发与重试测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def _mock_async_doubao_embeddings(mock, **kwargs):
+    """用httpx.MockTransport模拟豆包接口的异步客户端，记录创建的客户端"""
+    import asyncio
+    import json
+    import random
+    import httpx
+    
+    async def handler(request):
+        text = json.loads(request.content)["input"][0]["text"]
+        mock.calls.append((text, asyncio.get_running_loop().time()))
+        status = mock.statuses.pop(0) if mock.statuses else 200
+        await asyncio.sleep(random.random() * mock.max_delay)
+        if status == 200:
+            return httpx.Response(200, json={"data": {"embedding": _doubao_vector(text)}})
+        headers = {"Retry-After": mock.retry_after} if mock.retry_after is not None else {}
+        return httpx.Response(status, json={"error": "rate limited"}, headers=headers)
+    
+    embeddings = _mock_doubao_embeddings(mock, **kwargs)
+    embeddings.created_clients = []
+    def create_client():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler), headers=embeddings.headers)
+        embeddings.created_clients.append(client)
+        return client
+    embeddings._create_async_client = create_client
+    return embeddings
+
+def test_doubao_async_embeddings():
+    """测试豆包embedding的异步接口（httpx.MockTransport模拟接口）"""
+    print("\n🧪 测试豆包Embedding异步接口")
+    print("="*40)
+    
+    try:
+        import asyncio
+        
+        texts = [f"doc-{i}" for i in range(40)]
+        sync_vectors = _mock_doubao_embeddings(_MockDoubaoAdapter(max_delay=0.01), max_workers=8).embed_documents(texts)
+        mock = _MockDoubaoAdapter(max_delay=0.01)
+        embeddings = _mock_async_doubao_embeddings(mock, max_concurrency=8)
+        async_vectors = asyncio.run(embeddings.aembed_documents(texts))
+        print(f"   异步请求: {len(mock.calls)} 次")
+        assert async_vectors == sync_vectors == [_doubao_vector(text) for text in texts]
+        
+        print("\n📝 测试异步429后重试成功...")
+        mock.statuses = [429, 429]
+        mock.retry_after = "3600"
+        mock.calls.clear()
+        embeddings.max_backoff = 0.05
+        vector = asyncio.run(embeddings.aembed_query("doc-7"))
+        print(f"   请求 {len(mock.calls)} 次")
+        assert vector == _doubao_vector("doc-7") and len(mock.calls) == 3
+        
+        print("\n📝 测试异步超过最大重试次数后放弃...")
+        mock = _MockDoubaoAdapter(statuses=[503] * 10)
+        failing = _mock_async_doubao_embeddings(mock, max_retries=2)
+        vector = asyncio.run(failing.aembed_query("doc-1"))
+        assert len(mock.calls) == 3 and vector == [0.0] * 2048
+        
+        print("\n📝 测试每个事件循环的客户端在循环结束时关闭...")
+        clients = embeddings.created_clients + failing.created_clients
+        print(f"   创建客户端: {len(clients)} 个")
+        assert len(embeddings.created_clients) == 2 and len(failing.created_clients) == 1
+        assert all(client.is_closed for client in clients)
+        
+        return True
+    except Exception as e:
+        print(f"❌ 豆包Embedding异步接口测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_cached_embeddings():
+    """测试Embedding缓存（内存LRU + SQLite）"""
+    print("\n🧪 测试Embedding缓存")
+    print("="*40)
+    
+    try:
+        import tempfile
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        from src.models.cached_embeddings import CachedEmbeddings
+        
+        class CountingEmbeddings(DeterministicFakeEmbedding):
+            """统计底层调用的文本数量（查询向量与文档向量不同）"""
+            embedded_texts: int = 0
+            
+            def embed_documents(self, texts):
+                self.embedded_texts += len(texts)
+                return super().embed_documents(texts)
+            
+            def embed_query(self, text):
+                self.embedded_texts += 1
+                return super().embed_query(f"查询: {text}")
+        
+        def close(a, b):
+            # 磁盘缓存以float32保存
+            return all(abs(x - y) < 1e-6 for x, y in zip(a, b))
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_path = os.path.join(tmp_dir, "embeddings.sqlite3")
+            underlying = CountingEmbeddings(size=8)
+            cached = CachedEmbeddings(underlying, "fake", cache_path, max_entries=2)
+            
+            print("📝 测试内存命中...")
+            first = cached.embed_documents(["文档1", "文档2", "文档1"])
+            second = cached.embed_documents(["文档1", "文档2"])
+            print(f"   底层调用文本数: {underlying.embedded_texts}")
+            assert underlying.embedded_texts == 2
+            assert first[0] == first[2]
+            
+            print("\n📝 测试查询向量与文档向量分开缓存...")
+            query = cached.embed_query("文档1")
+            assert underlying.embedded_texts == 3
+            assert query == underlying.embed_query("文档1") and not close(query, first[0])
+            underlying.embedded_texts = 0
+            assert close(cached.embed_queries(["文档1", "文档2"])[0], query)
+            assert close(cached.embed_documents(["文档2"])[0], second[1])
+            print(f"   底层调用文本数: {underlying.embedded_texts}")
+            assert underlying.embedded_texts == 1
+            
+            print("\n📝 测试LRU淘汰后磁盘命中...")
+            disk_hits = cached.disk_hits
+            assert close(cached.embed_documents(["文档1"])[0], first[0])
+            print(f"   缓存统计: {cached.stats()}")
+            assert cached.disk_hits == disk_hits + 1 and underlying.embedded_texts == 1
+            cached.close()
+            
+            print("\n📝 测试跨实例持久化...")
+            reopened = CachedEmbeddings(CountingEmbeddings(size=8), "fake", cache_path)
+            vector = reopened.embed_documents(["文档2"])[0]
+            reopened_query = reopened.embed_query("文档1")
+            assert reopened.underlying.embedded_texts == 0
+            assert close(vector, second[1]) and close(reopened_query, query)
+            print(f"   缓存统计: {reopened.stats()}")
+            reopened.close()
+        
+        return True
+    except Exception as e:
+        print(f"❌ Embedding缓存测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
 def main():
     """运行所有模型测试"""
     print("🔧 RAG数据库路由系统 - 模型测试")
@@ -136,7 +378,10 @@ def main():
         ("配置", test_config),
         ("LLM", test_llm),
         ("Embeddings", test_embeddings),
-        ("豆包Embeddings", test_doubao_embeddings)
+        ("豆包Embeddings", test_doubao_embeddings),
+        ("Embedding缓存", test_cached_embeddings),
+        ("豆包并发与重试", test_doubao_concurrency_and_retries),
+        ("豆包异步接口", test_doubao_async_embeddings)
     ]
     
     results = {}
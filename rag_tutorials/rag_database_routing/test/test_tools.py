@@ -228,6 +228,518 @@ def test_integration():
         traceback.print_exc()
         return False
 
+def _make_pdf(page_texts):
+    """生成每页一行文本的最小PDF（仅用于测试）"""
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [%s] /Count %d >>" % (
+            " ".join(f"{4 + 2 * i} 0 R" for i in range(len(page_texts))), len(page_texts)
+        ),
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, text in enumerate(page_texts):
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>"
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    
+    content = "%PDF-1.4\n"
+    offsets = []
+    for i, obj in enumerate(objects, 1):
+        offsets.append(len(content))
+        content += f"{i} 0 obj\n{obj}\nendobj\n"
+    xref_offset = len(content)
+    content += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    content += "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    content += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n"
+    return content.encode("latin-1")
+
+def test_pdf_page_parsing():
+    """测试内存PDF解析（顺序与进程池并行）"""
+    print("\n🧪 测试PDF解析")
+    print("="*40)
+    
+    try:
+        import time
+        from src.models.config import settings
+        from src.tools.document_processor import DocumentProcessor
+        
+        processor = DocumentProcessor()
+        pdf_content = _make_pdf([f"Page {i} manual content" for i in range(40)])
+        
+        print("📝 测试顺序解析...")
+        start = time.time()
+        pages = list(processor.iter_pdf_pages(pdf_content, source="manual.pdf"))
+        print(f"   页数: {len(pages)}，耗时: {time.time() - start:.3f}s")
+        print(f"   第3页元数据: {pages[2].metadata}")
+        assert len(pages) == 40
+        assert "Page 2 manual" in pages[2].page_content
+        assert pages[2].metadata == {"source": "manual.pdf", "page": 2, "total_pages": 40}
+        
+        print("\n📝 测试进程池并行解析...")
+        original = (settings.pdf_parallel_min_pages, settings.pdf_pages_per_task, settings.pdf_max_workers)
+        settings.pdf_parallel_min_pages, settings.pdf_pages_per_task, settings.pdf_max_workers = 10, 5, 2
+        try:
+            start = time.time()
+            parallel_pages = list(processor.iter_pdf_pages(pdf_content, source="manual.pdf"))
+            print(f"   页数: {len(parallel_pages)}，耗时: {time.time() - start:.3f}s")
+        finally:
+            settings.pdf_parallel_min_pages, settings.pdf_pages_per_task, settings.pdf_max_workers = original
+        assert parallel_pages == pages
+        
+        chunks = processor.process_pdf(pdf_content, source="manual.pdf")
+        print(f"   分块数: {len(chunks)}")
+        assert all(chunk.metadata["source"] == "manual.pdf" for chunk in chunks)
+        
+        return True
+    except Exception as e:
+        print(f"❌ PDF解析测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_local_vector_store():
+    """测试本地内存映射向量存储"""
+    print("\n🧪 测试本地向量存储")
+    print("="*40)
+    
+    try:
+        import tempfile
+        import numpy as np
+        from langchain_core.documents import Document
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        from src.tools.local_vector_store import LocalVectorStoreManager
+        
+        path = tempfile.mkdtemp()
+        embeddings = DeterministicFakeEmbedding(size=64)
+        manager = LocalVectorStoreManager(path=path, embeddings=embeddings)
+        documents = [
+            Document(page_content=f"文档{i}", metadata={"source": f"file{i % 3}.txt"})
+            for i in range(500)
+        ]
+        manager.add_documents("products", documents)
+        manager.databases["products"].SEARCH_BLOCK_ROWS = 64
+        
+        print("📝 测试精确top-k（多查询批量）...")
+        vectors = np.array(embeddings.embed_documents([doc.page_content for doc in documents]))
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        queries = [embeddings.embed_query(f"查询{i}") for i in range(20)]
+        results = manager.search_batch_by_vectors("products", queries, k=5)
+        for query, hits in zip(queries, results):
+            expected = np.argsort(-(vectors @ (np.array(query) / np.linalg.norm(query))))[:5]
+            assert [doc.page_content for doc, _ in hits] == [documents[i].page_content for i in expected]
+        hits = manager.similarity_search_by_vector_with_score("products", queries[0], k=2, offset=3)
+        assert [doc for doc, _ in hits] == [doc for doc, _ in results[0][3:5]]
+        print(f"   第一个查询: {[(doc.page_content, round(score, 3)) for doc, score in results[0]]}")
+        
+        print("\n📝 测试删除和重新打开...")
+        ids = manager.get_document_ids("products", "file0.txt")
+        manager.delete_documents("products", ids)
+        manager.close()
+        reopened = LocalVectorStoreManager(path=path, embeddings=embeddings)
+        print(f"   删除 {len(ids)} 个，重新打开后剩余: {len(reopened.databases['products'])}")
+        assert len(reopened.databases["products"]) == 500 - len(ids)
+        assert not reopened.get_document_ids("products", "file0.txt")
+        hits = reopened.similarity_search_with_score("products", "文档1", k=1)
+        assert hits[0][0].page_content == "文档1" and hits[0][0].metadata["_id"]
+        assert len(reopened.get_retriever("products", k=3).invoke("文档2")) == 3
+        assert reopened.search_all_databases_by_vector(queries[0], k=2)["support"] == []
+        
+        return True
+    except Exception as e:
+        print(f"❌ 本地向量存储测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_quantized_vector_store():
+    """测试int8量化存储和重新打分"""
+    print("\n🧪 测试量化向量存储")
+    print("="*40)
+    
+    try:
+        import tempfile
+        import numpy as np
+        from langchain_core.documents import Document
+        from src.tools.local_vector_store import LocalCollection
+        
+        rng = np.random.default_rng(0)
+        centers = rng.normal(size=(20, 128))
+        vectors = centers[rng.integers(20, size=2000)] + rng.normal(scale=0.8, size=(2000, 128))
+        queries = centers[rng.integers(20, size=50)] + rng.normal(scale=0.8, size=(50, 128))
+        ids = [str(i) for i in range(len(vectors))]
+        documents = [Document(page_content=doc_id) for doc_id in ids]
+        
+        path = tempfile.mkdtemp()
+        exact = LocalCollection(path, "exact")
+        exact.upsert(ids, documents, vectors)
+        expected = exact.search(queries, 10)
+        exact.close()
+        
+        # 已有float32集合开启量化时重建int8向量
+        quantized = LocalCollection(path, "quantized", quantization="int8", rescore_oversampling=3.0)
+        quantized.SEARCH_BLOCK_ROWS = 256
+        results = quantized.search(queries, 10)
+        recall = np.mean([
+            len({doc.page_content for doc, _ in e} & {doc.page_content for doc, _ in r}) / 10
+            for e, r in zip(expected, results)
+        ])
+        print(f"   int8 + 重新打分 recall@10: {recall:.3f}")
+        print(f"   int8文件大小: {os.path.getsize(os.path.join(path, LocalCollection.SEARCH_FILE))} 字节")
+        assert recall >= 0.99
+        # 重新打分后的分数是float32精确分数
+        assert abs(results[0][0][1] - expected[0][0][1]) < 1e-5
+        
+        print("\n📝 测试关闭量化期间写入后重新开启量化...")
+        quantized.close()
+        toggle_path = tempfile.mkdtemp()
+        first = LocalCollection(toggle_path, "toggle", quantization="int8")
+        first.upsert(ids[:100], documents[:100], vectors[:100])
+        first.close()
+        # 新行在已有容量内，文件大小不变
+        plain = LocalCollection(toggle_path, "toggle")
+        new_vectors = rng.normal(size=(5, 128))
+        new_ids = [f"new{i}" for i in range(5)]
+        plain.upsert(new_ids, [Document(page_content=doc_id) for doc_id in new_ids], new_vectors)
+        plain.close()
+        requantized = LocalCollection(toggle_path, "toggle", quantization="int8")
+        found = [hits[0][0].page_content for hits in requantized.search(new_vectors, 1)]
+        print(f"   新写入行的搜索结果: {found}")
+        assert found == new_ids
+        requantized.close()
+        
+        try:
+            LocalCollection(tempfile.mkdtemp(), "pq", quantization="pq")
+            assert False, "本地存储不应接受pq量化"
+        except ValueError:
+            pass
+        
+        return True
+    except Exception as e:
+        print(f"❌ 量化向量存储测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_qdrant_collection_tuning():
+    """测试Qdrant集合参数（HNSW、on_disk、分片、搜索ef）"""
+    print("\n🧪 测试Qdrant集合参数")
+    print("="*40)
+    
+    from dataclasses import replace
+    from src.data import COLLECTIONS
+    original = COLLECTIONS["products"]
+    try:
+        from qdrant_client import QdrantClient
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        from src.tools.vector_store import VectorStoreManager
+        
+        client = QdrantClient(":memory:")
+        embeddings = DeterministicFakeEmbedding(size=1536)
+        created = {}
+        original_create_collection = client.create_collection
+        def recording_create_collection(collection_name, **kwargs):
+            created[collection_name] = kwargs
+            return original_create_collection(collection_name, **kwargs)
+        client.create_collection = recording_create_collection
+        
+        COLLECTIONS["products"] = replace(
+            original, hnsw_m=32, hnsw_ef_construct=200, search_ef=128, 
+            on_disk_payload=True, shard_number=2, replication_factor=1
+        )
+        manager = VectorStoreManager(client=client, embeddings=embeddings)
+        manager.databases["products"], manager.databases["support"]
+        kwargs = created[original.collection_name]
+        print(f"   HNSW: {kwargs['hnsw_config']}, 分片: {kwargs['shard_number']}")
+        assert kwargs["hnsw_config"].m == 32 and kwargs["hnsw_config"].ef_construct == 200
+        assert kwargs["on_disk_payload"] and kwargs["shard_number"] == 2
+        assert created[COLLECTIONS["support"].collection_name]["hnsw_config"] is None
+        
+        requests = []
+        original_query_points = client.query_points
+        def recording_query_points(*args, **kwargs):
+            requests.append(kwargs)
+            return original_query_points(*args, **kwargs)
+        client.query_points = recording_query_points
+        manager.similarity_search_by_vector_with_score("products", embeddings.embed_query("测试"), k=1)
+        manager.similarity_search_by_vector_with_score("support", embeddings.embed_query("测试"), k=1)
+        print(f"   搜索参数: {requests[0]['search_params']}")
+        assert requests[0]["search_params"].hnsw_ef == 128
+        assert requests[1]["search_params"] is None
+        
+        print("\n📝 测试已有集合按配置更新...")
+        updates = []
+        client.update_collection = lambda collection_name, **changes: updates.append((collection_name, changes))
+        COLLECTIONS["products"] = replace(COLLECTIONS["products"], hnsw_m=48, on_disk_vectors=True, indexing_threshold=0)
+        manager = VectorStoreManager(client=client, embeddings=embeddings)
+        for db_type in manager.databases:
+            manager.databases[db_type]
+        print(f"   更新: {[(name, sorted(changes)) for name, changes in updates]}")
+        # 内存模式的Qdrant忽略集合参数（保持默认值），因此所有设置了的参数都会被更新
+        assert len(updates) == 1 and updates[0][0] == original.collection_name
+        assert sorted(updates[0][1]) == ["collection_params", "hnsw_config", "optimizers_config", "vectors_config"]
+        assert updates[0][1]["hnsw_config"].m == 48
+        assert updates[0][1]["vectors_config"][""].on_disk
+        
+        return True
+    except Exception as e:
+        print(f"❌ Qdrant集合参数测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        COLLECTIONS["products"] = original
+
+def test_lazy_qdrant_startup():
+    """测试Qdrant集合延迟初始化：启动时只调用一次get_collections"""
+    print("\n🧪 测试Qdrant延迟启动")
+    print("="*40)
+    
+    try:
+        from qdrant_client import QdrantClient, models
+        from langchain_core.documents import Document
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        from src.data import COLLECTIONS
+        from src.tools.vector_store import VectorStoreManager
+        
+        client = QdrantClient(":memory:")
+        embeddings = DeterministicFakeEmbedding(size=1536)
+        calls = []
+        for name in ["get_collections", "get_collection", "collection_exists", "create_collection"]:
+            def recording(*args, _name=name, _method=getattr(client, name), **kwargs):
+                calls.append(_name)
+                return _method(*args, **kwargs)
+            setattr(client, name, recording)
+        
+        manager = VectorStoreManager(client=client, embeddings=embeddings)
+        print(f"   启动请求: {calls}, 耗时: {manager.startup_timings}")
+        assert calls == ["get_collections"]
+        assert set(manager.databases) == set(COLLECTIONS) and "products" in manager.databases
+        
+        calls.clear()
+        manager.add_documents("products", [Document(page_content="智能手表", metadata={"source": "a.pdf"})])
+        manager.similarity_search_by_vector_with_score("products", embeddings.embed_query("手表"), k=1)
+        print(f"   首次使用products: {calls}")
+        assert calls == ["create_collection"]
+        assert "collection:products" in manager.startup_timings
+        
+        print("\n📝 测试已有集合（维度不匹配时重新创建）...")
+        client.delete_collection(COLLECTIONS["support"].collection_name)
+        client.create_collection(
+            COLLECTIONS["support"].collection_name,
+            vectors_config=models.VectorParams(size=8, distance=models.Distance.COSINE)
+        )
+        calls.clear()
+        manager = VectorStoreManager(client=client, embeddings=embeddings)
+        assert manager.similarity_search_by_vector_with_score("products", embeddings.embed_query("手表"), k=1)
+        manager.databases["support"]
+        print(f"   请求: {calls}")
+        assert calls == ["get_collections", "get_collection", "get_collection", "create_collection"]
+        assert client.get_collection(COLLECTIONS["support"].collection_name).config.params.vectors.size == 1536
+        
+        return True
+    except Exception as e:
+        print(f"❌ Qdrant延迟启动测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_unified_collection():
+    """测试统一集合模式：每个数据库类型的搜索只返回自己的文档（单个搜索和批量搜索）"""
+    print("\n🧪 测试统一集合模式")
+    print("="*40)
+    
+    from src.models.config import settings
+    original = settings.unified_collection_name
+    try:
+        import asyncio
+        from qdrant_client import QdrantClient
+        from langchain_core.documents import Document
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        from src.tools.vector_store import VectorStoreManager
+        
+        client = QdrantClient(":memory:")
+        
+        class SyncBackedAsyncClient:
+            """用同一个内存Qdrant回答异步批量查询"""
+            async def query_batch_points(self, **kwargs):
+                return client.query_batch_points(**kwargs)
+        
+        settings.unified_collection_name = "unified_test"
+        embeddings = DeterministicFakeEmbedding(size=1536)
+        manager = VectorStoreManager(client=client, embeddings=embeddings, async_client=SyncBackedAsyncClient())
+        
+        products = [Document(page_content=f"产品文档{i}", metadata={"source": "p.pdf"}) for i in range(3)]
+        support = [Document(page_content=f"客服文档{i}", metadata={"source": "s.pdf"}) for i in range(3)]
+        manager.add_documents("products", products)
+        manager.add_embedded_documents("support", support, embeddings.embed_documents([d.page_content for d in support]))
+        assert client.get_collections().collections[0].name == "unified_test"
+        assert client.count("unified_test").count == 6
+        
+        def db_types_of(hits):
+            return {doc.metadata["db_type"] for doc, _ in hits}
+        
+        # 查询向量与客服文档完全相同：其他数据库类型的搜索也不能返回它
+        embedding = embeddings.embed_query("客服文档0")
+        single = {
+            db_type: manager.similarity_search_by_vector_with_score(db_type, embedding, k=10)
+            for db_type in manager.databases
+        }
+        batch = manager.search_all_databases_by_vector(embedding, k=10)
+        async_batch = asyncio.run(manager.asearch_all_databases_by_vector(embedding, k=10))
+        print(f"   单个搜索: {{{', '.join(f'{t}: {len(h)}' for t, h in single.items())}}}")
+        assert single["support"][0][0].page_content == "客服文档0"
+        for results in (single, batch, async_batch):
+            assert len(results["products"]) == 3 and db_types_of(results["products"]) == {"products"}
+            assert len(results["support"]) == 3 and db_types_of(results["support"]) == {"support"}
+            assert results["finance"] == []
+        assert [d.page_content for d, _ in batch["support"]] == [d.page_content for d, _ in single["support"]]
+        assert [d.page_content for d, _ in async_batch["products"]] == [d.page_content for d, _ in single["products"]]
+        
+        return True
+    except Exception as e:
+        print(f"❌ 统一集合模式测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        settings.unified_collection_name = original
+
+def test_search_timeout():
+    """测试多集合搜索超时：慢集合返回空结果，卡住的线程不会拖慢后续搜索"""
+    print("\n🧪 测试多集合搜索超时")
+    print("="*40)
+    
+    from src.models.config import settings
+    original = (settings.search_timeout, settings.search_max_workers)
+    release = None
+    try:
+        import threading
+        import time
+        from qdrant_client import QdrantClient
+        from langchain_core.documents import Document
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        from src.data import COLLECTIONS
+        from src.tools.vector_store import VectorStoreManager
+        
+        client = QdrantClient(":memory:")
+        embeddings = DeterministicFakeEmbedding(size=1536)
+        settings.search_timeout, settings.search_max_workers = 0.3, 2
+        manager = VectorStoreManager(client=client, embeddings=embeddings)
+        for db_type in ["support", "finance"]:
+            manager.add_documents(db_type, [Document(page_content=f"{db_type}文档", metadata={"source": "a.pdf"})])
+        
+        # products集合的请求一直卡住，直到测试结束
+        release = threading.Event()
+        timeouts = []
+        original_query_points = client.query_points
+        def slow_query_points(collection_name, **kwargs):
+            timeouts.append(kwargs.get("timeout"))
+            if collection_name == COLLECTIONS["products"].collection_name:
+                release.wait(10)
+            return original_query_points(collection_name, **kwargs)
+        client.query_points = slow_query_points
+        
+        embedding = embeddings.embed_query("文档")
+        for attempt in range(3):
+            start = time.perf_counter()
+            results = manager.search_all_databases_by_vector(embedding, k=1)
+            elapsed = time.perf_counter() - start
+            print(f"   第{attempt + 1}次搜索: {elapsed:.2f}s, {{{', '.join(f'{t}: {len(h)}' for t, h in results.items())}}}")
+            # 两个线程中一个被products卡住：不换线程池时第二次搜索的其他集合排不上队
+            assert elapsed < settings.search_timeout + 0.5
+            assert results["products"] == [] and len(results["support"]) == 1 and len(results["finance"]) == 1
+        assert timeouts and all(timeout == 1 for timeout in timeouts)
+        
+        print("\n📝 测试批量路由搜索（process_questions）超时...")
+        timeouts.clear()
+        original_query_batch_points = client.query_batch_points
+        def slow_query_batch_points(collection_name, **kwargs):
+            timeouts.append(kwargs.get("timeout"))
+            if collection_name == COLLECTIONS["products"].collection_name:
+                release.wait(10)
+            return original_query_batch_points(collection_name, **kwargs)
+        client.query_batch_points = slow_query_batch_points
+        for attempt in range(2):
+            start = time.perf_counter()
+            results = manager.search_all_databases_by_vectors([embedding] * 3, k=1)
+            elapsed = time.perf_counter() - start
+            print(f"   第{attempt + 1}次批量搜索: {elapsed:.2f}s")
+            assert elapsed < settings.search_timeout + 0.5
+            assert all(r["products"] == [] and len(r["support"]) == 1 and len(r["finance"]) == 1 for r in results)
+        assert timeouts and all(timeout == 1 for timeout in timeouts)
+        
+        return True
+    except Exception as e:
+        print(f"❌ 多集合搜索超时测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        if release is not None:
+            release.set()
+        settings.search_timeout, settings.search_max_workers = original
+
+def test_async_qdrant_clients():
+    """测试异步Qdrant客户端：每个事件循环一个，循环结束时关闭"""
+    print("\n🧪 测试异步Qdrant客户端")
+    print("="*40)
+    
+    from src.models.config import settings
+    from src.tools import vector_store
+    original = (vector_store.QdrantClient, vector_store.AsyncQdrantClient, settings.qdrant_url, settings.qdrant_api_key)
+    try:
+        import asyncio
+        from qdrant_client import QdrantClient
+        from qdrant_client.http import models
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        
+        created = []
+        class StubAsyncClient:
+            def __init__(self, **kwargs):
+                self.closed = False
+                self.queries = 0
+                created.append(self)
+            async def query_points(self, **kwargs):
+                self.queries += 1
+                await asyncio.sleep(0)
+                return models.QueryResponse(points=[])
+            async def close(self):
+                self.closed = True
+        
+        client = QdrantClient(":memory:")
+        vector_store.QdrantClient = lambda **kwargs: client
+        vector_store.AsyncQdrantClient = StubAsyncClient
+        settings.qdrant_url, settings.qdrant_api_key = "https://qdrant.test", "test"
+        embeddings = DeterministicFakeEmbedding(size=1536)
+        manager = vector_store.VectorStoreManager(embeddings=embeddings)
+        
+        embedding = embeddings.embed_query("测试")
+        for _ in range(2):
+            results = asyncio.run(manager.asearch_all_databases_by_vector(embedding, k=1))
+            assert set(results) == set(manager.databases)
+        print(f"   创建客户端: {len(created)} 个, 每个搜索 {[c.queries for c in created]} 次")
+        # 同一个循环中的并发搜索共用一个客户端，每次asyncio.run结束后客户端被关闭
+        assert len(created) == 2 and all(c.queries == len(manager.databases) for c in created)
+        assert all(c.closed for c in created)
+        
+        async def search_and_close():
+            await manager.asimilarity_search_by_vector_with_score("products", embedding, k=1)
+            await manager.aclose()
+            return created[-1].closed
+        assert asyncio.run(search_and_close()) and len(created) == 3
+        
+        return True
+    except Exception as e:
+        print(f"❌ 异步Qdrant客户端测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        vector_store.QdrantClient, vector_store.AsyncQdrantClient, settings.qdrant_url, settings.qdrant_api_key = original
+
 def main():
     """运行所有工具测试"""
     print("🔧 RAG数据库路由系统 - 工具测试")
@@ -237,7 +749,15 @@ def main():
         ("向量存储", test_vector_store),
         ("文档处理", test_document_processor),
         ("网络搜索", test_web_search),
-        ("工具集成", test_integration)
+        ("工具集成", test_integration),
+        ("PDF解析", test_pdf_page_parsing),
+        ("本地向量存储", test_local_vector_store),
+        ("量化向量存储", test_quantized_vector_store),
+        ("Qdrant集合参数", test_qdrant_collection_tuning),
+        ("Qdrant延迟启动", test_lazy_qdrant_startup),
+        ("统一集合模式", test_unified_collection),
+        ("多集合搜索超时", test_search_timeout),
+        ("异步Qdrant客户端", test_async_qdrant_clients)
     ]
     
     results = {}
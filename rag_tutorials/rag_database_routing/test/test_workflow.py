@@ -313,6 +313,761 @@ def test_workflow_performance():
         traceback.print_exc()
         return False
 
+def _build_offline_workflow(chat_responses, routing_index=None, routing_classifier=None):
+    """构建离线工作流：内存Qdrant + 确定性embedding + 模拟LLM"""
+    from qdrant_client import QdrantClient
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+    from src.models.config import settings
+    from src.tools.vector_store import VectorStoreManager
+    from src.workflow import RAGWorkflow
+    
+    class CountingEmbeddings(DeterministicFakeEmbedding):
+        """统计embedding调用次数的确定性embedding"""
+        query_calls: int = 0
+        
+        def embed_query(self, text):
+            self.query_calls += 1
+            return super().embed_query(text)
+    
+    embeddings = CountingEmbeddings(size=settings.vector_size)
+    manager = VectorStoreManager(client=QdrantClient(":memory:"), embeddings=embeddings)
+    workflow = RAGWorkflow(
+        vector_store_manager=manager, 
+        routing_index=routing_index, 
+        routing_classifier=routing_classifier
+    )
+    
+    llm = FakeListChatModel(responses=chat_responses)
+    workflow.routing_agent.llm = llm
+    workflow.qa_agent.llm = llm
+    return workflow, embeddings
+
+def test_single_embedding_per_question():
+    """测试每个问题只计算一次embedding"""
+    print("\n🧪 测试单次问题embedding")
+    print("="*40)
+    
+    try:
+        from langchain_core.documents import Document
+        
+        workflow, embeddings = _build_offline_workflow(["products", "这是一个测试答案"])
+        workflow.vector_store_manager.add_documents("products", [
+            Document(page_content="产品支持AI功能", metadata={"source": "test"})
+        ])
+        
+        calls_before = embeddings.query_calls
+        result = workflow.process_question("产品有什么功能？")
+        query_calls = embeddings.query_calls - calls_before
+        
+        print(f"   路由结果: {result['routed_database']}")
+        print(f"   路由方法: {result['routing_info'].get('routing_method')}")
+        print(f"   embedding调用次数: {result['embedding_calls']} (模型实际调用: {query_calls})")
+        
+        assert result["success"], result["error"]
+        assert result["embedding_calls"] == 1
+        assert query_calls == 1
+        
+        return True
+    except Exception as e:
+        print(f"❌ 单次embedding测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+class _FakeUploadedFile:
+    """模拟Streamlit上传文件对象"""
+    
+    def __init__(self, name, content, file_type="text/plain"):
+        self.name = name
+        self.type = file_type
+        self._content = content.encode("utf-8")
+    
+    def getvalue(self):
+        return self._content
+
+def test_streaming_ingestion():
+    """测试流式文档写入管道"""
+    print("\n🧪 测试流式文档写入")
+    print("="*40)
+    
+    try:
+        workflow, _ = _build_offline_workflow(["products"])
+        files = [
+            _FakeUploadedFile(f"manual_{i}.txt", "产品功能说明。" * 400)
+            for i in range(3)
+        ]
+        
+        progress_updates = []
+        result = workflow.add_documents("products", files, progress_callback=progress_updates.append)
+        
+        print(f"   处理结果: {result.get('message', result.get('error'))}")
+        print(f"   进度回调次数: {len(progress_updates)}")
+        for stage, stats in result["stage_stats"].items():
+            print(f"   {stage}: {stats}")
+        
+        assert result["success"]
+        assert result["processed_files"] == [f.name for f in files]
+        assert progress_updates[-1]["chunks_upserted"] == result["num_chunks"]
+        
+        stored = workflow.vector_store_manager.client.count("products_collection").count
+        assert stored == result["num_chunks"]
+        
+        print("\n📝 测试解析失败...")
+        bad_file = _FakeUploadedFile("bad.txt", "")
+        bad_file._content = b"\xff\xfe\xfa"
+        failed = workflow.add_documents("products", [bad_file])
+        print(f"   错误信息: {failed['error']}")
+        assert not failed["success"]
+        
+        return True
+    except Exception as e:
+        print(f"❌ 流式文档写入测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_incremental_reindex():
+    """测试重复上传时的去重和增量更新"""
+    print("\n🧪 测试增量重建索引")
+    print("="*40)
+    
+    try:
+        workflow, _ = _build_offline_workflow(["products"])
+        client = workflow.vector_store_manager.client
+        paragraphs = [f"第{i}段：产品型号SKU-{i:04d}的功能说明。" * 20 for i in range(6)]
+        
+        first = workflow.add_documents("products", [_FakeUploadedFile("manual.txt", "\n\n".join(paragraphs))])
+        print(f"   首次上传: 写入{first['num_chunks']}块")
+        
+        print("\n📝 测试重复上传...")
+        again = workflow.add_documents("products", [_FakeUploadedFile("manual.txt", "\n\n".join(paragraphs))])
+        print(f"   {again['message']}")
+        assert again["success"]
+        assert again["num_chunks"] == 0
+        assert again["embeddings_saved"] == first["num_chunks"]
+        assert client.count("products_collection").count == first["num_chunks"]
+        
+        print("\n📝 测试修改后上传...")
+        changed = paragraphs[:3] + ["全新内容：产品保修政策更新。" * 20]
+        updated = workflow.add_documents("products", [_FakeUploadedFile("manual.txt", "\n\n".join(changed))])
+        print(f"   {updated['message']}")
+        assert updated["num_chunks"] > 0
+        assert updated["chunks_deleted"] > 0
+        
+        stored = client.count("products_collection").count
+        expected = len(workflow.doc_processor.process_text("\n\n".join(changed)))
+        print(f"   集合中块数: {stored} (期望: {expected})")
+        assert stored == expected
+        
+        print("\n📝 测试embedding失败的块在重新上传时重新向量化...")
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        class FlakyEmbeddings(DeterministicFakeEmbedding):
+            """第一次向量化``fail_text``所在的块时返回零向量（模拟豆包重试耗尽后的回退）"""
+            fail_text: str = ""
+            failed: bool = False
+            embedded: list = []
+            def embed_documents(self, texts):
+                self.embedded.extend(texts)
+                vectors = super().embed_documents(texts)
+                for i, text in enumerate(texts):
+                    if self.fail_text in text and not self.failed:
+                        self.failed = True
+                        vectors[i] = [0.0] * self.size
+                return vectors
+        manager = workflow.vector_store_manager
+        manager.embeddings = FlakyEmbeddings(size=manager.embeddings.size, fail_text="仓储物流说明")
+        retried = ["仓储物流说明：发货与退货流程。" * 20] + changed
+        failed = workflow.add_documents("products", [_FakeUploadedFile("manual.txt", "\n\n".join(retried))])
+        print(f"   {failed['message']}")
+        expected = len(workflow.doc_processor.process_text("\n\n".join(retried)))
+        assert failed["chunks_failed"] == 1
+        assert client.count("products_collection").count == expected - 1
+        manager.embeddings.embedded.clear()
+        again = workflow.add_documents("products", [_FakeUploadedFile("manual.txt", "\n\n".join(retried))])
+        print(f"   {again['message']}")
+        assert again["num_chunks"] == 1 and again["chunks_failed"] == 0
+        assert len(manager.embeddings.embedded) == 1 and "仓储物流说明" in manager.embeddings.embedded[0]
+        assert client.count("products_collection").count == expected
+        
+        return True
+    except Exception as e:
+        print(f"❌ 增量重建索引测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_routing_index():
+    """测试内存路由索引"""
+    print("\n🧪 测试路由索引")
+    print("="*40)
+    
+    try:
+        import tempfile
+        from src.tools.routing_index import RoutingIndex
+        
+        routing_index = RoutingIndex(prototypes_per_collection=4)
+        workflow, _ = _build_offline_workflow(["这是一个测试答案"], routing_index=routing_index)
+        assert not routing_index.is_ready()
+        
+        workflow.add_documents("products", [_FakeUploadedFile("products.txt", "产品支持AI功能")])
+        workflow.add_documents("support", [_FakeUploadedFile("support.txt", "如何申请退款")])
+        print(f"   索引集合: {[db for db in ('products', 'support', 'finance') if routing_index.has_collection(db)]}")
+        assert routing_index.is_ready()
+        
+        result = workflow.process_question("如何申请退款")
+        print(f"   路由结果: {result['routed_database']}")
+        print(f"   路由方法: {result['routing_info'].get('routing_method')}")
+        print(f"   集合得分: {result['routing_info'].get('vector_scores')}")
+        assert result["routed_database"] == "support"
+        assert result["routing_info"]["routing_method"] == "routing_index"
+        
+        print("\n📝 测试保存与加载...")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "routing_index.npz")
+            routing_index.save(path)
+            loaded = RoutingIndex.load(path, prototypes_per_collection=4)
+            query = workflow.vector_store_manager.embeddings.embed_query("产品支持AI功能")
+            assert loaded.score(query) == routing_index.score(query)
+            print(f"   加载后得分: {loaded.score(query)}")
+        
+        return True
+    except Exception as e:
+        print(f"❌ 路由索引测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_routing_classifier():
+    """测试本地路由分类器"""
+    print("\n🧪 测试路由分类器")
+    print("="*40)
+    
+    try:
+        from src.tools.routing_classifier import RoutingClassifier
+        
+        classifier = RoutingClassifier()
+        workflow, _ = _build_offline_workflow(
+            ["这是一个测试答案", "support", "这是一个测试答案"], routing_classifier=classifier
+        )
+        products = "\n\n".join(f"产品型号SKU-{i:04d}支持AI功能。" * 30 for i in range(5))
+        support = "\n\n".join(f"工单{i:04d}：如何申请退款和售后服务。" * 30 for i in range(5))
+        workflow.add_documents("products", [_FakeUploadedFile("products.txt", products)])
+        workflow.add_documents("support", [_FakeUploadedFile("support.txt", support)])
+        assert classifier.is_trained()
+        
+        # 让向量路由总是不确定，检验中间层
+        workflow.routing_agent.confidence_threshold = 1.01
+        question = workflow.doc_processor.process_text(support)[0].page_content
+        result = workflow.process_question(question)
+        info = result["routing_info"]
+        print(f"   路由结果: {result['routed_database']}")
+        print(f"   路由方法: {info.get('routing_method')} (置信度: {info.get('classifier_confidence'):.3f})")
+        assert info["routing_method"] == "classifier"
+        assert result["routed_database"] == "support"
+        
+        print("\n📝 测试分类器不确定时回退到LLM...")
+        workflow.routing_agent.classifier_confidence = 1.01
+        pending_before = classifier.pending_examples
+        result = workflow.process_question("完全无关的问题")
+        print(f"   路由方法: {result['routing_info'].get('routing_method')}")
+        assert result["routing_info"]["routing_method"] == "llm_fallback"
+        assert classifier.pending_examples == pending_before + 1
+        
+        return True
+    except Exception as e:
+        print(f"❌ 路由分类器测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_routing_hits_reuse():
+    """测试问答复用路由阶段的搜索结果"""
+    print("\n🧪 测试复用路由搜索结果")
+    print("="*40)
+    
+    try:
+        from langchain_core.documents import Document
+        
+        workflow, _ = _build_offline_workflow(["products", "答案一", "products", "答案二"])
+        manager = workflow.vector_store_manager
+        manager.add_documents("products", [
+            Document(page_content=f"产品型号SKU-{i:04d}支持AI功能", metadata={"source": "test"})
+            for i in range(10)
+        ])
+        
+        queries = []
+        original_query_points = manager.client.query_points
+        def counting_query_points(*args, **kwargs):
+            queries.append(kwargs)
+            return original_query_points(*args, **kwargs)
+        manager.client.query_points = counting_query_points
+        
+        result = workflow.process_question("产品有什么功能？")
+        print(f"   路由结果: {result['routed_database']}, 文档数: {result['num_documents']}")
+        print(f"   Qdrant查询次数: {len(queries)} (集合数: {len(manager.databases)})")
+        assert result["success"], result["error"]
+        assert result["num_documents"] == workflow.qa_agent.top_k
+        assert len(queries) == len(manager.databases)
+        
+        print("\n📝 测试问答k大于路由k...")
+        queries.clear()
+        workflow.qa_agent.top_k = workflow.routing_agent.search_k + 2
+        result = workflow.process_question("产品有什么功能？")
+        extra = queries[len(manager.databases):]
+        print(f"   文档数: {result['num_documents']}, 补充查询: {[(q['limit'], q['offset']) for q in extra]}")
+        assert result["num_documents"] == workflow.qa_agent.top_k
+        assert [(q["limit"], q["offset"]) for q in extra] == [(2, workflow.routing_agent.search_k)]
+        doc_ids = [doc.metadata["_id"] for doc in result["documents"]]
+        assert len(set(doc_ids)) == len(doc_ids)
+        
+        return True
+    except Exception as e:
+        print(f"❌ 复用路由搜索结果测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_stream_question():
+    """测试流式问答"""
+    print("\n🧪 测试流式问答")
+    print("="*40)
+    
+    try:
+        from langchain_core.documents import Document
+        
+        workflow, _ = _build_offline_workflow(["products", "这是流式答案"])
+        workflow.vector_store_manager.add_documents("products", [
+            Document(page_content="产品支持AI功能", metadata={"source": "test"})
+        ])
+        
+        events = list(workflow.stream_question("产品有什么功能？"))
+        types = [event["type"] for event in events]
+        tokens = [event["content"] for event in events if event["type"] == "token"]
+        result = events[-1]["result"]
+        print(f"   事件顺序: {list(dict.fromkeys(types))}")
+        print(f"   token数: {len(tokens)}, 答案: {''.join(tokens)}")
+        
+        assert types[0] == "routing" and types[1] == "documents" and types[-1] == "done"
+        # 路由阶段的LLM输出（"products"）不应出现在答案token中
+        assert len(tokens) > 1
+        assert "".join(tokens) == result["answer"] == "这是流式答案"
+        assert result["success"] and result["num_documents"] == 1
+        
+        return True
+    except Exception as e:
+        print(f"❌ 流式问答测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_async_process_question():
+    """测试异步问答"""
+    print("\n🧪 测试异步问答")
+    print("="*40)
+    
+    try:
+        import asyncio
+        from langchain_core.documents import Document
+        
+        texts = ["产品支持AI功能", "如何申请退款", "本季度收入增长"]
+        workflow, embeddings = _build_offline_workflow(["这是一个测试答案"] * len(texts))
+        for db_type, text in zip(["products", "support", "finance"], texts):
+            workflow.vector_store_manager.add_documents(db_type, [
+                Document(page_content=text, metadata={"source": "test"})
+            ])
+        
+        async def run_all():
+            return await asyncio.gather(*(workflow.aprocess_question(text) for text in texts))
+        
+        results = asyncio.run(run_all())
+        for result in results:
+            print(f"   {result['question']} → {result['routed_database']} "
+                  f"({result['routing_info'].get('routing_method')}, 文档数: {result['num_documents']})")
+        
+        assert all(result["success"] for result in results)
+        assert [result["routed_database"] for result in results] == ["products", "support", "finance"]
+        assert all(result["answer"] == "这是一个测试答案" for result in results)
+        assert all(result["embedding_calls"] == 1 for result in results)
+        
+        return True
+    except Exception as e:
+        print(f"❌ 异步问答测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_process_questions():
+    """测试批量问答"""
+    print("\n🧪 测试批量问答")
+    print("="*40)
+    
+    try:
+        from langchain_core.documents import Document
+        from src.tools.routing_index import RoutingIndex
+        
+        texts = {"products": "产品支持AI功能", "support": "如何申请退款", "finance": "本季度收入增长"}
+        workflow, embeddings = _build_offline_workflow(["这是一个测试答案"] * 20)
+        manager = workflow.vector_store_manager
+        for db_type, text in texts.items():
+            manager.add_documents(db_type, [Document(page_content=text, metadata={"source": "test"})])
+        
+        batch_calls = []
+        original_batch = manager.client.query_batch_points
+        def counting_batch(*args, **kwargs):
+            batch_calls.append(kwargs["collection_name"])
+            return original_batch(*args, **kwargs)
+        manager.client.query_batch_points = counting_batch
+        
+        # 让一个问题在回退路由时出错，检验单题错误不影响其他问题
+        original_fallback = workflow.routing_agent._fallback_routing
+        def failing_fallback(question, context):
+            if question == "坏问题":
+                raise RuntimeError("模拟路由失败")
+            return original_fallback(question, context)
+        workflow.routing_agent._fallback_routing = failing_fallback
+        
+        questions = ["本季度收入增长", "坏问题", "产品支持AI功能", "如何申请退款", "产品支持AI功能"]
+        results = workflow.process_questions(questions, max_concurrency=3)
+        for result in results:
+            print(f"   {result['question']} → {result['routed_database']} (成功: {result['success']})")
+        print(f"   批量查询: {batch_calls}")
+        
+        assert [result["question"] for result in results] == questions
+        assert [result["routed_database"] for result in results] == ["finance", None, "products", "support", "products"]
+        assert [result["success"] for result in results] == [True, False, True, True, True]
+        assert "模拟路由失败" in results[1]["error"]
+        assert all(result["num_documents"] == 1 for result in results if result["success"])
+        # 每个集合一次批量查询，问答复用路由结果
+        assert sorted(batch_calls) == sorted(manager.databases[db].collection_name for db in texts)
+        
+        print("\n📝 测试路由索引 + 按集合分组检索...")
+        routing_index = RoutingIndex()
+        for db_type in texts:
+            routing_index.fit(db_type, manager.sample_vectors(db_type, 10))
+        workflow.routing_agent.routing_index = routing_index
+        batch_calls.clear()
+        results = workflow.process_questions(list(texts.values()) * 2)
+        print(f"   批量查询: {batch_calls}")
+        assert [result["routed_database"] for result in results] == list(texts) * 2
+        assert all(result["routing_info"]["routing_method"] == "routing_index" for result in results)
+        assert len(batch_calls) == len(texts)
+        
+        return True
+    except Exception as e:
+        print(f"❌ 批量问答测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_batch_query_embeddings():
+    """测试批量问答使用查询向量：批量路由与逐题路由结果相同"""
+    print("\n🧪 测试批量查询向量")
+    print("="*40)
+    
+    try:
+        import os
+        import tempfile
+        from langchain_core.documents import Document
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        from src.models import CachedEmbeddings, embed_queries
+        
+        class QueryPrefixEmbeddings(DeterministicFakeEmbedding):
+            """查询向量与文档向量不同的embedding（类似带检索指令前缀的模型）"""
+            def embed_query(self, text):
+                return super().embed_query(f"查询: {text}")
+        
+        # finance文档与问题"本季度收入增长"的查询向量相同：只有用查询向量才能路由到finance
+        texts = {"products": "产品支持AI功能", "support": "如何申请退款", "finance": "查询: 本季度收入增长"}
+        questions = ["产品支持AI功能", "如何申请退款", "本季度收入增长", "AI功能"]
+        workflow, _ = _build_offline_workflow(["support"] * 40)
+        manager = workflow.vector_store_manager
+        manager.embeddings = embeddings = QueryPrefixEmbeddings(size=manager.embeddings.size)
+        for db_type, text in texts.items():
+            manager.add_documents(db_type, [Document(page_content=text, metadata={"source": "test"})])
+        
+        assert embed_queries(embeddings, questions) == [embeddings.embed_query(q) for q in questions]
+        with tempfile.TemporaryDirectory() as tmp:
+            cached = CachedEmbeddings(embeddings, model_name="prefix", cache_path=os.path.join(tmp, "cache.db"))
+            assert cached.embed_queries(questions) == [embeddings.embed_query(q) for q in questions]
+            assert cached.embed_queries(questions[:2]) == [embeddings.embed_query(q) for q in questions[:2]]
+        
+        batch = workflow.process_questions(questions)
+        single = [workflow.process_question(question) for question in questions]
+        for b, s in zip(batch, single):
+            print(f"   {b['question']} → 批量: {b['routed_database']}, 逐题: {s['routed_database']}")
+        assert all(result["success"] for result in batch + single)
+        assert [r["routed_database"] for r in batch] == [r["routed_database"] for r in single]
+        assert batch[2]["routed_database"] == "finance"
+        assert batch[2]["routing_info"]["routing_method"] == "vector_similarity"
+        assert [r["routing_info"]["vector_scores"] for r in batch] == [r["routing_info"]["vector_scores"] for r in single]
+        
+        return True
+    except Exception as e:
+        print(f"❌ 批量查询向量测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_hybrid_search():
+    """测试BM25 + 向量混合检索"""
+    print("\n🧪 测试混合检索")
+    print("="*40)
+    
+    from src.models.config import settings
+    hybrid_enabled = settings.hybrid_search_enabled
+    try:
+        from langchain_core.documents import Document
+        from src.tools.sparse_index import tokenize
+        
+        tokens = tokenize("订单INV-2024-001报错ERR_404")
+        print(f"   分词结果: {tokens}")
+        assert "订单" in tokens and "inv-2024-001" in tokens and "001" in tokens and "err_404" in tokens
+        
+        workflow, _ = _build_offline_workflow([])
+        manager = workflow.vector_store_manager
+        manager.add_documents("products", [
+            Document(page_content=f"产品型号SKU-{i:04d}的保修期为{i % 5 + 1}年", metadata={"source": "test"})
+            for i in range(30)
+        ])
+        
+        question = "SKU-0017的保修期是多久？"
+        settings.hybrid_search_enabled = False
+        dense = workflow.qa_agent.retrieve_documents(question, "products")
+        settings.hybrid_search_enabled = True
+        hybrid = workflow.qa_agent.retrieve_documents(question, "products")
+        print(f"   仅向量: {[doc.page_content[4:12] for doc in dense]}")
+        print(f"   混合检索: {[doc.page_content[4:12] for doc in hybrid]}")
+        assert len(hybrid) == workflow.qa_agent.top_k
+        assert "SKU-0017" in hybrid[0].page_content
+        
+        print("\n📝 测试索引随写入/删除更新...")
+        new_doc = Document(page_content="产品型号SKU-9999的保修期为10年", metadata={"source": "new"})
+        manager.add_documents("products", [new_doc])
+        hits = manager.sparse_search("products", "SKU-9999", k=1)
+        assert hits and "SKU-9999" in hits[0][0].page_content
+        manager.delete_documents("products", [hits[0][0].metadata["_id"]])
+        hits = manager.sparse_search("products", "SKU-9999", k=1)
+        assert not hits or "SKU-9999" not in hits[0][0].page_content
+        print(f"   BM25索引文档数: {len(manager.sparse_indexes['products'])}")
+        
+        return True
+    except Exception as e:
+        print(f"❌ 混合检索测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        settings.hybrid_search_enabled = hybrid_enabled
+
+def test_matryoshka_truncation():
+    """测试截断维度的路由索引、分类器和第一轮搜索"""
+    print("\n🧪 测试Matryoshka维度截断")
+    print("="*40)
+    
+    try:
+        import tempfile
+        import numpy as np
+        from langchain_core.documents import Document
+        from src.tools.routing_index import RoutingIndex
+        from src.tools.routing_classifier import RoutingClassifier
+        from src.tools.local_vector_store import LocalCollection
+        
+        routing_index = RoutingIndex(prototypes_per_collection=4, dimension=256)
+        classifier = RoutingClassifier(dimension=256)
+        workflow, _ = _build_offline_workflow(
+            ["这是一个测试答案"], routing_index=routing_index, routing_classifier=classifier
+        )
+        workflow.add_documents("products", [_FakeUploadedFile("products.txt", "产品支持AI功能")])
+        workflow.add_documents("support", [_FakeUploadedFile("support.txt", "如何申请退款")])
+        print(f"   路由索引矩阵: {routing_index._matrix.shape}, 分类器权重: {classifier._weights.shape}")
+        assert routing_index._matrix.shape[1] == 256 and classifier._weights.shape[0] == 256
+        
+        result = workflow.process_question("如何申请退款")
+        print(f"   路由结果: {result['routed_database']} ({result['routing_info'].get('routing_method')})")
+        assert result["routed_database"] == "support"
+        
+        print("\n📝 测试按其他维度加载...")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            index_path = os.path.join(tmp_dir, "routing_index.npz")
+            classifier_path = os.path.join(tmp_dir, "routing_classifier.npz")
+            routing_index.save(index_path)
+            classifier.save(classifier_path)
+            assert RoutingIndex.load(index_path, 4, dimension=128)._matrix.shape[1] == 128
+            assert not RoutingIndex.load(index_path, 4).is_ready()
+            reloaded = RoutingClassifier.load(classifier_path, dimension=128)
+            assert not reloaded.is_trained() and reloaded.pending_examples
+            assert reloaded.train() and reloaded._weights.shape[0] == 128
+        
+        print("\n📝 测试截断维度的第一轮搜索...")
+        rng = np.random.default_rng(0)
+        # 前面的维度方差更大，近似Matryoshka embedding
+        centers = rng.normal(size=(20, 256)) * np.linspace(3, 0.1, 256)
+        vectors = centers[rng.integers(20, size=2000)] + rng.normal(scale=0.3, size=(2000, 256))
+        queries = centers[rng.integers(20, size=30)] + rng.normal(scale=0.3, size=(30, 256))
+        ids = [str(i) for i in range(len(vectors))]
+        documents = [Document(page_content=doc_id) for doc_id in ids]
+        path = tempfile.mkdtemp()
+        exact = LocalCollection(path, "exact")
+        exact.upsert(ids, documents, vectors)
+        expected = exact.search(queries, 5)
+        exact.close()
+        truncated = LocalCollection(path, "truncated", search_dimension=128, rescore_oversampling=10)
+        results = truncated.search(queries, 5)
+        recall = np.mean([
+            len({doc.page_content for doc, _ in e} & {doc.page_content for doc, _ in r}) / 5
+            for e, r in zip(expected, results)
+        ])
+        print(f"   第一轮副本: {truncated._search_vectors.shape}, recall@5: {recall:.3f}")
+        assert truncated._search_vectors.shape == (truncated._capacity, 128)
+        assert recall >= 0.9
+        assert abs(results[0][0][1] - expected[0][0][1]) < 1e-5
+        
+        return True
+    except Exception as e:
+        print(f"❌ Matryoshka维度截断测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_shared_workflow():
+    """测试共享工作流：配置指纹和多会话并发问答"""
+    print("\n🧪 测试共享工作流")
+    print("="*40)
+    
+    from dataclasses import replace
+    from src.data import COLLECTIONS
+    from src.models.config import settings
+    from src.workflow import RAGWorkflow
+    original_collection = COLLECTIONS["products"]
+    original_top_k = settings.qa_top_k
+    try:
+        from concurrent.futures import ThreadPoolExecutor
+        
+        fingerprint = RAGWorkflow.config_fingerprint()
+        assert RAGWorkflow.config_fingerprint() == fingerprint
+        settings.qa_top_k = original_top_k + 1
+        assert RAGWorkflow.config_fingerprint() != fingerprint
+        settings.qa_top_k = original_top_k
+        COLLECTIONS["products"] = replace(original_collection, search_ef=64)
+        assert RAGWorkflow.config_fingerprint() != fingerprint
+        COLLECTIONS["products"] = original_collection
+        assert RAGWorkflow.config_fingerprint() == fingerprint
+        print(f"   配置指纹: {fingerprint[:12]}... (修改设置或集合配置后改变)")
+        
+        print("\n📝 测试修改.env后（不重新导入模块）指纹改变并重新加载设置...")
+        import tempfile
+        from src.models.config import Settings, reload_settings
+        cwd = os.getcwd()
+        saved = settings.model_dump()
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                os.chdir(tmp_dir)
+                with open(".env", "w", encoding="utf-8") as f:
+                    f.write(f"QA_TOP_K={original_top_k + 2}\n")
+                before = RAGWorkflow.config_fingerprint(Settings())
+                with open(".env", "w", encoding="utf-8") as f:
+                    f.write(f"QA_TOP_K={original_top_k + 3}\n")
+                after = RAGWorkflow.config_fingerprint(Settings())
+                assert after != before
+                assert reload_settings() and settings.qa_top_k == original_top_k + 3
+                assert not reload_settings()
+                assert RAGWorkflow.config_fingerprint() == after
+        finally:
+            os.chdir(cwd)
+            for name, value in saved.items():
+                setattr(settings, name, value)
+        assert RAGWorkflow.config_fingerprint() == fingerprint
+        
+        print("\n📝 测试多个会话并发使用同一个工作流...")
+        workflow, _ = _build_offline_workflow(["这是一个测试答案"])
+        workflow.add_documents("products", [_FakeUploadedFile("products.txt", "产品支持AI功能")])
+        # 与文档相同的文本得到相同的向量，向量路由即可命中，不需要LLM路由
+        questions = ["产品支持AI功能"] * 16
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(workflow.process_question, questions))
+        print(f"   并发问答: {sum(r['success'] for r in results)}/{len(results)} 成功")
+        assert all(r["success"] and r["routed_database"] == "products" for r in results)
+        
+        return True
+    except Exception as e:
+        print(f"❌ 共享工作流测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        COLLECTIONS["products"] = original_collection
+        settings.qa_top_k = original_top_k
+
+def test_lazy_imports():
+    """测试导入工作流时不加载重依赖"""
+    print("\n🧪 测试延迟导入")
+    print("="*40)
+    
+    try:
+        import json
+        import subprocess
+        
+        heavy = ["qdrant_client", "langchain_qdrant", "pypdf", "langchain_community", "langchain", "langchain_openai", "openai"]
+        code = (
+            "import json, sys; import src.workflow; "
+            f"print(json.dumps([m for m in {heavy!r} if m in sys.modules]))"
+        )
+        completed = subprocess.run(
+            [sys.executable, "-c", code], cwd=os.path.join(os.path.dirname(__file__), '..'),
+            capture_output=True, text=True, check=True
+        )
+        loaded = json.loads(completed.stdout.strip().splitlines()[-1])
+        print(f"   导入src.workflow后加载的重依赖: {loaded or '无'}")
+        assert loaded == []
+        
+        print("\n📝 测试包导出的名称按需导入...")
+        import src.tools
+        from src.tools import BM25Index, VectorStoreManager
+        from src.models import get_chat_model
+        from src.agents import QAAgent
+        assert src.tools.VectorStoreManager is VectorStoreManager and "RoutingIndex" in dir(src.tools)
+        try:
+            src.tools.NotExported
+            raise AssertionError("未导出的名称应抛出AttributeError")
+        except AttributeError:
+            pass
+        
+        return True
+    except Exception as e:
+        print(f"❌ 延迟导入测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_offline_benchmark():
+    """测试离线基准测试脚本（小规模运行）"""
+    print("\n🧪 测试离线基准测试")
+    print("="*40)
+    
+    try:
+        from argparse import Namespace
+        from benchmark.offline_benchmark import run
+        
+        results = run(Namespace(
+            questions=12, warmup=1, question_words=6, files=3, words_per_file=400,
+            words_per_topic=12, dimension=64, llm_latency_ms=0.0, seed=0
+        ))
+        print(f"   写入: {results['ingestion']['chunks']} 个文档块, {results['ingestion']['chunks_per_second']} 块/秒")
+        print(f"   节点延迟: { {name: stats['p50_ms'] for name, stats in results['nodes'].items()} }")
+        assert results["ingestion"]["chunks"] > 0
+        assert results["questions"]["failures"] == 0
+        assert results["questions"]["embedding_calls_per_question"] == 1
+        assert set(results["nodes"]) == {"route", "retrieve", "generate", "total"}
+        assert all(stats["count"] == 12 for stats in results["nodes"].values())
+        
+        return True
+    except Exception as e:
+        print(f"❌ 离线基准测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
 def main():
     """运行所有工作流测试"""
     print("🔧 RAG数据库路由系统 - 工作流测试")
@@ -323,7 +1078,22 @@ def main():
         ("工作流节点", test_workflow_nodes),
         ("工作流图", test_workflow_graph),
         ("工作流条件", test_workflow_conditions),
-        ("工作流性能", test_workflow_performance)
+        ("工作流性能", test_workflow_performance),
+        ("单次embedding", test_single_embedding_per_question),
+        ("流式文档写入", test_streaming_ingestion),
+        ("增量重建索引", test_incremental_reindex),
+        ("路由索引", test_routing_index),
+        ("路由分类器", test_routing_classifier),
+        ("复用路由结果", test_routing_hits_reuse),
+        ("流式问答", test_stream_question),
+        ("异步问答", test_async_process_question),
+        ("批量问答", test_process_questions),
+        ("批量查询向量", test_batch_query_embeddings),
+        ("混合检索", test_hybrid_search),
+        ("维度截断", test_matryoshka_truncation),
+        ("共享工作流", test_shared_workflow),
+        ("延迟导入", test_lazy_imports),
+        ("离线基准测试", test_offline_benchmark)
     ]
     
     results = {}